@@ -8,7 +8,10 @@ from django.contrib import messages
 from django.db.models import Q
 from django.utils import timezone
 from core.models import Skill, Technician, ServiceRequest, Assignment, GoogleMapsConfig
+from routing.jobs import active_job, submit_solve_job
 from routing.services import RoutingService
+from routing.models import SolveJob
+from routing.snapshot import candidate_requests
 
 
 class AssignmentAdminViews:
@@ -34,11 +37,13 @@ class AssignmentAdminViews:
                 from datetime import datetime
                 assigned_date = datetime.strptime(assigned_date_str, '%Y-%m-%d').date()
                 
-                # Get pending service requests
-                pending_requests = ServiceRequest.objects.filter(
-                    status='pending',
-                    lat__isnull=False,
-                    lon__isnull=False
+                # Warm start re-plans the persisted plan for the date along with pending requests
+                warm_start = request.POST.get('warm_start') == 'on'
+                has_plan = warm_start and Assignment.objects.filter(assigned_date=assigned_date, status='assigned').exists()
+                
+                # Get pending service requests whose window overlaps the date
+                pending_requests = candidate_requests(
+                    assigned_date, config.candidate_look_back_days, config.candidate_look_ahead_days
                 )
                 
                 # Get active technicians with valid coordinates
@@ -48,95 +53,20 @@ class AssignmentAdminViews:
                     depot_lon__isnull=False
                 ).prefetch_related('skills')
                 
-                if not pending_requests.exists():
+                if not pending_requests.exists() and not has_plan:
                     messages.warning(request, 'No pending service requests found.')
                 elif not active_technicians.exists():
                     messages.error(request, 'No active technicians with valid depot coordinates.')
                 else:
-                    # Run OR-Tools solver
-                    try:
-                        routing_service = RoutingService()
-                        
-                        # Get assignments and unserved requests
-                        assignments_data, unserved, total_travel = routing_service.solve(
-                            list(active_technicians),
-                            list(pending_requests),
-                            timezone.make_aware(datetime.combine(assigned_date, datetime.min.time()))
+                    # Run OR-Tools solver in the background; the assign page polls the job status
+                    job = active_job(assigned_date)
+                    if not job:
+                        job = SolveJob.objects.create(
+                            assigned_date=assigned_date, requested_by=request.user, warm_start=warm_start
                         )
-                        
-                        print(f"\nDEBUG: assignments_data count: {len(assignments_data)}")
-                        
-                        # Save assignments
-                        saved_count = 0
-                        updated_count = 0
-                        for assignment_data in assignments_data:
-                            print(f"DEBUG: Processing assignment for {assignment_data['service_request'].name}")
-                            
-                            # Check if assignment already exists for this date
-                            existing = Assignment.objects.filter(
-                                service_request=assignment_data['service_request'],
-                                assigned_date=assigned_date
-                            ).first()
-                            
-                            if existing:
-                                # Update existing assignment
-                                existing.technician = assignment_data['technician']
-                                existing.sequence_order = assignment_data['sequence_order']
-                                existing.planned_start = assignment_data['planned_start']
-                                existing.planned_finish = assignment_data['planned_finish']
-                                existing.travel_time_minutes = assignment_data.get('travel_time', 0.0)
-                                existing.status = 'assigned'
-                                existing.save()
-                                updated_count += 1
-                                print(f"DEBUG: Updated existing assignment")
-                            else:
-                                # Create new assignment
-                                assignment = Assignment.objects.create(
-                                    service_request=assignment_data['service_request'],
-                                    technician=assignment_data['technician'],
-                                    assigned_date=assigned_date,
-                                    sequence_order=assignment_data['sequence_order'],
-                                    planned_start=assignment_data['planned_start'],
-                                    planned_finish=assignment_data['planned_finish'],
-                                    travel_time_minutes=assignment_data.get('travel_time', 0.0),
-                                    status='assigned'
-                                )
-                                saved_count += 1
-                                print(f"DEBUG: Created new assignment")
-                            
-                            # Update service request status
-                            assignment_data['service_request'].status = 'assigned'
-                            assignment_data['service_request'].save()
-                        
-                        if saved_count > 0 and updated_count > 0:
-                            messages.success(
-                                request, 
-                                f'Successfully created {saved_count} new assignments and updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
-                            )
-                        elif saved_count > 0:
-                            messages.success(
-                                request, 
-                                f'Successfully assigned {saved_count} jobs. Total travel time: {total_travel:.1f} minutes.'
-                            )
-                        elif updated_count > 0:
-                            messages.success(
-                                request, 
-                                f'Updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
-                            )
-                        else:
-                            messages.info(request, 'No assignments created or updated.')
-                        
-                        if unserved:
-                            messages.warning(
-                                request,
-                                f'{len(unserved)} requests could not be assigned (unserved).'
-                            )
-                        
-                        # Redirect to assignments list for the selected date
-                        return redirect(f'/admin/core/assignment/?assigned_date={assigned_date}')
-                        
-                    except Exception as e:
-                        messages.error(request, f'Assignment failed: {str(e)}')
+                        submit_solve_job(job)
+                    
+                    return redirect(f'{reverse("core:admin_assign")}?filter_date={assigned_date}&job={job.pk}')
         
         # GET request - show assignment form
         pending_count = ServiceRequest.objects.filter(status='pending').count()
@@ -308,7 +238,7 @@ class ServiceRequestAdmin(admin.ModelAdmin):
         ('Status', {'fields': ('priority', 'status', 'notes')}),
     )
     
-    actions = ['bulk_edit', 'edit_multiple', 'mark_as_pending', 'mark_as_assigned', 'mark_as_completed', 'mark_as_cancelled']
+    actions = ['bulk_edit', 'edit_multiple', 'insert_into_plan', 'mark_as_pending', 'mark_as_assigned', 'mark_as_completed', 'mark_as_cancelled']
     
     def edit_multiple(self, request, queryset):
         """Edit multiple service requests on a single page"""
@@ -661,6 +591,35 @@ class ServiceRequestAdmin(admin.ModelAdmin):
         return "-"
     assigned_skill_info.short_description = 'Required Skill'
     
+    def insert_into_plan(self, request, queryset):
+        """Insert pending requests into the existing plan for their window date at the cheapest position"""
+        routing_service = RoutingService()
+        inserted = []
+        not_inserted = []
+        
+        for service_request in queryset.filter(status='pending', window_start__isnull=False).order_by('window_start'):
+            assigned_date = timezone.localtime(service_request.window_start).date()
+            result = routing_service.insert_request(service_request, assigned_date)
+            if result:
+                inserted.append(
+                    f"{service_request.name} → {result['technician'].user.username} "
+                    f"at {timezone.localtime(result['planned_start']).strftime('%H:%M')}"
+                )
+            else:
+                not_inserted.append(service_request.name)
+        
+        if inserted:
+            messages.success(request, f"Inserted {len(inserted)} request(s) into the plan: {', '.join(inserted)}")
+        if not_inserted:
+            messages.warning(
+                request,
+                f"No feasible position for {len(not_inserted)} request(s): {', '.join(not_inserted)}. "
+                f"Run assignment for their date instead."
+            )
+        if not inserted and not not_inserted:
+            messages.info(request, "No pending requests with a time window selected.")
+    insert_into_plan.short_description = "Insert into existing plan (cheapest position)"
+    
     def mark_as_pending(self, request, queryset):
         """Mark service requests as pending and delete associated assignments"""
         deleted_count = 0
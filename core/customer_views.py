@@ -1,3 +1,5 @@
+import logging
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
@@ -7,6 +9,8 @@ from django.http import JsonResponse
 from core.models import ServiceRequest, Assignment, Technician, GoogleMapsConfig
 from maps.services import GeocodingService, haversine_km
 
+logger = logging.getLogger(__name__)
+
 
 @login_required
 @user_passes_test(lambda u: u.is_customer() or u.is_superuser)
@@ -38,6 +42,32 @@ def customer_dashboard(request):
     return render(request, 'core/customer_dashboard.html', context)
 
 
+def _insert_into_plan(service_request):
+    """
+    Insert a new request into the existing plan for its window date, if that date
+    has one and no solve is queued or running for it (the solve re-plans the day).
+    Days without a plan leave the request pending for the next assignment run.
+    Returns: the insert_request result, or None
+    """
+    from routing.models import SolveJob
+    from routing.services import RoutingService
+    
+    if not service_request.window_start:
+        return None
+    assigned_date = timezone.localtime(service_request.window_start).date()
+    if not Assignment.objects.filter(assigned_date=assigned_date, status='assigned').exists():
+        return None
+    # Plain lookup: recovering stale jobs is left to the runner and the assign views
+    if SolveJob.objects.filter(assigned_date=assigned_date, status__in=['queued', 'running']).exists():
+        return None
+    try:
+        return RoutingService().insert_request(service_request, assigned_date)
+    except Exception:
+        # The request is saved either way; the next assignment run picks it up
+        logger.exception('Could not insert request %s into the plan for %s', service_request.pk, assigned_date)
+        return None
+
+
 @login_required
 @user_passes_test(lambda u: u.is_customer() or u.is_superuser)
 def customer_submit_request(request):
@@ -85,6 +115,14 @@ def customer_submit_request(request):
                     service_request.save()
                     form.save_m2m()  # Save M2M relationships (required_skills)
                     
+                    inserted = _insert_into_plan(service_request)
+                    if inserted:
+                        messages.success(
+                            request,
+                            f"Service request submitted and scheduled for "
+                            f"{timezone.localtime(inserted['planned_start']).strftime('%d %b %H:%M')}."
+                        )
+                        return redirect('core:customer_dashboard')
                     messages.success(request, 'Service request submitted successfully!')
                     return redirect('core:customer_dashboard')
                 else:
@@ -93,8 +131,6 @@ def customer_submit_request(request):
                 messages.error(request, f'Error geocoding address: {str(e)}')
         else:
             # Log form errors for debugging
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f'Form errors: {form.errors}')
             logger.error(f'Form data: {request.POST}')
             messages.error(request, f'Please correct the form errors: {form.errors}')
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_remove_servicerequest_required_skills_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="geo_decomposition",
+            field=models.BooleanField(
+                default=False,
+                help_text="Split solves into geographic regions solved in parallel",
+            ),
+        ),
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="region_target_requests",
+            field=models.IntegerField(
+                default=150,
+                help_text="Target number of requests per region when decomposing",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_googlemapsconfig_geo_decomposition"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="candidate_look_ahead_days",
+            field=models.IntegerField(
+                default=0,
+                help_text="Also plan pending requests whose window starts up to this many days after the date",
+            ),
+        ),
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="candidate_look_back_days",
+            field=models.IntegerField(
+                default=0,
+                help_text="Also plan pending requests whose window ended up to this many days before the date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicerequest",
+            index=models.Index(
+                fields=["status", "window_start", "window_end"],
+                name="core_servic_status_1dd91b_idx",
+            ),
+        ),
+    ]
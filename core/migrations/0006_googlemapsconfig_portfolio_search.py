@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_candidate_selection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="portfolio_search",
+            field=models.BooleanField(
+                default=False,
+                help_text="Search with several strategies in parallel processes and keep the best plan",
+            ),
+        ),
+    ]
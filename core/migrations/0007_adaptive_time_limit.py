@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_googlemapsconfig_portfolio_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="adaptive_time_limit",
+            field=models.BooleanField(
+                default=True,
+                help_text="Scale the search time with the number of requests, up to the time limit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="plateau_seconds",
+            field=models.FloatField(
+                default=3.0,
+                help_text="End the search when the plan has not improved for this many seconds (0 = use the full time limit)",
+            ),
+        ),
+    ]
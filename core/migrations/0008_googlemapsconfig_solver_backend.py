@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_adaptive_time_limit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="solver_backend",
+            field=models.CharField(
+                choices=[
+                    ("ortools", "OR-Tools"),
+                    ("alns", "Adaptive large neighbourhood search (NumPy)"),
+                ],
+                default="ortools",
+                help_text="Search engine that improves the greedy plan",
+                max_length=20,
+            ),
+        ),
+    ]
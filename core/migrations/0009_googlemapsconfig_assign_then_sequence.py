@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_googlemapsconfig_solver_backend"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googlemapsconfig",
+            name="assign_then_sequence",
+            field=models.BooleanField(
+                default=False,
+                help_text="Assign requests to technicians first, then sequence each technician's route separately in parallel (for very large days)",
+            ),
+        ),
+    ]
@@ -28,12 +28,26 @@ class Skill(models.Model):
 
 class GoogleMapsConfig(models.Model):
     """Singleton model for Google Maps configuration"""
+    SOLVER_BACKEND_CHOICES = [
+        ('ortools', 'OR-Tools'),
+        ('alns', 'Adaptive large neighbourhood search (NumPy)'),
+    ]
+    
     api_key = models.CharField(max_length=500, help_text="Google Maps API Key")
     avg_speed_kph = models.IntegerField(default=40, help_text="Average speed in km/h")
     late_penalty_per_min = models.IntegerField(default=500, help_text="Penalty per minute of lateness")
     drop_penalty_per_job = models.IntegerField(default=100000, help_text="Penalty per dropped job")
     return_to_depot = models.BooleanField(default=True, help_text="Return to depot at end of day")
     time_limit_seconds = models.IntegerField(default=30, help_text="OR-Tools solver time limit")
+    geo_decomposition = models.BooleanField(default=False, help_text="Split solves into geographic regions solved in parallel")
+    region_target_requests = models.IntegerField(default=150, help_text="Target number of requests per region when decomposing")
+    assign_then_sequence = models.BooleanField(default=False, help_text="Assign requests to technicians first, then sequence each technician's route separately in parallel (for very large days)")
+    adaptive_time_limit = models.BooleanField(default=True, help_text="Scale the search time with the number of requests, up to the time limit")
+    plateau_seconds = models.FloatField(default=3.0, help_text="End the search when the plan has not improved for this many seconds (0 = use the full time limit)")
+    solver_backend = models.CharField(max_length=20, choices=SOLVER_BACKEND_CHOICES, default='ortools', help_text="Search engine that improves the greedy plan")
+    portfolio_search = models.BooleanField(default=False, help_text="Search with several strategies in parallel processes and keep the best plan")
+    candidate_look_back_days = models.IntegerField(default=0, help_text="Also plan pending requests whose window ended up to this many days before the date")
+    candidate_look_ahead_days = models.IntegerField(default=0, help_text="Also plan pending requests whose window starts up to this many days after the date")
     
     class Meta:
         verbose_name = "Google Maps Configuration"
@@ -125,6 +139,10 @@ class ServiceRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Date-scoped candidate selection: status + window range predicates
+            models.Index(fields=['status', 'window_start', 'window_end']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.customer.username}"
@@ -1,6 +1,8 @@
 """
 Bulk Upload Service for processing Excel files with customer and technician data
 """
+import logging
+
 import pandas as pd
 from datetime import datetime, date, time
 from django.contrib.auth import get_user_model
@@ -10,6 +12,7 @@ from core.models import Technician, ServiceRequest, Skill, GoogleMapsConfig
 from maps.services import GeocodingService
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class BulkUploadService:
@@ -69,12 +72,23 @@ class BulkUploadService:
                         f"Row {idx + 2}: {str(e)}"
                     )
             
+            self._log_summary('Excel upload')
             return self.results
             
         except Exception as e:
+            logger.exception("Error reading Excel file")
             self.results['errors'].append(f"Error reading Excel file: {str(e)}")
             return self.results
     
+    def _log_summary(self, source):
+        """One info record per upload run"""
+        logger.info(
+            "%s: %d users created, %d updated, %d service requests, %d technicians, %d errors",
+            source, len(self.results['created_users']), len(self.results['updated_users']),
+            len(self.results['created_requests']), len(self.results['created_technicians']),
+            len(self.results['errors']),
+        )
+    
     def _process_customer(self, row, row_num):
         """Process a customer row from Excel"""
         username = str(row.get('Username', '')).strip()
@@ -98,57 +112,52 @@ class BulkUploadService:
         address = row.get('Address', '').strip()
         if address:
             try:
-                print(f"\n{'='*60}")
-                print(f"PROCESSING CUSTOMER ROW {row_num}")
-                print(f"{'='*60}")
+                logger.debug("Processing customer row %s", row_num)
                 
                 # Geocode address and validate Melbourne
-                print(f"Address to geocode: {address}")
+                logger.debug("Address to geocode: %s", address)
                 coords = self._geocode_address(address, row_num)
                 if not coords:
-                    print(f"ERROR: Geocoding failed for address: {address}")
+                    logger.warning("Geocoding failed for address: %s", address)
                     return
                 
                 lat, lon = coords
-                print(f"Geocoded successfully: lat={lat}, lon={lon}")
+                logger.debug("Geocoded successfully: lat=%s, lon=%s", lat, lon)
                 
                 # Parse service request data
                 service_minutes = int(row.get('ServiceMinutes', 60)) if pd.notna(row.get('ServiceMinutes')) else 60
-                print(f"Service minutes: {service_minutes}")
+                logger.debug("Service minutes: %s", service_minutes)
                 
                 window_start_raw = row.get('WindowStart')
                 window_end_raw = row.get('WindowEnd')
-                print(f"WindowStart raw: {window_start_raw} (type: {type(window_start_raw)})")
-                print(f"WindowEnd raw: {window_end_raw} (type: {type(window_end_raw)})")
+                logger.debug("WindowStart raw: %s (type: %s)", window_start_raw, type(window_start_raw))
+                logger.debug("WindowEnd raw: %s (type: %s)", window_end_raw, type(window_end_raw))
                 
                 window_start = self._parse_datetime(row.get('WindowStart'), row_num)
                 window_end = self._parse_datetime(row.get('WindowEnd'), row_num)
                 
-                print(f"WindowStart parsed: {window_start}")
-                print(f"WindowEnd parsed: {window_end}")
+                logger.debug("WindowStart parsed: %s", window_start)
+                logger.debug("WindowEnd parsed: %s", window_end)
                 
                 if not window_start or not window_end:
-                    print(f"ERROR: DateTime parsing failed for row {row_num}")
+                    logger.warning("DateTime parsing failed for row %s", row_num)
                     return
                 
                 # Parse priority
                 priority_str = str(row.get('Priority', '')).strip().lower()
                 priority_map = {'high': 1, 'medium': 2, 'low': 3}
                 priority = priority_map.get(priority_str, 2)
-                print(f"Priority: {priority_str} -> {priority}")
+                logger.debug("Priority: %s -> %s", priority_str, priority)
                 
                 # Create service request
                 service_name = str(row.get('ServiceType', 'Service Request')).strip()
-                print(f"Service name: {service_name}")
+                logger.debug("Service name: %s", service_name)
                 
-                print(f"Creating ServiceRequest with:")
-                print(f"  customer: {user.username}")
-                print(f"  address: {address}")
-                print(f"  lat: {lat}, lon: {lon}")
-                print(f"  service_minutes: {service_minutes}")
-                print(f"  window_start: {window_start}")
-                print(f"  window_end: {window_end}")
-                print(f"  priority: {priority}")
+                logger.debug(
+                    "Creating ServiceRequest: customer=%s, address=%s, lat=%s, lon=%s, service_minutes=%s, "
+                    "window=%s - %s, priority=%s",
+                    user.username, address, lat, lon, service_minutes, window_start, window_end, priority,
+                )
                 
                 service_request = ServiceRequest.objects.create(
                     customer=user,
@@ -162,56 +171,48 @@ class BulkUploadService:
                     priority=priority,
                     status='pending'
                 )
-                print(f"ServiceRequest created with id: {service_request.id}")
+                logger.debug("ServiceRequest created with id: %s", service_request.id)
                 
                 # Add required skill (only first skill from the list)
                 skills_str = str(row.get('RequiredSkills', '')).strip()
-                print(f"RequiredSkills from Excel: {skills_str}")
+                logger.debug("RequiredSkills from Excel: %s", skills_str)
                 if skills_str:
                     # Take only the first skill
                     first_skill = skills_str.split(',')[0].strip()
-                    print(f"Adding skill: {first_skill}")
+                    logger.debug("Adding skill: %s", first_skill)
                     self._add_skill_to_service_request(service_request, first_skill, row_num)
                 else:
-                    print("No skills provided")
+                    logger.debug("No skills provided")
                 
                 self.results['created_requests'].append(service_request)
-                print(f"SUCCESS: Service request created for row {row_num}")
-                print(f"{'='*60}\n")
+                logger.debug("Service request created for row %s", row_num)
                 
             except Exception as e:
-                import traceback
-                print(f"\n{'='*60}")
-                print(f"ERROR in row {row_num}: {str(e)}")
-                print(f"{'='*60}")
-                traceback.print_exc()
-                print(f"{'='*60}\n")
+                logger.exception("Error creating service request in row %s: %s", row_num, e)
                 self.results['errors'].append(f"Row {row_num}: Error creating service request: {str(e)}")
     
     def _process_technician(self, row, row_num):
         """Process a technician row from Excel"""
-        print(f"\n{'='*60}")
-        print(f"PROCESSING TECHNICIAN ROW {row_num}")
-        print(f"{'='*60}")
+        logger.debug("Processing technician row %s", row_num)
         
         username = str(row.get('Username', '')).strip()
         email = str(row.get('Email', '')).strip()
         
-        print(f"Username: {username}, Email: {email}")
+        logger.debug("Username: %s, Email: %s", username, email)
         
         if not username or not email:
             self.results['errors'].append(f"Row {row_num}: Username and Email are required")
-            print(f"ERROR: Missing username or email")
+            logger.warning("Missing username or email")
             return
         
         # Get or create user
-        print(f"Getting or creating user...")
+        logger.debug("Getting or creating user...")
         user, created = self._get_or_create_user(row, row_num, 'TECHNICIAN')
         if not user:
-            print(f"ERROR: Could not get or create user")
+            logger.warning("Could not get or create user")
             return
         
-        print(f"User created: {user.username}, role: {user.role}")
+        logger.debug("User created: %s, role: %s", user.username, user.role)
         
         if created:
             self.results['created_users'].append(user)
@@ -220,23 +221,23 @@ class BulkUploadService:
         
         # Create or update technician profile
         depot_address = str(row.get('DepotAddress', '')).strip()
-        print(f"Depot address: {depot_address}")
+        logger.debug("Depot address: %s", depot_address)
         
         if not depot_address:
             self.results['errors'].append(f"Row {row_num}: DepotAddress is required for technicians")
-            print(f"ERROR: Missing depot address")
+            logger.warning("Missing depot address")
             return
         
         try:
             # Geocode depot address and validate Melbourne
-            print(f"Geocoding depot address...")
+            logger.debug("Geocoding depot address...")
             coords = self._geocode_address(depot_address, row_num)
             if not coords:
-                print(f"ERROR: Geocoding failed for depot address")
+                logger.warning("Geocoding failed for depot address")
                 return
             
             depot_lat, depot_lon = coords
-            print(f"Geocoded successfully: lat={depot_lat}, lon={depot_lon}")
+            logger.debug("Geocoded successfully: lat=%s, lon=%s", depot_lat, depot_lon)
             
             # Parse capacity
             capacity_hours = row.get('CapacityHours', 8)
@@ -244,22 +245,22 @@ class BulkUploadService:
                 capacity_minutes = int(float(capacity_hours) * 60)
             else:
                 capacity_minutes = 480
-            print(f"Capacity: {capacity_hours} hours = {capacity_minutes} minutes")
+            logger.debug("Capacity: %s hours = %s minutes", capacity_hours, capacity_minutes)
             
             # Parse shift times
-            print(f"Parsing shift times...")
+            logger.debug("Parsing shift times...")
             shift_start = self._parse_time(row.get('ShiftStart'), row_num)
             shift_end = self._parse_time(row.get('ShiftEnd'), row_num)
             
-            print(f"Shift start: {shift_start}")
-            print(f"Shift end: {shift_end}")
+            logger.debug("Shift start: %s", shift_start)
+            logger.debug("Shift end: %s", shift_end)
             
             if not shift_start or not shift_end:
-                print(f"ERROR: Failed to parse shift times")
+                logger.warning("Failed to parse shift times")
                 return
             
             # Get or create technician profile
-            print(f"Creating technician profile...")
+            logger.debug("Creating technician profile...")
             technician, tech_created = Technician.objects.get_or_create(
                 user=user,
                 defaults={
@@ -274,8 +275,8 @@ class BulkUploadService:
                 }
             )
             
-            print(f"Technician profile created: {tech_created}")
-            print(f"Technician id: {technician.id if technician else 'None'}")
+            logger.debug("Technician profile created: %s", tech_created)
+            logger.debug("Technician id: %s", technician.id if technician else 'None')
             
             if not tech_created:
                 # Update existing technician
@@ -287,29 +288,23 @@ class BulkUploadService:
                 technician.shift_end = shift_end
                 technician.color_hex = str(row.get('ColorHex', '#4285F4')).strip()
                 technician.save()
-                print(f"Updated existing technician")
+                logger.debug("Updated existing technician")
             
             # Add skills
             skills_str = str(row.get('Skills', '')).strip()
-            print(f"Adding skills: {skills_str}")
+            logger.debug("Adding skills: %s", skills_str)
             if skills_str:
                 self._add_skills_to_technician(technician, skills_str, row_num)
             
             if tech_created:
                 self.results['created_technicians'].append(technician)
-                print(f"SUCCESS: Added technician to created_technicians list")
+                logger.debug("Added technician to created_technicians list")
             else:
-                print(f"Technician was updated (already existed)")
+                logger.debug("Technician was updated (already existed)")
             
-            print(f"{'='*60}\n")
             
         except Exception as e:
-            import traceback
-            print(f"\n{'='*60}")
-            print(f"ERROR in technician row {row_num}: {str(e)}")
-            print(f"{'='*60}")
-            traceback.print_exc()
-            print(f"{'='*60}\n")
+            logger.exception("Error in technician row %s: %s", row_num, e)
             self.results['errors'].append(f"Row {row_num}: Error creating technician: {str(e)}")
     
     def _get_or_create_user(self, row, row_num, role):
@@ -462,13 +457,11 @@ class BulkUploadService:
     
     def process_manual_entries(self, post_data):
         """Process manual entry data from form submission"""
-        # Debug: log all post data
-        print("=" * 50)
-        print("MANUAL ENTRY POST DATA:")
-        print("=" * 50)
-        for key in post_data.keys():
-            print(f"{key}: {post_data.get(key)}")
-        print("=" * 50)
+        # Debug: log all post data (never the passwords)
+        if logger.isEnabledFor(logging.DEBUG):
+            for key in post_data.keys():
+                if 'password' not in key:
+                    logger.debug("Manual entry POST %s: %s", key, post_data.get(key))
         
         row_count = 0
         processed = 0
@@ -518,31 +511,26 @@ class BulkUploadService:
                     window_start = post_data.get(f'window_start_{row_count}', '').strip()
                     window_end = post_data.get(f'window_end_{row_count}', '').strip()
                     
-                    print(f"\n{'='*60}")
-                    print(f"CUSTOMER DATA EXTRACTION for row {row_count}:")
-                    print(f"address: '{address}'")
-                    print(f"service_type: '{service_type}'")
-                    print(f"service_minutes: '{service_minutes}'")
-                    print(f"window_start: '{window_start}'")
-                    print(f"window_end: '{window_end}'")
+                    logger.debug(
+                        "Customer row %s: address='%s', service_type='%s', service_minutes='%s', window='%s' - '%s'",
+                        row_count, address, service_type, service_minutes, window_start, window_end,
+                    )
                     
                     # Handle single-select skill field (changed from multi-select)
                     required_skill = post_data.get(f'required_skill_{row_count}', '').strip()
-                    print(f"Row {row_count}: Required skill from form: '{required_skill}'")
+                    logger.debug("Row %s: Required skill from form: '%s'", row_count, required_skill)
                     
                     priority = post_data.get(f'priority_{row_count}', 'medium').strip()
                     notes = post_data.get(f'notes_{row_count}', '').strip()
                     
-                    print(f"priority: '{priority}'")
-                    print(f"notes: '{notes}'")
-                    print(f"{'='*60}\n")
+                    logger.debug("Row %s: priority='%s', notes='%s'", row_count, priority, notes)
                     
                     if not address:
-                        print(f"ERROR: Address is empty for customer row {row_count}")
+                        logger.warning("Address is empty for customer row %s", row_count)
                     if not window_start:
-                        print(f"ERROR: Window start is empty for customer row {row_count}")
+                        logger.warning("Window start is empty for customer row %s", row_count)
                     if not window_end:
-                        print(f"ERROR: Window end is empty for customer row {row_count}")
+                        logger.warning("Window end is empty for customer row %s", row_count)
                     
                     if address:
                         # Create service request
@@ -552,13 +540,13 @@ class BulkUploadService:
                                 lat, lon = coords
                                 
                                 # Parse datetime fields
-                                print(f"Parsing window_start: '{window_start}'")
+                                logger.debug("Parsing window_start: '%s'", window_start)
                                 window_start_dt = self._parse_datetime_manual(window_start, row_count + 1)
-                                print(f"Parsing window_end: '{window_end}'")
+                                logger.debug("Parsing window_end: '%s'", window_end)
                                 window_end_dt = self._parse_datetime_manual(window_end, row_count + 1)
                                 
-                                print(f"Parsed window_start_dt: {window_start_dt}")
-                                print(f"Parsed window_end_dt: {window_end_dt}")
+                                logger.debug("Parsed window_start_dt: %s", window_start_dt)
+                                logger.debug("Parsed window_end_dt: %s", window_end_dt)
                                 
                                 if window_start_dt and window_end_dt:
                                     priority_map = {'high': 1, 'medium': 2, 'low': 3}
@@ -578,7 +566,7 @@ class BulkUploadService:
                                         notes=notes
                                     )
                                     
-                                    print(f"SUCCESS: Created service request for customer")
+                                    logger.debug("Created service request for customer")
                                     
                                     # Add required skill (single skill now)
                                     if required_skill:
@@ -586,11 +574,11 @@ class BulkUploadService:
                                     
                                     self.results['created_requests'].append(service_request)
                                 else:
-                                    print(f"ERROR: Could not parse datetime fields for row {row_count}")
+                                    logger.warning("Could not parse datetime fields for row %s", row_count)
                             else:
-                                print(f"ERROR: Could not geocode address '{address}'")
+                                logger.warning("Could not geocode address '%s'", address)
                         except Exception as e:
-                            print(f"ERROR creating service request: {str(e)}")
+                            logger.exception("Error creating service request: %s", e)
                             self.results['errors'].append(f"Row {row_count + 1}: Error creating service request: {str(e)}")
                 
                 # Process technician specific fields
@@ -602,16 +590,16 @@ class BulkUploadService:
                     
                     # Handle multi-select skills field (returns a list)
                     skills_list = post_data.getlist(f'skills_{row_count}')
-                    print(f"Row {row_count}: Skills list from form: {skills_list}")
+                    logger.debug("Row %s: Skills list from form: %s", row_count, skills_list)
                     
                     # Also try alternative naming
                     if not skills_list:
                         # Try without row_count
                         skills_list = post_data.getlist('skills')
-                        print(f"Row {row_count}: Trying without row_count: {skills_list}")
+                        logger.debug("Row %s: Trying without row_count: %s", row_count, skills_list)
                     
                     skills = ', '.join(skills_list) if skills_list else ''
-                    print(f"Row {row_count}: Final skills string: {skills}")
+                    logger.debug("Row %s: Final skills string: %s", row_count, skills)
                     
                     color_hex = post_data.get(f'color_hex_{row_count}', '#4285F4').strip()
                     
@@ -684,6 +672,7 @@ class BulkUploadService:
                 row_count += 1
                 processed += 1
         
+        self._log_summary('Manual entry')
         return self.results
     
     def _get_or_create_user_manual(self, username, email, password, phone, role):
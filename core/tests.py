@@ -1,3 +1,63 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from core.customer_views import _insert_into_plan
+from core.models import Assignment, ServiceRequest, Technician
+from routing.models import SolveJob
+
+DAY = date(2026, 11, 2)
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime.combine(DAY, time(hour, minute)))
+
+
+class InsertOnSubmitTests(TestCase):
+    """New customer requests join the existing plan for their date"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.customer = User.objects.create(username='customer', role='CUSTOMER')
+        self.technician = Technician.objects.create(
+            user=User.objects.create(username='tech1', role='TECHNICIAN'),
+            depot_address='Depot', depot_lat=-37.8136, depot_lon=144.9631,
+            shift_start=time(8), shift_end=time(16),
+        )
+
+    def make_request(self, name, start, service=60):
+        return ServiceRequest.objects.create(
+            customer=self.customer, name=name, address='Address', lat=-37.8136, lon=144.9631,
+            service_minutes=service, window_start=start, window_end=start + timedelta(hours=3),
+        )
+
+    def test_inserted_into_existing_plan(self):
+        planned = self.make_request('planned', at(9))
+        Assignment.objects.create(service_request=planned, technician=self.technician, assigned_date=DAY,
+                                  sequence_order=1, planned_start=at(9), planned_finish=at(10))
+        new = self.make_request('new', at(10))
+
+        result = _insert_into_plan(new)
+
+        self.assertEqual(result['technician'], self.technician)
+        self.assertEqual(result['planned_start'], at(10))
+        new.refresh_from_db()
+        self.assertEqual(new.status, 'assigned')
+
+    def test_left_pending_without_a_plan(self):
+        new = self.make_request('new', at(10))
+        self.assertIsNone(_insert_into_plan(new))
+        self.assertFalse(Assignment.objects.exists())
+        new.refresh_from_db()
+        self.assertEqual(new.status, 'pending')
 
-# Create your tests here.
+    def test_left_to_a_queued_solve(self):
+        planned = self.make_request('planned', at(9))
+        Assignment.objects.create(service_request=planned, technician=self.technician, assigned_date=DAY,
+                                  sequence_order=1, planned_start=at(9), planned_finish=at(10))
+        SolveJob.objects.create(assigned_date=DAY)
+        new = self.make_request('new', at(10))
+        self.assertIsNone(_insert_into_plan(new))
+        self.assertEqual(Assignment.objects.count(), 1)
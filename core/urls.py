@@ -9,6 +9,9 @@ app_name = 'core'
 urlpatterns = [
     # Admin views
     path('admin/assign/', views.admin_assign_view, name='admin_assign'),
+    path('admin/assign/jobs/<int:job_id>/', views.admin_solve_job_status, name='admin_solve_job_status'),
+    path('admin/assign/jobs/<int:job_id>/cancel/', views.admin_solve_job_cancel, name='admin_solve_job_cancel'),
+    path('admin/assign/jobs/<int:job_id>/accept/', views.admin_solve_job_accept, name='admin_solve_job_accept'),
     path('admin/map/', views.admin_map_view, name='admin_map'),
     path('admin/technician/', views.admin_technician_view, name='admin_technician'),
     path('admin/technician/<int:technician_id>/', views.admin_technician_view, name='admin_technician_detail'),
@@ -1,11 +1,16 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Q
 from django.utils import timezone
 from core.models import Technician, ServiceRequest, Assignment, GoogleMapsConfig
-from routing.services import RoutingService
+from routing.intervals import IntervalIndex
+from routing.jobs import submit_solve_job, cancel_solve_job, accept_solve_job, active_job, convergence, recover_stale_jobs
+from routing.models import SolveJob, SolveRun
+from routing.snapshot import candidate_requests, day_bounds
 
 
 @login_required
@@ -25,11 +30,13 @@ def admin_assign_view(request):
         from datetime import datetime
         assigned_date = datetime.strptime(assigned_date_str, '%Y-%m-%d').date()
         
-        # Get pending service requests
-        pending_requests = ServiceRequest.objects.filter(
-            status='pending',
-            lat__isnull=False,
-            lon__isnull=False
+        # Warm start re-plans the persisted plan for the date along with pending requests
+        warm_start = request.POST.get('warm_start') == 'on'
+        has_plan = warm_start and Assignment.objects.filter(assigned_date=assigned_date, status='assigned').exists()
+        
+        # Get pending service requests whose window overlaps the date
+        pending_requests = candidate_requests(
+            assigned_date, config.candidate_look_back_days, config.candidate_look_ahead_days
         )
         
         # Get active technicians with valid coordinates
@@ -39,7 +46,7 @@ def admin_assign_view(request):
             depot_lon__isnull=False
         ).prefetch_related('skills')
         
-        if not pending_requests.exists():
+        if not pending_requests.exists() and not has_plan:
             messages.warning(request, 'No pending service requests found.')
             filter_date_param = request.GET.get('filter_date', '')
             if filter_date_param:
@@ -53,136 +60,20 @@ def admin_assign_view(request):
                 return redirect(f'{reverse("core:admin_assign")}?filter_date={filter_date_param}')
             return redirect('core:admin_assign')
         
-        # Run OR-Tools solver
-        try:
-            routing_service = RoutingService()
-            
-            # Get assignments and unserved requests
-            assignments_data, unserved, total_travel = routing_service.solve(
-                list(active_technicians),
-                list(pending_requests),
-                timezone.make_aware(datetime.combine(assigned_date, datetime.min.time()))
+        # Run OR-Tools solver in the background; the assign page polls the job status
+        # Abandoned jobs (worker killed mid-solve) are failed and re-queued rather than reused forever
+        running_job = active_job(assigned_date)
+        if running_job:
+            messages.info(request, f'An assignment run for {assigned_date} is already in progress.')
+            job = running_job
+        else:
+            job = SolveJob.objects.create(
+                assigned_date=assigned_date, requested_by=request.user, warm_start=warm_start
             )
-            
-            # Save assignments
-            saved_count = 0
-            updated_count = 0
-            for assignment_data in assignments_data:
-                # Check if assignment already exists for this date
-                existing = Assignment.objects.filter(
-                    service_request=assignment_data['service_request'],
-                    assigned_date=assigned_date
-                ).first()
-                
-                if existing:
-                    # Update existing assignment
-                    existing.technician = assignment_data['technician']
-                    existing.sequence_order = assignment_data['sequence_order']
-                    existing.planned_start = assignment_data['planned_start']
-                    existing.planned_finish = assignment_data['planned_finish']
-                    existing.travel_time_minutes = assignment_data.get('travel_time', 0.0)
-                    existing.status = 'assigned'
-                    existing.save()
-                    updated_count += 1
-                else:
-                    # Create new assignment
-                    assignment = Assignment.objects.create(
-                        service_request=assignment_data['service_request'],
-                        technician=assignment_data['technician'],
-                        assigned_date=assigned_date,
-                        sequence_order=assignment_data['sequence_order'],
-                        planned_start=assignment_data['planned_start'],
-                        planned_finish=assignment_data['planned_finish'],
-                        travel_time_minutes=assignment_data.get('travel_time', 0.0),
-                        status='assigned'
-                    )
-                    saved_count += 1
-                
-                # Update service request status
-                assignment_data['service_request'].status = 'assigned'
-                assignment_data['service_request'].save()
-            
-            if saved_count > 0 and updated_count > 0:
-                messages.success(
-                    request, 
-                    f'Successfully created {saved_count} new assignments and updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
-                )
-            elif saved_count > 0:
-                messages.success(
-                    request, 
-                    f'Successfully assigned {saved_count} jobs. Total travel time: {total_travel:.1f} minutes.'
-                )
-            elif updated_count > 0:
-                messages.success(
-                    request, 
-                    f'Updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
-                )
-            else:
-                messages.info(request, 'No assignments created or updated.')
-            
-            # Handle unserved requests with reasons
-            if unserved:
-                unserved_count = len(unserved)
-                reasons_summary = {}
-                for item in unserved:
-                    reason = item.get('reason_short', 'Unknown reason')
-                    if reason not in reasons_summary:
-                        reasons_summary[reason] = []
-                    reasons_summary[reason].append(item['request'].name)
-                
-                # Create detailed message
-                reasons_text = []
-                for reason, requests in reasons_summary.items():
-                    if len(requests) == 1:
-                        reasons_text.append(f"{reason}: {requests[0]}")
-                    else:
-                        reasons_text.append(f"{reason}: {len(requests)} requests ({', '.join(requests[:2])}{'...' if len(requests) > 2 else ''})")
-                
-                detailed_message = f'{unserved_count} request(s) could not be assigned:\n' + '\n'.join(reasons_text)
-                
-                messages.warning(request, f'{unserved_count} request(s) could not be assigned.')
-                
-                # Store detailed reasons in session for display on assignment page
-                # Filter unserved reasons by assigned_date
-                unserved_for_date = [
-                    item for item in unserved 
-                    if item['request'].window_start and item['request'].window_start.date() == assigned_date
-                ]
-                
-                request.session['unserved_reasons'] = [
-                    {
-                        'request_name': item['request'].name,
-                        'customer': item['request'].customer.username,
-                        'reason_short': item.get('reason_short', 'Unknown'),
-                        'reason_detail': item.get('reason_detail', 'Unknown reason'),
-                        'required_skill': item.get('required_skill', 'None'),
-                        'window_start': item['request'].window_start.strftime('%Y-%m-%d %H:%M') if item['request'].window_start else 'N/A',
-                        'window_end': item['request'].window_end.strftime('%Y-%m-%d %H:%M') if item['request'].window_end else 'N/A',
-                        'window_date': item['request'].window_start.strftime('%Y-%m-%d') if item['request'].window_start else None,
-                    }
-                    for item in unserved_for_date
-                ]
-                request.session['unserved_date'] = assigned_date.strftime('%Y-%m-%d')
-            
-            # Redirect back to assignment page to show results
-            filter_date_param = request.GET.get('filter_date', assigned_date.strftime('%Y-%m-%d'))
-            return redirect(f'{reverse("core:admin_assign")}?filter_date={filter_date_param}')
-            
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"\n{'='*80}")
-            print(f"ASSIGNMENT ERROR")
-            print(f"{'='*80}")
-            print(f"Error: {str(e)}")
-            print(f"Traceback:")
-            print(error_details)
-            print(f"{'='*80}\n")
-            messages.error(request, f'Assignment failed: {str(e)}')
-            filter_date_param = request.GET.get('filter_date', '')
-            if filter_date_param:
-                return redirect(f'{reverse("core:admin_assign")}?filter_date={filter_date_param}')
-            return redirect('core:admin_assign')
+            submit_solve_job(job)
+        
+        filter_date_param = request.GET.get('filter_date', assigned_date.strftime('%Y-%m-%d'))
+        return redirect(f'{reverse("core:admin_assign")}?filter_date={filter_date_param}&job={job.pk}')
     
     # GET request - show assignment form
     from datetime import datetime, date, timedelta
@@ -201,20 +92,13 @@ def admin_assign_view(request):
     # Show requests where the filter_date falls within the time window OR has assignments on that date
     from django.db.models import Q
     
-    # Convert filter_date to datetime for comparison
-    filter_datetime_start = timezone.make_aware(datetime.combine(filter_date, datetime.min.time()))
-    filter_datetime_end = timezone.make_aware(datetime.combine(filter_date, datetime.max.time()))
-    
-    # Get pending requests where the filter date falls within the window
-    # Logic: filter_date is within [window_start, window_end] OR window_start/end date matches filter_date
+    # Get pending requests whose [window_start, window_end] overlaps the filter date
+    filter_datetime_start, filter_datetime_end = day_bounds(filter_date)
     pending_requests_query = ServiceRequest.objects.filter(
-        status='pending'
-    ).filter(
-        Q(window_start__lte=filter_datetime_end, window_end__gte=filter_datetime_start) |
-        Q(window_start__date=filter_date) |
-        Q(window_end__date=filter_date) |
-        Q(window_start__isnull=True)  # Include requests without date windows
-    ).distinct()
+        status='pending',
+        window_start__lt=filter_datetime_end,
+        window_end__gt=filter_datetime_start,
+    )
     
     pending_requests = pending_requests_query.select_related(
         'required_skill', 'customer'
@@ -262,6 +146,9 @@ def admin_assign_view(request):
             assignments_by_tech[tech_id] = []
         assignments_by_tech[tech_id].append(assign)
     
+    # Busy intervals per technician, spanning the time the solver blocks for them
+    busy_index = IntervalIndex.from_assignments(filter_date_assignments)
+    
     # Also get previous day assignments to show context
     prev_day_assignments = Assignment.objects.filter(
         assigned_date=filter_date_prev,
@@ -294,6 +181,11 @@ def admin_assign_view(request):
         used_minutes = sum(a.service_request.service_minutes for a in tech_filter_date_assignments if a.service_request)
         available_minutes = max(0, tech.capacity_minutes - used_minutes)
         
+        # Free time slots within the shift, between committed jobs
+        shift_start_dt = timezone.make_aware(datetime.combine(filter_date, tech.shift_start))
+        shift_end_dt = timezone.make_aware(datetime.combine(filter_date, tech.shift_end))
+        free_slots = busy_index.free_slots(tech.id, shift_start_dt, shift_end_dt)
+        
         technicians_data.append({
             'technician': tech,
             'username': tech.user.username,
@@ -307,6 +199,10 @@ def admin_assign_view(request):
             'available_capacity_minutes': available_minutes,
             'available_capacity': f"{available_minutes // 60}h {available_minutes % 60}m",
             'used_capacity': f"{used_minutes // 60}h {used_minutes % 60}m",
+            'free_slots': [
+                f"{timezone.localtime(start).strftime('%H:%M')}-{timezone.localtime(end).strftime('%H:%M')}"
+                for start, end in free_slots
+            ],
         })
     
     # Get all requests for the date (pending + assigned)
@@ -440,20 +336,25 @@ def admin_assign_view(request):
             'sequence_order': assign.sequence_order,
         })
     
-    # Get unserved reasons from session (if any) and filter by current filter_date
-    unserved_reasons_raw = request.session.get('unserved_reasons', None)
-    unserved_date_str = request.session.get('unserved_date', None)
+    # Background solve job started from this page (if any)
+    solve_job = None
+    job_param = request.GET.get('job', '')
+    if job_param.isdigit():
+        solve_job = SolveJob.objects.filter(pk=int(job_param)).first()
+        if solve_job and solve_job.is_finished and not solve_job.result_reported:
+            _report_solve_job(request, solve_job)
     
+    # Unserved reasons of the last run shown in this session, if it was for the current filter_date
     unserved_reasons = None
-    if unserved_reasons_raw and unserved_date_str:
-        # Only show unserved reasons if they match the current filter date
-        if unserved_date_str == filter_date_str:
-            unserved_reasons = unserved_reasons_raw
+    run_id = request.session.get('solve_run_id')
+    if run_id:
+        run = SolveRun.objects.filter(pk=run_id).values('assigned_date', 'unserved').first()
+        if run and run['assigned_date'] == filter_date:
+            unserved_reasons = run['unserved']
             # Don't pop - keep it until user changes date or new assignment runs
         else:
             # Clear old unserved reasons if date doesn't match
-            request.session.pop('unserved_reasons', None)
-            request.session.pop('unserved_date', None)
+            request.session.pop('solve_run_id', None)
     
     context = {
         'pending_count': pending_count,
@@ -472,11 +373,134 @@ def admin_assign_view(request):
         'existing_assignments': existing_assignments_data,
         'existing_assignments_count': len(existing_assignments_data),
         'unserved_reasons': unserved_reasons,
+        'solve_job': solve_job,
     }
     
     return render(request, 'core/admin_assign.html', context)
 
 
+def _report_solve_job(request, job):
+    """Show a finished solve job's outcome as messages (once) and keep its run id in the session"""
+    SolveJob.objects.filter(pk=job.pk).update(result_reported=True)
+    
+    if job.status == 'cancelled':
+        messages.warning(request, 'Assignment run was cancelled. No assignments were saved.')
+        return
+    if job.status == 'failed':
+        messages.error(request, f'Assignment failed: {job.progress}')
+        return
+    
+    result = job.result or {}
+    saved_count = result.get('saved_count', 0)
+    updated_count = result.get('updated_count', 0)
+    total_travel = result.get('total_travel', 0.0)
+    
+    if saved_count > 0 and updated_count > 0:
+        messages.success(
+            request, 
+            f'Successfully created {saved_count} new assignments and updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
+        )
+    elif saved_count > 0:
+        messages.success(
+            request, 
+            f'Successfully assigned {saved_count} jobs. Total travel time: {total_travel:.1f} minutes.'
+        )
+    elif updated_count > 0:
+        messages.success(
+            request, 
+            f'Updated {updated_count} existing assignments. Total travel time: {total_travel:.1f} minutes.'
+        )
+    else:
+        messages.info(request, 'No assignments created or updated.')
+    
+    unchanged_count = result.get('unchanged_count', 0)
+    if unchanged_count:
+        messages.info(request, f'{unchanged_count} assignment(s) were already up to date and left unchanged.')
+    
+    model_size = result.get('model_size')
+    if model_size:
+        replanned = model_size.get('replanned_requests', 0)
+        replanned_note = f", plus {replanned} re-planned" if replanned else ""
+        messages.info(
+            request,
+            f"Model size: {model_size['candidate_requests'] - replanned} of {model_size['pending_requests']} pending "
+            f"requests were candidates for this date{replanned_note} "
+            f"({model_size['nodes']} routing nodes instead of {model_size['unscoped_nodes']})."
+        )
+    
+    run = SolveRun.objects.filter(job=job).only('report').first()
+    if run:
+        messages.info(
+            request,
+            f"Solver time: {run.report['wall_seconds']:.1f}s wall, {run.report['cpu_seconds']:.1f}s CPU "
+            f"({run.report['nodes']} nodes, {run.report['vehicles']} vehicles)."
+        )
+    
+    released_count = result.get('released_count', 0)
+    if result.get('accepted_early'):
+        messages.info(request, 'The search was ended early: the plan shown is the best one found when it was accepted.')
+    
+    if released_count:
+        messages.warning(
+            request,
+            f'{released_count} previously planned request(s) no longer fit the re-optimised plan and are pending again.'
+        )
+    
+    # Handle unserved requests with reasons
+    unserved_count = result.get('unserved_count', 0)
+    if unserved_count:
+        messages.warning(request, f'{unserved_count} request(s) could not be assigned.')
+        
+        # Detailed reasons (already filtered by assigned_date) stay on the run; the page looks them up
+        request.session['solve_run_id'] = result.get('run_id')
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def admin_solve_job_status(request, job_id):
+    """JSON status of a background solve job, polled by the assign page"""
+    job = get_object_or_404(SolveJob, pk=job_id)
+    if not job.is_finished and recover_stale_jobs():
+        job.refresh_from_db()
+    elapsed = None
+    if job.started_at:
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+    
+    return JsonResponse({
+        'id': job.pk,
+        'assigned_date': job.assigned_date.strftime('%Y-%m-%d'),
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'is_finished': job.is_finished,
+        'cancel_requested': job.cancel_requested,
+        'accept_requested': job.accept_requested,
+        'convergence': convergence(job.pk),
+        'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+        'result': job.result if job.status == 'succeeded' else None,
+        'error': job.progress if job.status == 'failed' else None,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@require_POST
+def admin_solve_job_cancel(request, job_id):
+    """Cancel a queued or running background solve job"""
+    job = get_object_or_404(SolveJob, pk=job_id)
+    cancel_solve_job(job)
+    return JsonResponse({'id': job.pk, 'cancel_requested': True})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@require_POST
+def admin_solve_job_accept(request, job_id):
+    """End a running solve job's search early, saving the best plan found so far"""
+    job = get_object_or_404(SolveJob, pk=job_id)
+    return JsonResponse({'id': job.pk, 'accept_requested': accept_solve_job(job)})
+
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def admin_technician_view(request, technician_id=None):
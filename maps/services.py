@@ -1,6 +1,7 @@
 import re
 from typing import Optional, Tuple
 import googlemaps
+import numpy as np
 from core.models import GoogleMapsConfig
 
 
@@ -144,6 +145,9 @@ class DirectionsService:
 class DistanceService:
     """Service for calculating distances and travel times"""
     
+    # Penalty used in place of NaN/negative travel times so the arc is never chosen
+    INVALID_TRAVEL_MINUTES = 999999
+    
     @staticmethod
     def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance in km using Haversine formula"""
@@ -163,6 +167,52 @@ class DistanceService:
         dist = DistanceService.haversine_km(lat1, lon1, lat2, lon2)
         hrs = dist / max(kph, 1e-6)
         return 60.0 * hrs
+    
+    @staticmethod
+    def haversine_km_matrix(lats_from, lons_from, lats_to, lons_to) -> np.ndarray:
+        """Calculate pairwise distances in km between two sets of points (broadcasted Haversine)"""
+        R = 6371.0088  # Earth radius in km
+        p = np.pi / 180
+        
+        lat1 = np.asarray(lats_from, dtype=np.float64)[:, None] * p
+        lon1 = np.asarray(lons_from, dtype=np.float64)[:, None] * p
+        lat2 = np.asarray(lats_to, dtype=np.float64)[None, :] * p
+        lon2 = np.asarray(lons_to, dtype=np.float64)[None, :] * p
+        
+        a = 0.5 - np.cos(lat2 - lat1) / 2 + np.cos(lat1) * np.cos(lat2) * (1 - np.cos(lon2 - lon1)) / 2
+        return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    
+    @staticmethod
+    def travel_minutes_matrix(depot_coords, job_coords, kph: float = 40.0,
+                              dtype=np.float32, block_rows: int = 1024) -> np.ndarray:
+        """
+        Build the (K+I) x (K+I) travel time matrix in minutes for the routing model.
+        
+        Nodes 0..K-1 are technician depots and nodes K..K+I-1 are jobs, matching the
+        node layout used by RoutingService. Depot-to-depot arcs are 0 (an unused
+        vehicle's empty route). NaN, infinite or negative values are replaced by
+        INVALID_TRAVEL_MINUTES. Rows are computed in blocks to bound peak memory.
+        """
+        depots = np.asarray(depot_coords, dtype=np.float64).reshape(-1, 2)
+        jobs = np.asarray(job_coords, dtype=np.float64).reshape(-1, 2)
+        K = len(depots)
+        coords = np.concatenate([depots, jobs])
+        n = len(coords)
+        minutes_per_km = 60.0 / max(kph, 1e-6)
+        is_int = np.issubdtype(np.dtype(dtype), np.integer)
+        
+        matrix = np.empty((n, n), dtype=dtype)
+        for lo in range(0, n, block_rows):
+            hi = min(lo + block_rows, n)
+            block = DistanceService.haversine_km_matrix(
+                coords[lo:hi, 0], coords[lo:hi, 1], coords[:, 0], coords[:, 1]
+            ) * minutes_per_km
+            block[~np.isfinite(block) | (block < 0)] = DistanceService.INVALID_TRAVEL_MINUTES
+            matrix[lo:hi] = np.rint(block) if is_int else block
+        
+        matrix[:K, :K] = 0
+        np.fill_diagonal(matrix, 0)
+        return matrix
 
 
 # Alias for backward compatibility
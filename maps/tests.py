@@ -1,3 +1,49 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from maps.services import DistanceService
+
+
+class TravelMinutesMatrixTests(SimpleTestCase):
+    """Node layout and values of the routing model's travel matrix"""
+    depots = [(-37.8136, 144.9631), (-37.9870, 145.2140)]
+    jobs = [(-37.8230, 144.9980), (-37.8676, 144.9809), (-37.8000, 144.9000)]
+
+    def test_matches_pairwise_travel_minutes(self):
+        matrix = DistanceService.travel_minutes_matrix(self.depots, self.jobs, kph=30.0)
+        coords = self.depots + self.jobs
+        self.assertEqual(matrix.shape, (5, 5))
+        for a, (lat1, lon1) in enumerate(coords):
+            for b, (lat2, lon2) in enumerate(coords):
+                if a < 2 and b < 2:
+                    continue
+                expected = DistanceService.travel_minutes(lat1, lon1, lat2, lon2, kph=30.0)
+                self.assertAlmostEqual(float(matrix[a, b]), expected, places=3)
+
+    def test_depot_to_depot_and_diagonal_are_zero(self):
+        matrix = DistanceService.travel_minutes_matrix(self.depots, self.jobs)
+        self.assertEqual(matrix[0, 1], 0)
+        self.assertEqual(matrix[1, 0], 0)
+        self.assertTrue((np.diag(matrix) == 0).all())
+        self.assertTrue((matrix[:2, 2:] > 0).all())
+
+    def test_row_blocks_do_not_change_the_result(self):
+        whole = DistanceService.travel_minutes_matrix(self.depots, self.jobs)
+        blocked = DistanceService.travel_minutes_matrix(self.depots, self.jobs, block_rows=2)
+        np.testing.assert_array_equal(whole, blocked)
+
+    def test_integer_dtype_rounds(self):
+        exact = DistanceService.travel_minutes_matrix(self.depots, self.jobs, dtype=np.float64)
+        rounded = DistanceService.travel_minutes_matrix(self.depots, self.jobs, dtype=np.int32)
+        self.assertEqual(rounded.dtype, np.int32)
+        np.testing.assert_array_equal(rounded, np.rint(exact))
+
+    def test_invalid_coordinates_get_the_penalty(self):
+        matrix = DistanceService.travel_minutes_matrix(self.depots, self.jobs + [(np.nan, np.nan)])
+        self.assertTrue((matrix[5, :5] == DistanceService.INVALID_TRAVEL_MINUTES).all())
+        self.assertTrue((matrix[:5, 5] == DistanceService.INVALID_TRAVEL_MINUTES).all())
+        self.assertEqual(matrix[5, 5], 0)
+
+    def test_no_jobs(self):
+        matrix = DistanceService.travel_minutes_matrix(self.depots, np.empty((0, 2)))
+        np.testing.assert_array_equal(matrix, np.zeros((2, 2)))
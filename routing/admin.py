@@ -1,3 +1,29 @@
 from django.contrib import admin
+from django.db.models.functions import Length
+from routing.models import SolveJob, SolveRun
 
-# Register your models here.
+
+@admin.register(SolveJob)
+class SolveJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'assigned_date', 'status', 'progress', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'assigned_date']
+    readonly_fields = ['created_at', 'started_at', 'heartbeat_at', 'finished_at']
+
+
+@admin.register(SolveRun)
+class SolveRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'assigned_date', 'request_count', 'assigned_count', 'unserved_count',
+                    'objective', 'wall_seconds', 'cpu_seconds', 'snapshot_kb', 'created_at']
+    list_filter = ['assigned_date']
+    readonly_fields = ['job', 'assigned_date', 'parameters', 'report', 'wall_seconds', 'cpu_seconds', 'objective',
+                       'request_count', 'assigned_count', 'unserved_count', 'total_travel', 'unserved',
+                       'snapshot_kb', 'created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('snapshot').annotate(
+            snapshot_bytes=Length('snapshot')
+        )
+    
+    @admin.display(description='Snapshot (KiB)', ordering='snapshot_bytes')
+    def snapshot_kb(self, obj):
+        return round((obj.snapshot_bytes or 0) / 1024, 1)
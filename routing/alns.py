@@ -0,0 +1,214 @@
+"""
+Adaptive large neighbourhood search over route arrays, in NumPy
+"""
+import math
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from routing.model import RoutingData
+from routing.routes import Plan, insertion_costs, plan_from_routes, route_nodes
+
+# Operator scores for a new best plan, an improvement on the current one, and an
+# accepted worse plan (Ropke & Pisinger); weights move towards the scores at this rate
+SCORE_BEST, SCORE_BETTER, SCORE_ACCEPTED = 33.0, 9.0, 13.0
+REACTION = 0.1
+SEGMENT_ITERATIONS = 50
+# Requests removed per iteration: between these bounds, at most this share of the served ones
+REMOVE_MIN, REMOVE_MAX, REMOVE_SHARE = 2, 30, 0.15
+# Simulated annealing acceptance: a plan this much worse in travel is first accepted
+# half the time; the temperature falls geometrically to FINAL_TEMPERATURE of that
+START_WORSENING = 0.02
+FINAL_TEMPERATURE = 0.001
+
+
+class ALNS:
+    """
+    Search state and operators. Destroy operators remove requests from the current
+    routes (random, worst saving, related to a random request, or a whole route);
+    repair operators insert the removed and previously unserved requests again
+    (greedy cheapest insertion or regret-2), pricing every route and position at
+    once with insertion_costs. Worse plans are accepted by simulated annealing and
+    operator weights adapt to how often each produces good plans.
+    """
+
+    def __init__(self, data: RoutingData, seed: int = 0):
+        self.data = data
+        self.rng = np.random.default_rng(seed)
+        self.destroy_operators = [self.random_removal, self.worst_removal, self.related_removal, self.route_removal]
+        self.repair_operators = [self.greedy_insertion, self.regret_insertion]
+
+    # Destroy operators: remove requests from `routes` in place, returning them
+
+    def random_removal(self, routes: List[List[int]], starts: np.ndarray, count: int) -> List[int]:
+        served = [i for route in routes for i in route]
+        removed = self.rng.choice(served, size=min(count, len(served)), replace=False).tolist()
+        return self._remove(routes, removed)
+
+    def worst_removal(self, routes: List[List[int]], starts: np.ndarray, count: int) -> List[int]:
+        """Requests whose removal saves the most travel, with some noise"""
+        T, K = self.data.transit, self.data.K
+        jobs, savings = [], []
+        for k, route in enumerate(routes):
+            if not route:
+                continue
+            nodes = np.concatenate([[k], K + np.asarray(route), [k]])
+            jobs.extend(route)
+            savings.append(T[nodes[:-2], nodes[1:-1]] + T[nodes[1:-1], nodes[2:]] - T[nodes[:-2], nodes[2:]])
+        noisy = np.concatenate(savings) * self.rng.uniform(0.8, 1.2, len(jobs))
+        removed = np.asarray(jobs)[np.argsort(-noisy)[:count]].tolist()
+        return self._remove(routes, removed)
+
+    def related_removal(self, routes: List[List[int]], starts: np.ndarray, count: int) -> List[int]:
+        """A random served request and those closest to it in travel and start time"""
+        K = self.data.K
+        served = np.asarray([i for route in routes for i in route])
+        anchor = served[self.rng.integers(len(served))]
+        relatedness = (self.data.transit[K + anchor, K + served] + self.data.transit[K + served, K + anchor]
+                       + np.abs(starts[served] - starts[anchor]))
+        removed = served[np.argsort(relatedness)[:count]].tolist()
+        return self._remove(routes, removed)
+
+    def route_removal(self, routes: List[List[int]], starts: np.ndarray, count: int) -> List[int]:
+        """Every request of a random non-empty route"""
+        used = [k for k, route in enumerate(routes) if route]
+        k = used[self.rng.integers(len(used))]
+        removed, routes[k] = routes[k], []
+        return removed
+
+    @staticmethod
+    def _remove(routes: List[List[int]], removed: List[int]) -> List[int]:
+        drop = set(removed)
+        for k, route in enumerate(routes):
+            if drop.intersection(route):
+                routes[k] = [i for i in route if i not in drop]
+        return removed
+
+    # Repair operators: insert what they can of `pending` into `routes` in place
+
+    def greedy_insertion(self, routes: List[List[int]], pending: List[int]) -> None:
+        self._insert(routes, pending, regret=False)
+
+    def regret_insertion(self, routes: List[List[int]], pending: List[int]) -> None:
+        self._insert(routes, pending, regret=True)
+
+    def _insert(self, routes: List[List[int]], pending: List[int], regret: bool) -> None:
+        """
+        Insert requests one at a time: the cheapest insertion overall or, with
+        `regret`, the request that loses most if it does not get its best route.
+        Only the changed route is re-priced after each insertion.
+        """
+        data = self.data
+        if not pending:
+            return
+        jobs = np.asarray(pending)
+        vehicles = np.flatnonzero(data.allowed[jobs].any(axis=0))
+        if not len(vehicles):
+            return
+        lengths = np.array([len(routes[k]) for k in vehicles])
+        loads = np.array([data.demands[data.K + np.asarray(routes[k], dtype=np.int64)].sum() for k in vehicles])
+        cost, position = insertion_costs(data, vehicles, route_nodes(data, routes, vehicles), lengths, loads, jobs)
+        waiting = np.ones(len(jobs), dtype=bool)
+        while waiting.any():
+            best = cost.min(axis=1)
+            if regret:
+                second = np.partition(cost, 1, axis=1)[:, 1] if cost.shape[1] > 1 else np.full(len(jobs), np.inf)
+                # Requests with a single option left go first; ties broken by cheapness
+                regret_of = np.minimum(second, 1e12) - np.where(np.isfinite(best), best, 0)
+                priority = np.where(np.isfinite(best), regret_of - best * 1e-6, -np.inf)
+            else:
+                priority = -best
+            priority[~waiting] = -np.inf
+            j = int(priority.argmax())
+            if not np.isfinite(best[j]):
+                break
+            column = int(cost[j].argmin())
+            k = int(vehicles[column])
+            routes[k].insert(int(position[j, column]), int(jobs[j]))
+            lengths[column] += 1
+            loads[column] += data.demands[data.K + jobs[j]]
+            waiting[j] = False
+            cost[j] = np.inf
+            remaining = np.flatnonzero(waiting)
+            if len(remaining):
+                vehicle = vehicles[column:column + 1]
+                added, at = insertion_costs(data, vehicle, route_nodes(data, routes, vehicle), lengths[column:column + 1],
+                                            loads[column:column + 1], jobs[remaining])
+                cost[remaining, column] = added[:, 0]
+                position[remaining, column] = at[:, 0]
+
+    def search(self, initial: Plan, time_limit: float, plateau: Optional[float] = None,
+               should_stop: Optional[Callable[[], bool]] = None,
+               on_best: Optional[Callable[[Plan], None]] = None,
+               should_finish: Optional[Callable[[], bool]] = None) -> Plan:
+        """
+        Improve `initial` (a feasible plan) for up to `time_limit` seconds, or until
+        `plateau` seconds pass without a new best plan, `should_stop` or
+        `should_finish` returns True. `on_best(plan)` is called at each new best plan.
+        Returns: the best plan found
+        """
+        data = self.data
+        started = time.monotonic()
+        current = best = initial
+        improved_at = started
+        travel = max(1.0, float(initial.objective - (data.I - initial.served) * data.drop_penalty))
+        start_temperature = START_WORSENING * travel / math.log(2)
+
+        weights = {'destroy': np.ones(len(self.destroy_operators)), 'repair': np.ones(len(self.repair_operators))}
+        scores = {name: np.zeros(len(w)) for name, w in weights.items()}
+        uses = {name: np.zeros(len(w)) for name, w in weights.items()}
+        iteration = 0
+        while True:
+            now = time.monotonic()
+            elapsed = now - started
+            if elapsed >= time_limit or (plateau and now - improved_at >= plateau):
+                break
+            if (should_stop is not None and should_stop()) or (should_finish is not None and should_finish()):
+                break
+            if current.served == 0:
+                break  # Nothing to destroy: no request fits any route
+            iteration += 1
+
+            d = int(self.rng.choice(len(self.destroy_operators), p=weights['destroy'] / weights['destroy'].sum()))
+            r = int(self.rng.choice(len(self.repair_operators), p=weights['repair'] / weights['repair'].sum()))
+            routes = [route[:] for route in current.routes]
+            count = int(self.rng.integers(REMOVE_MIN, max(REMOVE_MIN, min(REMOVE_MAX, REMOVE_SHARE * current.served)) + 1))
+            removed = self.destroy_operators[d](routes, current.starts, count)
+            # Also give a few of the currently unserved requests a chance
+            unserved = np.flatnonzero(current.starts < 0)
+            if len(unserved):
+                retry = self.rng.choice(unserved, size=min(len(unserved), count), replace=False).tolist()
+            else:
+                retry = []
+            self.repair_operators[r](routes, removed + retry)
+            candidate = plan_from_routes(data, routes)
+            if candidate is None:
+                continue  # Defensive: the operators only make feasible insertions
+
+            score = 0.0
+            temperature = start_temperature * FINAL_TEMPERATURE ** min(1.0, elapsed / time_limit)
+            if candidate.objective < best.objective:
+                best = current = candidate
+                improved_at = time.monotonic()
+                score = SCORE_BEST
+                if on_best is not None:
+                    on_best(best)
+            elif candidate.objective < current.objective:
+                current = candidate
+                score = SCORE_BETTER
+            elif self.rng.random() < math.exp(-(candidate.objective - current.objective) / temperature):
+                current = candidate
+                score = SCORE_ACCEPTED
+            for name, op in (('destroy', d), ('repair', r)):
+                scores[name][op] += score
+                uses[name][op] += 1
+            if iteration % SEGMENT_ITERATIONS == 0:
+                for name in weights:
+                    used = uses[name] > 0
+                    weights[name][used] = ((1 - REACTION) * weights[name][used]
+                                           + REACTION * scores[name][used] / uses[name][used])
+                    weights[name] = np.maximum(weights[name], 0.05)
+                    scores[name][:] = 0
+                    uses[name][:] = 0
+        return best
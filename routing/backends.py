@@ -0,0 +1,292 @@
+"""
+Search backends: engines that take the model arrays and return a plan
+"""
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from ortools.constraint_solver import routing_enums_pb2
+
+from routing.alns import ALNS
+from routing.model import PlateauStop, ProgressMonitor, RoutingData, build_model, read_routes, search_parameters, strategy_name
+from routing.portfolio import PORTFOLIO, solve_portfolio
+from routing.report import SolveReport
+from routing.routes import Plan, plan_from_routes
+
+logger = logging.getLogger(__name__)
+
+
+class SolveCancelled(Exception):
+    """Raised when a solve is stopped through its should_stop hook"""
+
+
+def portfolio_workers() -> int:
+    """Number of processes (portfolio members) used by a portfolio search"""
+    return getattr(settings, 'ROUTING_PORTFOLIO_WORKERS', None) or os.cpu_count() or 1
+
+
+class SolverBackend:
+    """
+    Common contract of the search engines. `search` receives the model arrays
+    (RoutingData, built from a snapshot by RoutingService), the persisted plan's
+    routes when warm starting, and the greedy plan; it returns the best Plan it found
+    (routes, start minutes and objective), or None when it found nothing.
+
+    Backends end their search after `time_limit` seconds or `plateau` seconds
+    without improvement. They poll `should_stop` (raising SolveCancelled) and follow
+    `progress` like RoutingService.solve_snapshot describes, and record their search
+    phases and strategy on `report`.
+    """
+    name = None
+
+    def search(self, data: RoutingData, time_limit: float, plateau: Optional[float] = None,
+               warm_routes: Optional[List[List[int]]] = None, seed: Optional[Plan] = None,
+               should_stop: Optional[Callable[[], bool]] = None, progress=None,
+               report: Optional[SolveReport] = None) -> Optional[Plan]:
+        raise NotImplementedError
+
+
+class ORToolsBackend(SolverBackend):
+    """OR-Tools routing search in this process"""
+    name = 'ortools'
+    # Use faster local search for nearby locations (TABU_SEARCH is faster than GUIDED_LOCAL_SEARCH)
+    metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH
+
+    def search(self, data, time_limit, plateau=None, warm_routes=None, seed=None, should_stop=None, progress=None,
+               report=None):
+        """
+        Improve the persisted plan when warm starting, otherwise (or when the model
+        rejects it) the greedy `seed` plan; without either, try the first-solution
+        strategies in turn until one finds a solution.
+        """
+        report = report or SolveReport()
+
+        def check_stop():
+            if should_stop is not None and should_stop():
+                raise SolveCancelled()
+
+        manager, routing, time_dim = build_model(data)
+
+        # Cancellation: finish the current search at the next improving solution (the
+        # callback holds the solver, not the model, which would then never be freed)
+        if should_stop is not None:
+            solver = routing.solver()
+
+            def stop_if_requested():
+                if should_stop():
+                    solver.FinishCurrentSearch()
+            routing.AddAtSolutionCallback(stop_if_requested)
+        plateau_stop = PlateauStop(routing, plateau) if plateau else None
+        monitor = None
+        if progress is not None:
+            monitor = ProgressMonitor(routing, manager, data, on_solution=progress.publish,
+                                      should_finish=progress.accept_requested)
+        check_stop()
+
+        search_params = search_parameters(
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC, self.metaheuristic, time_limit,
+        )
+        report.lap('model_build')
+
+        # Warm start: spend the time limit improving the persisted plan
+        solution = None
+        if warm_routes:
+            check_stop()
+            routes = [[data.K + i for i in route] for route in warm_routes]
+            with report.phase('search:warm_start'):
+                routing.CloseModelWithParameters(search_params)
+                initial_assignment = routing.ReadAssignmentFromRoutes(routes, True)
+                if initial_assignment is None:
+                    logger.info("Warm start: persisted plan is infeasible under the current model, solving from scratch")
+                else:
+                    logger.debug("Warm start: improving persisted plan (%d jobs, max %ss)",
+                                 sum(len(route) for route in routes), time_limit)
+                    solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_params)
+                    if solution:
+                        report.strategy = 'warm_start'
+            logger.debug("Warm start took %.2fs", report.phases['search:warm_start']['wall'])
+
+        # Otherwise start from the greedy plan
+        if solution is None and seed is not None and seed.served:
+            check_stop()
+            with report.phase('search:greedy_seed'):
+                routing.CloseModelWithParameters(search_params)
+                initial_assignment = routing.ReadAssignmentFromRoutes(
+                    [[data.K + i for i in route] for route in seed.routes], True
+                )
+                if initial_assignment is None:
+                    logger.warning("Greedy plan is infeasible under the routing model, solving from scratch")
+                else:
+                    solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_params)
+                    if solution:
+                        report.strategy = 'greedy_seed'
+            logger.debug("Search from the greedy plan took %.2fs", report.phases['search:greedy_seed']['wall'])
+
+        # For nearby locations, try fastest strategy first
+        strategies = [
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,  # Fastest
+            routing_enums_pb2.FirstSolutionStrategy.PATH_MOST_CONSTRAINED_ARC,  # Second fastest
+        ]
+        if solution is not None:
+            strategies = []
+
+        for strategy in strategies:
+            check_stop()
+            name = strategy_name(strategy)
+            phase = f'search:{name}'
+            try:
+                search_params.first_solution_strategy = strategy
+                with report.phase(phase):
+                    solution = routing.SolveWithParameters(search_params)
+                strategy_time = report.phases[phase]['wall']
+
+                if solution:
+                    report.strategy = name
+                    logger.debug("Solution found with strategy %s in %.2fs", name, strategy_time)
+                    break
+                else:
+                    logger.debug("Strategy %s returned no solution in %.2fs", name, strategy_time)
+            except Exception:
+                logger.exception("Strategy %s failed after %.2fs", name, report.phases[phase]['wall'])
+                continue
+
+        if not solution:
+            return None
+        if plateau_stop is not None and plateau_stop.stopped:
+            logger.debug("Search ended after %.2fs without improvement", plateau)
+        if monitor is not None and monitor.finished:
+            logger.info("Search ended early: current plan accepted")
+        # A search ended early (accepted, cancelled) can hold a solution found before
+        # the greedy plan was restored; never return worse than the plan it started from
+        if seed is not None and seed.served and solution.ObjectiveValue() > seed.objective:
+            logger.debug("Search ended worse than the greedy plan, keeping the greedy plan")
+            report.strategy = 'greedy'
+            return seed
+        routes, starts = read_routes(data, manager, routing, time_dim, solution)
+        return Plan(routes, starts, solution.ObjectiveValue())
+
+
+class DescentBackend(ORToolsBackend):
+    """
+    OR-Tools local search without a metaheuristic: it ends at the first local optimum,
+    within milliseconds on the single-technician routes of assign-then-sequence solves
+    """
+    name = 'descent'
+    metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GREEDY_DESCENT
+
+
+class PortfolioBackend(SolverBackend):
+    """
+    OR-Tools strategy portfolio: every member builds the model in its own process
+    and searches it for the whole time limit; the best objective wins. Like the
+    OR-Tools backend, members start from a warm start's persisted plan, otherwise
+    from the greedy `seed` plan (see solve_portfolio for which members do).
+    """
+    name = 'portfolio'
+
+    def search(self, data, time_limit, plateau=None, warm_routes=None, seed=None, should_stop=None, progress=None,
+               report=None):
+        report = report or SolveReport()
+        workers = min(portfolio_workers(), len(PORTFOLIO))
+        report.lap('model_build')
+
+        initial_routes = warm_routes or (seed.routes if seed is not None and seed.served else None)
+        with report.phase('search:portfolio'):
+            best, results = solve_portfolio(
+                data, time_limit, workers, plateau=plateau, initial_routes=initial_routes, should_stop=should_stop,
+                on_solution=progress.publish if progress is not None else None,
+                should_finish=progress.accept_requested if progress is not None else None,
+            )
+        # Worker CPU is not seen by this process; add it so the report's CPU total is honest
+        report.add_phase('search:portfolio', 0.0, sum(result['cpu'] for result in results))
+        if best is not None and best.get('stopped'):
+            raise SolveCancelled()
+
+        for result in sorted(results, key=lambda r: r['objective']):
+            logger.debug("Portfolio member %s: objective %d%s", result['label'], result['objective'],
+                         " (plateaued)" if result['plateaued'] else "")
+        if best is None:
+            logger.debug("Portfolio: none of %d members found a solution", workers)
+            return None
+        report.strategy = best['label']
+        if any(result['finished_early'] for result in results):
+            logger.info("Search ended early: current plan accepted")
+        logger.debug("Portfolio: %s won among %d of %d members with a solution",
+                     best['label'], len(results), workers)
+        return Plan(best['routes'], best['starts'], best['objective'])
+
+
+class ALNSBackend(SolverBackend):
+    """
+    Adaptive large neighbourhood search in NumPy (routing.alns), starting from the
+    persisted plan when it is still feasible, otherwise from the greedy plan
+    """
+    name = 'alns'
+
+    def search(self, data, time_limit, plateau=None, warm_routes=None, seed=None, should_stop=None, progress=None,
+               report=None):
+        report = report or SolveReport()
+        initial, label = None, 'alns'
+        if warm_routes:
+            initial = plan_from_routes(data, [list(route) for route in warm_routes])
+            if initial is None:
+                logger.info("Warm start: persisted plan is infeasible under the current model, solving from scratch")
+            else:
+                label = 'alns:warm_start'
+        if initial is None:
+            if seed is None or not seed.served:
+                return None
+            initial = seed
+        report.lap('model_build')
+
+        # Publish the starting plan, then new best plans at most every half second
+        published = [initial, time.monotonic()]
+
+        def on_best(plan):
+            now = time.monotonic()
+            if now - published[1] >= 0.5:
+                published[:] = plan, now
+                progress.publish(plan.objective, plan.served)
+
+        finish = None
+        if progress is not None:
+            progress.publish(initial.objective, initial.served)
+            finish = progress.accept_requested
+        with report.phase(f'search:{label}'):
+            best = ALNS(data).search(initial, time_limit, plateau=plateau, should_stop=should_stop,
+                                     on_best=on_best if progress is not None else None, should_finish=finish)
+        if should_stop is not None and should_stop():
+            raise SolveCancelled()
+        if progress is not None and best is not published[0]:
+            progress.publish(best.objective, best.served)
+        report.strategy = label
+        logger.debug("ALNS: objective %d -> %d in %.2fs", initial.objective, best.objective,
+                     report.phases[f'search:{label}']['wall'])
+        return best
+
+
+class GreedyBackend(SolverBackend):
+    """No search: the greedy plan as it is (the assignment phase of assign-then-sequence solves)"""
+    name = 'greedy'
+
+    def search(self, data, time_limit, plateau=None, warm_routes=None, seed=None, should_stop=None, progress=None,
+               report=None):
+        report = report or SolveReport()
+        report.lap('model_build')
+        if seed is None or not seed.served:
+            return None
+        report.strategy = 'greedy'
+        return seed
+
+
+BACKENDS = {backend.name: backend for backend in (ORToolsBackend, DescentBackend, PortfolioBackend, ALNSBackend, GreedyBackend)}
+
+
+def get_backend(name: str) -> SolverBackend:
+    """Backend instance by name ('ortools', 'descent', 'portfolio', 'alns' or 'greedy')"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown solver backend '{name}'")
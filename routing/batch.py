@@ -0,0 +1,192 @@
+"""
+Batch planning: solve a range of dates in parallel processes and commit them together
+"""
+import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import GoogleMapsConfig, ServiceRequest, Technician
+from routing.jobs import record_run
+from routing.persistence import commit_plan
+from routing.report import SolveReport
+from routing.services import RoutingService, SolveCancelled, start_workers
+from routing.snapshot import SolverSnapshot, day_bounds
+
+logger = logging.getLogger(__name__)
+
+
+def batch_workers() -> int:
+    """Number of processes used to solve the days of a batch in parallel"""
+    return getattr(settings, 'ROUTING_BATCH_WORKERS', None) or os.cpu_count() or 1
+
+
+def requests_by_date(start_date: date, end_date: date) -> Dict[date, List[ServiceRequest]]:
+    """
+    Pending requests with coordinates whose window overlaps [start_date, end_date],
+    each under the (local) date its window starts on. Requests whose window started
+    before the range go to its first day, so every request is planned on one day only.
+    """
+    start, end = day_bounds(start_date, 0, (end_date - start_date).days)
+    by_date = defaultdict(list)
+    for service_request in ServiceRequest.objects.filter(
+        status='pending',
+        lat__isnull=False,
+        lon__isnull=False,
+        window_start__lt=end,
+        window_end__gt=start,
+    ).select_related('customer').order_by('window_start', 'pk'):
+        by_date[max(timezone.localtime(service_request.window_start).date(), start_date)].append(service_request)
+    return by_date
+
+
+def _solve_day(config: GoogleMapsConfig, snapshot: SolverSnapshot, should_stop: Optional[Callable[[], bool]] = None
+               ) -> Tuple[Tuple[List[Dict], List[Dict], float], SolveReport]:
+    """Pool entry point: solve one day's snapshot, returning its result and report"""
+    report = SolveReport()
+    result = RoutingService(config).solve_decomposed(snapshot, should_stop=should_stop,
+                                                     geographic=config.geo_decomposition, report=report)
+    return result, report.finish()
+
+
+def plan_dates(start_date: date, end_date: date, warm_start: bool = False,
+               config: Optional[GoogleMapsConfig] = None,
+               should_stop: Optional[Callable[[], bool]] = None) -> Tuple[List[Dict], SolveReport]:
+    """
+    Plan every date from `start_date` to `end_date` (inclusive).
+
+    Pending requests are split by window date (see requests_by_date) and each day
+    is loaded into its own snapshot; the days are then solved in parallel, one
+    process each, so the batch takes about as long as its slowest day. All days'
+    plans are committed in one transaction, and each day is recorded as a SolveRun.
+    With `warm_start`, each date's persisted plan is re-planned too (see
+    SolverSnapshot.load), also on dates without pending requests.
+    `should_stop` is polled while the days are solved; when it returns True the
+    remaining days are cancelled, nothing is saved and SolveCancelled is raised.
+
+    Returns: one summary dict per planned day, and the combined SolveReport (the
+    days' reports folded in with SolveReport.absorb, so phase times add up)
+    """
+    if end_date < start_date:
+        raise ValueError(f"End date {end_date} is before start date {start_date}")
+    config = config or GoogleMapsConfig.load()
+    routing_service = RoutingService(config)
+    report = SolveReport()
+
+    with report.phase('snapshot_load'):
+        technicians = list(Technician.objects.filter(
+            is_active=True,
+            depot_lat__isnull=False,
+            depot_lon__isnull=False
+        ).select_related('user'))
+        by_date = requests_by_date(start_date, end_date)
+        snapshots = []
+        for offset in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=offset)
+            if not by_date.get(day) and not warm_start:
+                continue
+            snapshot = SolverSnapshot.load(
+                technicians, by_date.get(day, []), timezone.make_aware(datetime.combine(day, datetime.min.time())),
+                warm_start=warm_start,
+            )
+            if snapshot.I:
+                snapshots.append(snapshot)
+    logger.info("Batch %s to %s: %d days to plan, %s requests per day", start_date, end_date, len(snapshots),
+                [snapshot.I for snapshot in snapshots])
+
+    results = _solve_days(config, snapshots, should_stop, report)
+
+    with report.phase('extraction'):
+        tech_by_id = {technician.pk: technician for technician in technicians}
+        req_by_id = ServiceRequest.objects.select_related('customer').in_bulk(
+            {a['service_request_id'] for (assignments, _, _), _ in results for a in assignments}
+            | {u['request_id'] for (_, unserved, _), _ in results for u in unserved}
+        )
+        for (assignments, unserved, _), _ in results:
+            for assignment in assignments:
+                assignment['technician'] = tech_by_id[assignment['technician_id']]
+                assignment['service_request'] = req_by_id[assignment['service_request_id']]
+            for item in unserved:
+                item['request'] = req_by_id[item['request_id']]
+
+    days = []
+    parameters = routing_service.parameters(warm_start=warm_start, batch_workers=batch_workers())
+    with report.phase('commit'), transaction.atomic():
+        for snapshot, ((assignments, unserved, total_travel), day_report) in zip(snapshots, results):
+            # A warm-start re-plan replaces the old plan: requests it dropped go back to pending
+            changeset = commit_plan(
+                assignments,
+                snapshot.assigned_date,
+                released_request_ids=[item['request'].pk for item in unserved] if warm_start else (),
+            )
+            run = record_run(None, snapshot, day_report, parameters, unserved, total_travel)
+            days.append({
+                'date': snapshot.assigned_date,
+                'requests': snapshot.I,
+                'assigned_count': len(assignments),
+                'unserved_count': len(unserved),
+                'total_travel': total_travel,
+                'objective': day_report.objective,
+                'wall_seconds': day_report.wall_seconds,
+                'saved_count': changeset['created_count'],
+                'updated_count': changeset['updated_count'],
+                'released_count': changeset['deleted_count'],
+                'unchanged_count': changeset['unchanged_count'],
+                'run_id': run.pk,
+            })
+
+    for _, day_report in results:
+        report.absorb(day_report)
+    report.parts = len(results)
+    report.requests = sum(day['requests'] for day in days)
+    report.assigned_count = sum(day['assigned_count'] for day in days)
+    report.dropped_count = sum(day['unserved_count'] for day in days)
+    objectives = [day['objective'] for day in days if day['objective'] is not None]
+    report.objective = sum(objectives) if objectives else None
+    report.finish()
+    logger.info("Batch %s to %s: %d assigned, %d unserved over %d days in %.2fs (slowest day %.2fs)",
+                start_date, end_date, report.assigned_count, report.dropped_count, len(days),
+                report.wall_seconds, max((day['wall_seconds'] for day in days), default=0.0))
+    return days, report
+
+
+def _solve_days(config: GoogleMapsConfig, snapshots: List[SolverSnapshot],
+                should_stop: Optional[Callable[[], bool]] = None,
+                report: Optional[SolveReport] = None,
+                ) -> List[Tuple[Tuple[List[Dict], List[Dict], float], SolveReport]]:
+    """
+    Solve the days' snapshots, in a new process pool when there is more than one
+    (not kept between batches, like RoutingService's sub-problem pools). Days that
+    decompose solve their sub-problems in pools of their own. The pool's startup
+    is charged to `report` as phase 'pool_startup'.
+    Returns: one (result, report) pair per snapshot
+    """
+    if len(snapshots) <= 1:
+        return [_solve_day(config, snapshot, should_stop) for snapshot in snapshots]
+
+    n_workers = max(1, min(batch_workers(), len(snapshots)))
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    ) as executor:
+        with report.phase('pool_startup') if report is not None else nullcontext():
+            start_workers(executor, n_workers)
+        futures = [executor.submit(_solve_day, config, snapshot) for snapshot in snapshots]
+        pending = set(futures)
+        while pending:
+            if should_stop is not None and should_stop():
+                for future in futures:
+                    future.cancel()
+                raise SolveCancelled()
+            _, pending = wait(pending, timeout=0.5)
+        return [future.result() for future in futures]
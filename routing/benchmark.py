@@ -0,0 +1,260 @@
+"""
+Reproducible synthetic Melbourne instances and a runner that times the solver on them
+"""
+import multiprocessing
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as time_cls, timedelta
+from typing import Dict, List, Optional
+
+import django
+import numpy as np
+from django.utils import timezone
+
+from ortools.constraint_solver import routing_enums_pb2
+
+from core.models import GoogleMapsConfig
+from maps.services import DistanceService
+from routing.eligibility import EligibilityMatrix
+from routing.model import RoutingData, build_model, search_parameters
+from routing.report import SolveReport
+from routing.services import RoutingService
+from routing.snapshot import RequestRecord, SolverSnapshot, TechnicianRecord
+
+# Suburbs used by create_sample_data.py: (lat, lon) centres that demand clusters around
+SUBURBS = {
+    'CBD': (-37.8136, 144.9631),
+    'Carlton': (-37.8001, 144.9671),
+    'Richmond': (-37.8230, 144.9980),
+    'South Yarra': (-37.8390, 144.9930),
+    'St Kilda': (-37.8676, 144.9809),
+    'Footscray': (-37.8000, 144.9000),
+    'Tarneit': (-37.8320, 144.6670),
+    'Clayton': (-37.9150, 145.1290),
+    'Mulgrave': (-37.9280, 145.1530),
+    'Dandenong': (-37.9870, 145.2140),
+}
+# Bounding box of those suburbs, for background demand and depots: (lat min, lat max), (lon min, lon max)
+BOUNDS = ((-38.00, -37.78), (144.65, 145.23))
+
+# Service types of create_sample_data.py, one skill each
+SKILLS = ['Personal care', 'Domestic Assistance', 'Community Access', 'Transport', 'Behaviour Support',
+          'Support Coordination', 'Therapy Access', 'Assistive Tech', 'Life Skills Training']
+
+TIERS = [50, 500, 2000, 5000]
+
+# Window length range in hours for each tightness
+WINDOW_HOURS = {'tight': (1, 2), 'medium': (3, 4), 'loose': (8, 10)}
+
+# Variants solved at every tier: skill mix, window tightness and technicians per 100 requests
+VARIANTS = {
+    'base': {'skill_mix': 'broad', 'windows': 'tight', 'techs_per_100': 25},
+    'specialist': {'skill_mix': 'specialist', 'windows': 'tight', 'techs_per_100': 25},
+    'loose': {'skill_mix': 'broad', 'windows': 'loose', 'techs_per_100': 25},
+    'short_staffed': {'skill_mix': 'broad', 'windows': 'medium', 'techs_per_100': 12},
+}
+
+BENCHMARK_DATE = date(2026, 11, 1)
+
+
+def synthetic_snapshot(n_requests: int, n_techs: int, skill_mix: str = 'broad', windows: str = 'tight',
+                       seed: int = 0, assigned_date: date = BENCHMARK_DATE) -> SolverSnapshot:
+    """
+    Random but reproducible (per seed) instance in the Melbourne area.
+
+    80% of requests cluster around the sample-data suburbs (about 2 km spread), the
+    rest and all depots are uniform over their bounding box. Shifts are 4-8 hours
+    starting 6:00-14:00 and ending by 18:00; windows start 8:00-16:00 with lengths
+    from WINDOW_HOURS. `skill_mix`: 'broad' (technicians hold 2-4 skills, 10% of
+    requests need none), 'specialist' (one skill each) or 'none' (no skill needs).
+    """
+    rng = np.random.default_rng(seed)
+    day_start = timezone.make_aware(datetime.combine(assigned_date, time_cls.min))
+    (lat_min, lat_max), (lon_min, lon_max) = BOUNDS
+
+    centres = np.array(list(SUBURBS.values()))
+    clustered = rng.random(n_requests) < 0.8
+    job_coords = np.column_stack([rng.uniform(lat_min, lat_max, n_requests), rng.uniform(lon_min, lon_max, n_requests)])
+    picks = centres[rng.integers(0, len(centres), n_requests)] + rng.normal(0, 0.02, (n_requests, 2))
+    job_coords[clustered] = picks[clustered]
+    depot_coords = np.column_stack([rng.uniform(lat_min, lat_max, n_techs), rng.uniform(lon_min, lon_max, n_techs)])
+
+    shift_start = rng.integers(6, 15, n_techs)
+    shift_end = np.minimum(shift_start + rng.integers(4, 9, n_techs), 18)
+    shift_start = np.minimum(shift_start, shift_end - 4)
+
+    low, high = WINDOW_HOURS[windows]
+    window_start = rng.integers(8, 17, n_requests)
+    window_end = np.minimum(window_start + rng.integers(low, high + 1, n_requests), 18)
+    window_start = np.minimum(window_start, window_end - low)
+    service = rng.choice([60, 90, 120, 180], n_requests)
+
+    if skill_mix == 'broad':
+        tech_skills = [frozenset(rng.choice(len(SKILLS), rng.integers(2, 5), replace=False).tolist()) for _ in range(n_techs)]
+        job_skills = np.where(rng.random(n_requests) < 0.1, -1, rng.integers(0, len(SKILLS), n_requests))
+    elif skill_mix == 'specialist':
+        tech_skills = [frozenset([s]) for s in rng.integers(0, len(SKILLS), n_techs).tolist()]
+        job_skills = rng.integers(0, len(SKILLS), n_requests)
+    elif skill_mix == 'none':
+        tech_skills = [frozenset() for _ in range(n_techs)]
+        job_skills = np.full(n_requests, -1)
+    else:
+        raise ValueError(f"Unknown skill mix '{skill_mix}'")
+
+    techs = [
+        TechnicianRecord(
+            id=k + 1,
+            username=f'tech{k + 1}',
+            depot_lat=float(depot_coords[k, 0]),
+            depot_lon=float(depot_coords[k, 1]),
+            capacity_minutes=int(shift_end[k] - shift_start[k]) * 60,
+            shift_start=day_start + timedelta(hours=int(shift_start[k])),
+            shift_end=day_start + timedelta(hours=int(shift_end[k])),
+            skill_ids=tech_skills[k],
+        )
+        for k in range(n_techs)
+    ]
+    reqs = [
+        RequestRecord(
+            id=i + 1,
+            name=f'request{i + 1}',
+            customer_username=f'customer{i + 1}',
+            lat=float(job_coords[i, 0]),
+            lon=float(job_coords[i, 1]),
+            service_minutes=int(service[i]),
+            window_start=day_start + timedelta(hours=int(window_start[i])),
+            window_end=day_start + timedelta(hours=int(window_end[i])),
+            required_skill_id=int(job_skills[i]) if job_skills[i] >= 0 else None,
+            required_skill_name=SKILLS[job_skills[i]] if job_skills[i] >= 0 else None,
+        )
+        for i in range(n_requests)
+    ]
+    return SolverSnapshot(assigned_date, techs, reqs)
+
+
+def scenarios(tiers: List[int] = TIERS, variants: Optional[List[str]] = None, seed: int = 0) -> List[Dict]:
+    """The suite: every variant at every tier"""
+    return [
+        {
+            'name': f'{variant}-{n_requests}',
+            'n_requests': n_requests,
+            'n_techs': max(1, n_requests * VARIANTS[variant]['techs_per_100'] // 100),
+            'skill_mix': VARIANTS[variant]['skill_mix'],
+            'windows': VARIANTS[variant]['windows'],
+            'seed': seed + n_requests,
+        }
+        for n_requests in tiers
+        for variant in (variants or VARIANTS)
+    ]
+
+
+def run_scenario(scenario: Dict, parameters: Dict) -> Dict:
+    """
+    Generate and solve one scenario (no database access). Generation counts as the
+    snapshot_load phase. `parameters` are GoogleMapsConfig field values.
+    'wall_seconds' is the elapsed time of the solve itself, timed here, whatever
+    processes it used.
+    """
+    report = SolveReport()
+    with report.phase('snapshot_load'):
+        snapshot = synthetic_snapshot(
+            scenario['n_requests'], scenario['n_techs'], scenario['skill_mix'], scenario['windows'], scenario['seed']
+        )
+    config = GoogleMapsConfig(**parameters)
+    started = time.perf_counter()
+    assignments, unserved, total_travel = RoutingService(config).solve_decomposed(
+        snapshot, geographic=config.geo_decomposition, report=report
+    )
+    wall_seconds = time.perf_counter() - started
+    report.finish()
+    return {
+        'scenario': scenario,
+        'wall_seconds': round(wall_seconds, 4),
+        'served_pct': round(100.0 * len(assignments) / snapshot.I, 2) if snapshot.I else 100.0,
+        'total_travel': round(total_travel, 1),
+        'report': report.to_dict(),
+    }
+
+
+def run_suite(suite: List[Dict], parameters: Dict, progress=None) -> Dict:
+    """
+    Solve each scenario in a fresh process, so that peak RSS is per scenario.
+    `progress(result)` is called after each scenario. Returns the JSON-friendly results.
+    """
+    results = []
+    for scenario in suite:
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        ) as executor:
+            result = executor.submit(run_scenario, scenario, parameters).result()
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'parameters': parameters,
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> List[Dict]:
+    """Per-scenario changes in wall time, objective and served % against a baseline run"""
+    previous = {result['scenario']['name']: result for result in baseline.get('results', [])}
+    changes = []
+    for result in current['results']:
+        before = previous.get(result['scenario']['name'])
+        if before is None:
+            continue
+        # Results written before scenarios were timed directly only have the report's figure
+        wall, wall_before = result['wall_seconds'], before.get('wall_seconds', before['report']['wall_seconds'])
+        objective, objective_before = result['report']['objective'], before['report']['objective']
+        changes.append({
+            'name': result['scenario']['name'],
+            'wall_change_pct': round(100.0 * (wall - wall_before) / wall_before, 1) if wall_before else None,
+            'objective_change_pct': (
+                round(100.0 * (objective - objective_before) / objective_before, 2)
+                if objective is not None and objective_before else None
+            ),
+            'served_pct_change': round(result['served_pct'] - before['served_pct'], 2),
+        })
+    return changes
+
+
+def routing_data(snapshot: SolverSnapshot, kph: float = 40.0, drop_penalty: int = 100000) -> RoutingData:
+    """Model arrays for a snapshot without committed work, built as RoutingService.solve_snapshot builds them"""
+    travel = DistanceService.travel_minutes_matrix(snapshot.depot_coords, snapshot.job_coords, kph)
+    return RoutingData.from_snapshot(snapshot, travel, EligibilityMatrix.build(snapshot, travel).allowed, drop_penalty)
+
+
+def compare_callbacks(scenario: Dict, time_limit: float) -> Dict:
+    """
+    Search one scenario's model for `time_limit` seconds twice, with the transit and
+    demand callbacks registered as Python closures and as native matrix/vector
+    callbacks (PATH_CHEAPEST_ARC + TABU_SEARCH, as the OR-Tools backend searches).
+    Returns: per mode, search branches and solutions per second and the final objective
+    """
+    snapshot = synthetic_snapshot(
+        scenario['n_requests'], scenario['n_techs'], scenario['skill_mix'], scenario['windows'], scenario['seed']
+    )
+    data = routing_data(snapshot)
+    result = {'scenario': scenario, 'time_limit': time_limit}
+    for mode, python_callbacks in (('python', True), ('native', False)):
+        manager, routing, _ = build_model(data, python_callbacks=python_callbacks)
+        solutions = []
+        routing.AddAtSolutionCallback(lambda: solutions.append(None))
+        params = search_parameters(routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+                                   routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH, time_limit)
+        started = time.perf_counter()
+        solution = routing.SolveWithParameters(params)
+        elapsed = time.perf_counter() - started
+        result[mode] = {
+            'branches_per_second': round(routing.solver().Branches() / elapsed, 1),
+            'solutions_per_second': round(len(solutions) / elapsed, 1),
+            'objective': solution.ObjectiveValue() if solution else None,
+        }
+    python_rate = result['python']['branches_per_second']
+    result['speedup'] = round(result['native']['branches_per_second'] / python_rate, 2) if python_rate else None
+    return result
@@ -0,0 +1,64 @@
+"""
+Greedy construction heuristic: parallel cheapest insertion over the model arrays
+"""
+import numpy as np
+
+from routing.model import RoutingData
+from routing.routes import Plan, insertion_costs, plan_from_routes, route_nodes
+
+
+def construct_routes(data: RoutingData) -> Plan:
+    """
+    Parallel cheapest insertion: all routes start empty and, at each step, the
+    cheapest feasible (request, technician, position) insertion over all of them is
+    made. Best insertions are cached per request and technician; only the column of
+    the route that changed is recomputed, vectorized over the remaining requests.
+    Respects skills and availability (`allowed`), time windows, capacities and the
+    horizon (see insertion_costs), so the routes are a feasible solution of the
+    routing model.
+    """
+    K, I = data.K, data.I
+    routes = [[] for _ in range(K)]
+    if I == 0:
+        return Plan(routes, np.full(0, -1, dtype=np.int64), 0)
+    lengths = np.zeros(K, dtype=np.int64)
+    loads = np.zeros(K, dtype=np.int64)
+
+    # Insertions into the empty routes, for all requests and technicians at once
+    vehicles = np.arange(K)
+    cost, position = insertion_costs(data, vehicles, route_nodes(data, routes, vehicles), lengths, loads,
+                                     np.arange(I))
+
+    best_k = cost.argmin(axis=1)
+    best_cost = cost[np.arange(I), best_k]
+    while True:
+        i = int(best_cost.argmin())
+        if not np.isfinite(best_cost[i]):
+            break
+        k = int(best_k[i])
+        routes[k].insert(int(position[i, k]), i)
+        lengths[k] += 1
+        loads[k] += data.demands[K + i]
+        cost[i, :] = np.inf
+        best_cost[i] = np.inf
+
+        # Re-price route k for the requests still waiting that may use it (inserting
+        # only shrinks feasibility, so requests without any option never get one)
+        column = np.full(I, np.inf)
+        candidates = np.flatnonzero(np.isfinite(best_cost) & data.allowed[:, k])
+        if len(candidates):
+            vehicle = np.array([k])
+            added, at = insertion_costs(data, vehicle, route_nodes(data, routes, vehicle), lengths[vehicle],
+                                        loads[vehicle], candidates)
+            column[candidates] = added[:, 0]
+            position[candidates, k] = at[:, 0]
+        cost[:, k] = column
+        stale = np.flatnonzero((best_k == k) & np.isfinite(best_cost))
+        if len(stale):
+            best_k[stale] = cost[stale].argmin(axis=1)
+            best_cost[stale] = cost[stale, best_k[stale]]
+        better = column < best_cost
+        best_k[better] = k
+        best_cost[better] = column[better]
+
+    return plan_from_routes(data, routes)
@@ -0,0 +1,191 @@
+"""
+Decomposition of a SolverSnapshot into sub-problems that can be solved independently
+"""
+import math
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from maps.services import DistanceService
+from routing.eligibility import EligibilityMatrix
+from routing.snapshot import SolverSnapshot
+
+KM_PER_DEGREE = 111.32
+
+
+class Partition:
+    """
+    Labels assigning every technician and request of a snapshot to one part.
+
+    `req_preference[i]` (when set) lists part numbers ordered from most to least
+    suitable for request i, its own part first; it is used to pick a neighbouring
+    part when a request is dropped in its own.
+    """
+    __slots__ = ('tech_labels', 'req_labels', 'req_preference')
+
+    def __init__(self, tech_labels: np.ndarray, req_labels: np.ndarray, req_preference: Sequence = None):
+        self.tech_labels = tech_labels
+        self.req_labels = req_labels
+        self.req_preference = req_preference
+
+    @property
+    def n_parts(self) -> int:
+        return int(self.tech_labels.max()) + 1 if self.tech_labels.size else 0
+
+    def parts(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(technician positions, request positions) for each part"""
+        return [
+            (np.flatnonzero(self.tech_labels == p), np.flatnonzero(self.req_labels == p))
+            for p in range(self.n_parts)
+        ]
+
+
+def _planar_km(coords: np.ndarray, ref_lat: float) -> np.ndarray:
+    """Equirectangular projection to km; accurate enough to cluster within a metro area"""
+    return np.column_stack([
+        coords[:, 0] * KM_PER_DEGREE,
+        coords[:, 1] * KM_PER_DEGREE * np.cos(np.radians(ref_lat)),
+    ])
+
+
+def _sq_distances(points: np.ndarray, centres: np.ndarray) -> np.ndarray:
+    return ((points[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = 25) -> np.ndarray:
+    """
+    Lloyd's k-means with deterministic farthest-point seeding.
+    Returns the (k, 2) centres.
+    """
+    seed = points[np.argmin(((points - points.mean(axis=0)) ** 2).sum(axis=1))]
+    centres = [seed]
+    nearest = ((points - seed) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        centre = points[np.argmax(nearest)]
+        centres.append(centre)
+        nearest = np.minimum(nearest, ((points - centre) ** 2).sum(axis=1))
+    centres = np.array(centres)
+
+    for _ in range(iterations):
+        labels = _sq_distances(points, centres).argmin(axis=1)
+        updated = centres.copy()
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                updated[c] = members.mean(axis=0)
+        if np.allclose(updated, centres):
+            break
+        centres = updated
+    return centres
+
+
+def geographic_partition(snapshot: SolverSnapshot, target_requests: int = 150) -> Partition:
+    """
+    Cluster depots and requests into regions of roughly `target_requests` requests.
+
+    Centres are found by k-means over all depot and request locations; centres that
+    no depot is nearest to are discarded, so every region has at least one
+    technician. Each depot and request then belongs to its nearest remaining centre.
+    """
+    K, I = snapshot.K, snapshot.I
+    k = min(K, math.ceil(I / max(1, target_requests)))
+    if k <= 1:
+        return Partition(np.zeros(K, dtype=np.int64), np.zeros(I, dtype=np.int64), np.zeros((I, 1), dtype=np.int64))
+
+    ref_lat = float(np.concatenate([snapshot.depot_coords[:, 0], snapshot.job_coords[:, 0]]).mean())
+    depots = _planar_km(snapshot.depot_coords, ref_lat)
+    jobs = _planar_km(snapshot.job_coords, ref_lat)
+
+    centres = kmeans(np.vstack([depots, jobs]), k)
+    centres = centres[np.unique(_sq_distances(depots, centres).argmin(axis=1))]
+
+    tech_labels = _sq_distances(depots, centres).argmin(axis=1)
+    req_preference = np.argsort(_sq_distances(jobs, centres), axis=1, kind='stable')
+    return Partition(tech_labels, req_preference[:, 0].copy(), req_preference)
+
+
+def technician_partition(snapshot: SolverSnapshot, routes: List[List[int]], kph: float = 40.0) -> Partition:
+    """
+    One part per technician, holding the requests of their route in `routes` (request
+    positions per technician, from the assignment phase of an assign-then-sequence
+    solve). Requests on no route go to the nearest technician eligible for them
+    (skill, shift and reachability, see EligibilityMatrix), or the nearest one when
+    none is, to be dropped there and left to the repair pass.
+    """
+    K, I = snapshot.K, snapshot.I
+    if K <= 1 or I == 0:
+        return Partition(np.zeros(K, dtype=np.int64), np.zeros(I, dtype=np.int64))
+
+    depot_to_job = DistanceService.haversine_km_matrix(
+        snapshot.depot_coords[:, 0], snapshot.depot_coords[:, 1], snapshot.job_coords[:, 0], snapshot.job_coords[:, 1]
+    ) * (60.0 / max(kph, 1e-6))
+    # EligibilityMatrix reads the depot-to-request arcs of the full model's node layout
+    allowed = EligibilityMatrix.build(snapshot, np.concatenate([np.zeros((K, K)), depot_to_job], axis=1)).allowed
+    labels = (np.where(allowed, 0.0, 1e9) + depot_to_job.T).argmin(axis=1)
+    for k, route in enumerate(routes):
+        labels[route] = k
+    return Partition(np.arange(K, dtype=np.int64), labels)
+
+
+def skill_partition(snapshot: SolverSnapshot) -> Partition:
+    """
+    Exact split into independent sub-problems: the connected components of the
+    graph linking technicians to the skills they hold.
+
+    A request belongs to the component of its required skill; no technician
+    outside that component can serve it, so solving components separately loses
+    nothing. Requests without a skill can go to anyone, so their presence joins
+    all technicians into one component. Requests whose skill no technician holds
+    are put in component 0 (they are unservable anywhere). Components may have
+    technicians but no requests.
+    """
+    K = snapshot.K
+    parent = list(range(K))
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    holder = {}
+    for k, tech in enumerate(snapshot.techs):
+        for skill_id in tech.skill_ids:
+            if skill_id in holder:
+                parent[find(k)] = find(holder[skill_id])
+            else:
+                holder[skill_id] = k
+    if K and (snapshot.job_skill_ids < 0).any():
+        for k in range(1, K):
+            parent[find(k)] = find(0)
+
+    numbering = {}
+    tech_labels = np.array([numbering.setdefault(find(k), len(numbering)) for k in range(K)], dtype=np.int64)
+    req_labels = np.array(
+        [tech_labels[holder[skill_id]] if skill_id in holder else 0 for skill_id in snapshot.job_skill_ids.tolist()],
+        dtype=np.int64,
+    )
+    return Partition(tech_labels, req_labels)
+
+
+def refine(snapshot: SolverSnapshot, partition: Partition,
+           split: Callable[[SolverSnapshot], Partition]) -> Partition:
+    """
+    Split every part of `partition` further with `split(sub_snapshot)`.
+    Request preferences are kept within the original part.
+    """
+    tech_labels = np.zeros(snapshot.K, dtype=np.int64)
+    req_labels = np.zeros(snapshot.I, dtype=np.int64)
+    req_preference = [None] * snapshot.I
+    offset = 0
+    for tech_idx, req_idx in partition.parts():
+        sub = split(snapshot.subset(tech_idx, req_idx))
+        tech_labels[tech_idx] = sub.tech_labels + offset
+        req_labels[req_idx] = sub.req_labels + offset
+        for n, i in enumerate(req_idx.tolist()):
+            req_preference[i] = (
+                sub.req_preference[n] + offset if sub.req_preference is not None
+                else np.array([sub.req_labels[n] + offset])
+            )
+        offset += sub.n_parts
+    return Partition(tech_labels, req_labels, req_preference)
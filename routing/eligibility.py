@@ -0,0 +1,83 @@
+"""
+Vectorized technician eligibility for the routing model
+"""
+import numpy as np
+
+from routing.snapshot import SolverSnapshot
+
+
+def skill_bitmasks(snapshot: SolverSnapshot):
+    """
+    Encode technician skills as bitmasks.
+
+    Returns (tech_words, job_word, job_bit): `tech_words` is a (K, W) uint64 array of
+    skill bits per technician, and each request's required skill sits at bit
+    `job_bit[i]` of word `job_word[i]`. Requests without a skill (or whose skill no
+    technician has) get job_word -1.
+    """
+    skill_ids = sorted({skill_id for tech in snapshot.techs for skill_id in tech.skill_ids})
+    position = {skill_id: n for n, skill_id in enumerate(skill_ids)}
+    words = max(1, (len(skill_ids) + 63) // 64)
+
+    tech_words = np.zeros((snapshot.K, words), dtype=np.uint64)
+    for k, tech in enumerate(snapshot.techs):
+        for skill_id in tech.skill_ids:
+            n = position[skill_id]
+            tech_words[k, n // 64] |= np.uint64(1) << np.uint64(n % 64)
+
+    job_pos = np.array([position.get(int(s), -1) for s in snapshot.job_skill_ids], dtype=np.int64)
+    has_word = job_pos >= 0
+    job_word = np.where(has_word, job_pos // 64, -1)
+    job_bit = np.where(has_word, job_pos % 64, 0).astype(np.uint64)
+    return tech_words, job_word, job_bit
+
+
+class EligibilityMatrix:
+    """
+    Boolean (I, K) matrices saying which technician may serve which request.
+
+    `allowed` is the conjunction of the individual checks; the components are kept
+    so unserved diagnostics can explain which check ruled a technician out.
+    """
+    __slots__ = ('skill_ok', 'shift_ok', 'reachable', 'free', 'allowed')
+
+    def __init__(self, skill_ok, shift_ok, reachable, free=None):
+        self.skill_ok = skill_ok
+        self.shift_ok = shift_ok
+        self.reachable = reachable
+        self.free = free if free is not None else np.ones_like(skill_ok)
+        self.allowed = skill_ok & shift_ok & reachable & self.free
+
+    @classmethod
+    def build(cls, snapshot: SolverSnapshot, travel: np.ndarray) -> 'EligibilityMatrix':
+        """
+        Build the matrix in one vectorized pass.
+
+        A technician is eligible for a request when they hold its required skill,
+        their shift overlaps its window, and leaving the depot at shift start they
+        can arrive before the window closes (travel from `travel[k, K + i]`).
+        """
+        K, I = snapshot.K, snapshot.I
+
+        tech_words, job_word, job_bit = skill_bitmasks(snapshot)
+        needs_skill = snapshot.job_skill_ids >= 0
+        words_for_job = tech_words[:, np.maximum(job_word, 0)].T  # (I, K)
+        has_bit = ((words_for_job >> job_bit[:, None]) & np.uint64(1)).astype(bool)
+        skill_ok = np.where(needs_skill[:, None], has_bit & (job_word >= 0)[:, None], True)
+
+        job_start = snapshot.job_windows[:, 0][:, None]
+        job_end = snapshot.job_windows[:, 1][:, None]
+        shift_start = snapshot.tech_windows[:, 0][None, :]
+        shift_end = snapshot.tech_windows[:, 1][None, :]
+        shift_ok = (job_start <= shift_end) & (job_end >= shift_start)
+
+        depot_to_job = travel[:K, K:K + I].T  # (I, K)
+        earliest_arrival = np.maximum(shift_start + depot_to_job, job_start)
+        reachable = earliest_arrival <= job_end
+
+        return cls(skill_ok, shift_ok, reachable)
+
+    def restrict(self, free: np.ndarray) -> None:
+        """Also require `free` (e.g. no conflict with committed assignments)"""
+        self.free = free
+        self.allowed = self.skill_ok & self.shift_ok & self.reachable & free
@@ -0,0 +1,102 @@
+"""
+Sorted interval index for technician busy time (committed assignments)
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from core.models import Assignment
+
+# Assignment statuses that block technician time
+BUSY_STATUSES = ('assigned', 'in_progress')
+
+
+def busy_span(planned_start, planned_finish, service_minutes: int) -> Tuple:
+    """
+    Time a committed assignment blocks: from its planned start until its planned
+    finish plus the service duration (a buffer after the job). Both the solver's
+    snapshot and the admin views build busy intervals through this.
+    """
+    return planned_start, planned_finish + timedelta(minutes=service_minutes)
+
+
+class IntervalIndex:
+    """
+    Per-technician busy intervals, merged and sorted so overlap queries are O(log E).
+
+    Intervals are half-open [start, end). Bounds can be minute offsets (ints) or
+    datetimes; `overlaps_many` needs numeric bounds.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple] = ()):
+        raw = defaultdict(list)
+        for key, start, end in intervals:
+            if start is not None and end is not None and end > start:
+                raw[key].append((start, end))
+
+        self._starts: Dict = {}
+        self._ends: Dict = {}
+        for key, spans in raw.items():
+            spans.sort()
+            starts, ends = [spans[0][0]], [spans[0][1]]
+            for start, end in spans[1:]:
+                if start <= ends[-1]:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[key] = starts
+            self._ends[key] = ends
+
+    @classmethod
+    def from_assignments(cls, assignments: Iterable[Assignment]) -> 'IntervalIndex':
+        """
+        Build from already-fetched Assignment instances (with their service requests),
+        keyed by technician id. Only BUSY_STATUSES rows count, spanning busy_span.
+        """
+        return cls(
+            (a.technician_id, *busy_span(a.planned_start, a.planned_finish, a.service_request.service_minutes))
+            for a in assignments if a.technician_id and a.status in BUSY_STATUSES
+        )
+
+    def __contains__(self, key) -> bool:
+        return key in self._starts
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    def busy(self, key) -> List[Tuple]:
+        """Merged busy intervals for `key`, sorted by start"""
+        return list(zip(self._starts.get(key, []), self._ends.get(key, [])))
+
+    def overlaps_many(self, key, starts, ends) -> np.ndarray:
+        """Does each numeric [start, end) query overlap a busy interval of `key`? (arrays)"""
+        starts = np.asarray(starts)
+        busy_ends = self._ends.get(key)
+        if not busy_ends:
+            return np.zeros(starts.shape, dtype=bool)
+        busy_starts = np.asarray(self._starts[key])
+        busy_ends = np.asarray(busy_ends)
+        pos = np.searchsorted(busy_ends, starts, side='right')
+        hit = pos < len(busy_ends)
+        result = np.zeros(starts.shape, dtype=bool)
+        result[hit] = busy_starts[pos[hit]] < np.asarray(ends)[hit]
+        return result
+
+    def free_slots(self, key, day_start, day_end) -> List[Tuple]:
+        """Gaps between busy intervals of `key` within [day_start, day_end)"""
+        slots = []
+        cursor = day_start
+        for start, end in self.busy(key):
+            if end <= day_start:
+                continue
+            if start >= day_end:
+                break
+            if start > cursor:
+                slots.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < day_end:
+            slots.append((cursor, day_end))
+        return slots
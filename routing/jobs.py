@@ -0,0 +1,370 @@
+"""
+Background solve jobs: run RoutingService off the request thread, in a process pool
+of the web process or in a dedicated worker (the run_solve_jobs command)
+"""
+import io
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from core.models import GoogleMapsConfig, Technician, ServiceRequest
+from routing.models import SolutionPoint, SolveJob, SolveRun
+from routing.persistence import commit_plan
+from routing.report import SolveReport
+from routing.services import RoutingService, SolveCancelled
+from routing.snapshot import SolverSnapshot, candidate_requests
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _init_worker():
+    """Pool worker initializer: spawned processes need their own Django setup"""
+    django.setup()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all solve jobs submitted from this process"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'SOLVE_JOB_WORKERS', 1),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def job_runner() -> str:
+    """'pool' (jobs run in the submitting process's pool) or 'worker' (the run_solve_jobs command runs them)"""
+    return getattr(settings, 'SOLVE_JOB_RUNNER', 'pool')
+
+
+def submit_solve_job(job: SolveJob) -> None:
+    """
+    Queue `job` on the process pool once the creating transaction commits; with the
+    'worker' runner the row is already queued and a run_solve_jobs worker picks it up
+    """
+    if job_runner() == 'pool':
+        transaction.on_commit(lambda: get_executor().submit(run_solve_job, job.pk))
+
+
+def stale_after() -> timedelta:
+    """How long a running job may go without a heartbeat before it counts as abandoned"""
+    return timedelta(seconds=getattr(settings, 'SOLVE_JOB_STALE_SECONDS', 120))
+
+
+def stale_jobs():
+    """
+    Jobs no process is working on: running jobs whose last heartbeat (or start) is
+    older than stale_after(), e.g. because their worker was recycled or killed
+    mid-solve; and, when no job is running at all, jobs queued for longer than that
+    (their pool went away before starting them)
+    """
+    cutoff = timezone.now() - stale_after()
+    running = SolveJob.objects.filter(status='running')
+    stale = running.filter(heartbeat_at__lt=cutoff) | running.filter(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    if not running.filter(heartbeat_at__gte=cutoff).exists():
+        stale |= SolveJob.objects.filter(status='queued', created_at__lt=cutoff)
+    return stale
+
+
+def recover_stale_jobs() -> List[SolveJob]:
+    """
+    Mark stale jobs (see stale_jobs) failed and queue a new job for each in its place
+    (unless it was being cancelled), so that their dates can be solved again.
+    Returns: the new jobs
+    """
+    requeued = []
+    for job in stale_jobs():
+        reason = 'Worker stopped responding' if job.status == 'running' else 'Worker lost before start'
+        with transaction.atomic():
+            # Only if it is still in the state we found it in (another process may have recovered it)
+            if not SolveJob.objects.filter(pk=job.pk, status=job.status).update(
+                status='failed', progress=reason, finished_at=timezone.now()
+            ):
+                continue
+            if job.cancel_requested:
+                continue
+            new_job = SolveJob.objects.create(
+                assigned_date=job.assigned_date, requested_by=job.requested_by, warm_start=job.warm_start
+            )
+            SolveJob.objects.filter(pk=job.pk).update(progress=f'{reason}; re-queued as job #{new_job.pk}')
+            submit_solve_job(new_job)
+        logger.warning("Solve job #%d for %s was abandoned (%s); re-queued as job #%d",
+                       job.pk, job.assigned_date, job.status, new_job.pk)
+        requeued.append(new_job)
+    return requeued
+
+
+def active_job(assigned_date) -> Optional[SolveJob]:
+    """The queued or running job for `assigned_date`, after recovering stale ones (see recover_stale_jobs)"""
+    recover_stale_jobs()
+    return SolveJob.objects.filter(assigned_date=assigned_date, status__in=['queued', 'running']).first()
+
+
+def cancel_solve_job(job: SolveJob) -> None:
+    """Cancel a queued job immediately, or ask a running job to stop"""
+    cancelled = SolveJob.objects.filter(pk=job.pk, status='queued').update(
+        status='cancelled', cancel_requested=True, progress='Cancelled before start',
+        finished_at=timezone.now(),
+    )
+    if not cancelled:
+        SolveJob.objects.filter(pk=job.pk, status='running').update(
+            cancel_requested=True, progress='Cancelling...'
+        )
+
+
+class CancelCheck:
+    """
+    `should_stop` hook for RoutingService that polls the job row at most once per
+    interval. A job that is no longer running (e.g. recovered as stale) stops too.
+
+    The hook also refreshes the job's heartbeat every `heartbeat` seconds: it is
+    called throughout a solve (between phases, at improving solutions, by parents
+    waiting on sub-problems), which a thread could not do while OR-Tools holds the GIL.
+    """
+
+    def __init__(self, job_id: int, interval: float = 1.0, heartbeat: Optional[float] = None):
+        self.job_id = job_id
+        self.interval = interval
+        self.heartbeat = heartbeat if heartbeat is not None else getattr(settings, 'SOLVE_JOB_HEARTBEAT_SECONDS', 10)
+        self.cancelled = False
+        self._last_check = 0.0
+        self._last_beat = time.monotonic()
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if not self.cancelled and now - self._last_check >= self.interval:
+            self._last_check = now
+            self.cancelled = SolveJob.objects.filter(pk=self.job_id).exclude(
+                cancel_requested=False, status='running'
+            ).exists()
+            if not self.cancelled and now - self._last_beat >= self.heartbeat:
+                self._last_beat = now
+                SolveJob.objects.filter(pk=self.job_id, status='running').update(heartbeat_at=timezone.now())
+        return self.cancelled
+
+
+def accept_solve_job(job: SolveJob) -> bool:
+    """Ask a running job to end its search and save the best plan found so far"""
+    return bool(SolveJob.objects.filter(pk=job.pk, status='running', cancel_requested=False).update(
+        accept_requested=True, progress='Accepting current plan...'
+    ))
+
+
+class JobProgress:
+    """
+    `progress` hook for RoutingService: stores each reported improving solution as a
+    SolutionPoint and polls the job row for an accept request at most once per interval.
+    Elapsed times count from the hook's creation, also in the copies handed to
+    sub-problem workers (`for_part`).
+    """
+
+    def __init__(self, job_id: int, interval: float = 1.0, part: int = 0, origin: float = None):
+        self.job_id = job_id
+        self.interval = interval
+        self.part = part
+        self.origin = time.time() if origin is None else origin
+        self.accepted = False
+        self._last_check = 0.0
+
+    def for_part(self, part: int) -> 'JobProgress':
+        return JobProgress(self.job_id, self.interval, part, self.origin)
+
+    def publish(self, objective: int, served: int) -> None:
+        SolutionPoint.objects.create(
+            job_id=self.job_id, part=self.part, elapsed_seconds=time.time() - self.origin,
+            objective=objective, served_count=served,
+        )
+
+    def accept_requested(self) -> bool:
+        now = time.monotonic()
+        if not self.accepted and now - self._last_check >= self.interval:
+            self._last_check = now
+            self.accepted = SolveJob.objects.filter(pk=self.job_id, accept_requested=True).exists()
+        return self.accepted
+
+
+def convergence(job_id: int) -> List[Dict]:
+    """
+    Best plan over time for a job: one point per improvement, with the objective and
+    served count summed over the sub-problems that have reported so far (`parts`)
+    """
+    best = {}
+    curve = []
+    points = SolutionPoint.objects.filter(job_id=job_id).values_list(
+        'part', 'elapsed_seconds', 'objective', 'served_count'
+    )
+    for part, elapsed, objective, served in points:
+        if part in best and objective >= best[part][0]:
+            continue
+        best[part] = (objective, served)
+        curve.append({
+            'elapsed': round(elapsed, 2),
+            'objective': sum(objective for objective, _ in best.values()),
+            'served': sum(served for _, served in best.values()),
+            'parts': len(best),
+        })
+    return curve
+
+
+def unserved_summary(unserved: List[Dict], assigned_date) -> List[Dict]:
+    """JSON-friendly unserved reasons for requests whose window starts on `assigned_date`"""
+    return [
+        {
+            'request_name': item['request'].name,
+            'customer': item['request'].customer.username,
+            'reason_short': item.get('reason_short', 'Unknown'),
+            'reason_detail': item.get('reason_detail', 'Unknown reason'),
+            'required_skill': item.get('required_skill', 'None'),
+            'window_start': item['request'].window_start.strftime('%Y-%m-%d %H:%M') if item['request'].window_start else 'N/A',
+            'window_end': item['request'].window_end.strftime('%Y-%m-%d %H:%M') if item['request'].window_end else 'N/A',
+            'window_date': item['request'].window_start.strftime('%Y-%m-%d') if item['request'].window_start else None,
+        }
+        for item in unserved
+        if item['request'].window_start and item['request'].window_start.date() == assigned_date
+    ]
+
+
+def record_run(job: Optional[SolveJob], snapshot: SolverSnapshot, report: SolveReport, parameters: Dict,
+               unserved: List[Dict], total_travel: float) -> SolveRun:
+    """
+    Store a finished solve in the run history, with its input snapshot compressed
+    (`job` is None for solves that do not run as a job, e.g. batch planning)
+    """
+    buffer = io.BytesIO()
+    snapshot.save(buffer)
+    return SolveRun.objects.create(
+        job=job,
+        assigned_date=snapshot.assigned_date,
+        parameters=parameters,
+        report=report.to_dict(),
+        wall_seconds=report.wall_seconds,
+        cpu_seconds=report.cpu_seconds,
+        objective=report.objective,
+        request_count=report.requests,
+        assigned_count=report.assigned_count,
+        unserved_count=report.dropped_count,
+        total_travel=total_travel,
+        unserved=unserved_summary(unserved, snapshot.assigned_date),
+        snapshot=buffer.getvalue(),
+    )
+
+
+def run_solve_job(job_id: int) -> None:
+    """Pool (or worker) entry point: solve and persist one job, recording the outcome on the row"""
+    close_old_connections()
+    try:
+        _run_solve_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def _run_solve_job(job_id: int) -> None:
+    now = timezone.now()
+    claimed = SolveJob.objects.filter(pk=job_id, status='queued').update(
+        status='running', started_at=now, heartbeat_at=now, progress='Loading technicians and requests'
+    )
+    if not claimed:
+        return  # Cancelled before start (or already picked up)
+
+    job = SolveJob.objects.get(pk=job_id)
+    should_stop = CancelCheck(job_id)
+    progress = JobProgress(job_id)
+    try:
+        config = GoogleMapsConfig.load()
+        # Only requests whose window overlaps the date (plus configured look-back/ahead) enter the model
+        pending_requests = list(candidate_requests(
+            job.assigned_date, config.candidate_look_back_days, config.candidate_look_ahead_days
+        ).select_related('customer'))
+        active_technicians = list(Technician.objects.filter(
+            is_active=True,
+            depot_lat__isnull=False,
+            depot_lon__isnull=False
+        ))
+        unscoped_count = ServiceRequest.objects.filter(
+            status='pending', lat__isnull=False, lon__isnull=False
+        ).count()
+
+        assigned_date = timezone.make_aware(datetime.combine(job.assigned_date, datetime.min.time()))
+        report = SolveReport()
+        with report.phase('snapshot_load'):
+            snapshot = SolverSnapshot.load(
+                active_technicians, pending_requests, assigned_date, warm_start=job.warm_start
+            )
+        # The model holds the candidates plus, when warm starting, the re-planned requests
+        replanned = snapshot.I - len(pending_requests)
+        model_size = {
+            'pending_requests': unscoped_count,
+            'candidate_requests': snapshot.I,
+            'replanned_requests': replanned,
+            'technicians': snapshot.K,
+            'nodes': snapshot.K + snapshot.I,
+            'unscoped_nodes': snapshot.K + unscoped_count + replanned,
+        }
+        
+        SolveJob.objects.filter(pk=job_id).update(progress='Solving')
+        routing_service = RoutingService()
+        assignments_data, unserved, total_travel, report = routing_service.solve(
+            active_technicians,
+            pending_requests,
+            assigned_date,
+            should_stop=should_stop,
+            warm_start=job.warm_start,
+            snapshot=snapshot,
+            report=report,
+            progress=progress,
+        )
+        if should_stop():
+            raise SolveCancelled()
+        # Parallel sub-problems poll their own copies of the hook, so ask the row
+        accepted_early = SolveJob.objects.filter(pk=job_id, accept_requested=True).exists()
+
+        SolveJob.objects.filter(pk=job_id).update(progress='Saving assignments')
+        # A warm-start re-plan replaces the old plan: requests it dropped go back to pending
+        changeset = commit_plan(
+            assignments_data,
+            job.assigned_date,
+            released_request_ids=[item['request'].pk for item in unserved] if job.warm_start else (),
+        )
+
+        run = record_run(
+            job, snapshot, report, routing_service.parameters(warm_start=job.warm_start),
+            unserved, total_travel,
+        )
+        SolveJob.objects.filter(pk=job_id, status='running').update(
+            status='succeeded',
+            progress='Done',
+            finished_at=timezone.now(),
+            result={
+                'saved_count': changeset['created_count'],
+                'updated_count': changeset['updated_count'],
+                'released_count': changeset['deleted_count'],
+                'unchanged_count': changeset['unchanged_count'],
+                'changeset': changeset['changes'],
+                'total_travel': total_travel,
+                'unserved_count': len(unserved),
+                'model_size': model_size,
+                'accepted_early': accepted_early,
+                'run_id': run.pk,
+            },
+        )
+    except SolveCancelled:
+        SolveJob.objects.filter(pk=job_id, status='running').update(
+            status='cancelled', progress='Cancelled', finished_at=timezone.now()
+        )
+    except Exception as e:
+        SolveJob.objects.filter(pk=job_id, status='running').update(
+            status='failed', progress=str(e)[:200], error=traceback.format_exc(), finished_at=timezone.now()
+        )
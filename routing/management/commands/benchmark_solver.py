@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import GoogleMapsConfig
+from routing.benchmark import TIERS, VARIANTS, compare, compare_callbacks, run_suite, scenarios
+
+
+class Command(BaseCommand):
+    help = 'Solve synthetic Melbourne instances at several scales and write per-phase timings, served %, objective and memory to JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tiers', type=int, nargs='+', default=TIERS, help=f'Request counts (default: {TIERS})')
+        parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), help='Variants to run (default: all)')
+        parser.add_argument('--time-limit', type=int, default=10, help='Solver time limit in seconds (default: 10)')
+        parser.add_argument('--geographic', action='store_true', help='Use geographic decomposition')
+        parser.add_argument('--assign-then-sequence', action='store_true',
+                            help="Assign requests to technicians first, then sequence each technician's route")
+        parser.add_argument('--backend', choices=[choice for choice, _ in GoogleMapsConfig.SOLVER_BACKEND_CHOICES],
+                            default='ortools', help='Search backend (default: ortools)')
+        parser.add_argument('--portfolio', action='store_true', help='Search with the strategy portfolio')
+        parser.add_argument('--fixed-time-limit', action='store_true',
+                            help='Use the full time limit whatever the instance size, without plateau stops')
+        parser.add_argument('--seed', type=int, default=0, help='Instance seed (default: 0)')
+        parser.add_argument('-o', '--output', default='solver-benchmark.json', help='Results file')
+        parser.add_argument('--compare', help='Earlier results file to report changes against')
+        parser.add_argument('--callbacks', action='store_true',
+                            help='Instead of the suite, compare Python closure and native matrix/vector '
+                                 'transit and demand callbacks over a fixed search time')
+
+    def handle(self, *args, **options):
+        if options['callbacks']:
+            return self.compare_callbacks(options)
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        parameters = {
+            'time_limit_seconds': options['time_limit'],
+            'geo_decomposition': options['geographic'],
+            'assign_then_sequence': options['assign_then_sequence'],
+            'solver_backend': options['backend'],
+            'portfolio_search': options['portfolio'],
+        }
+        if options['fixed_time_limit']:
+            parameters.update(adaptive_time_limit=False, plateau_seconds=0)
+        suite = scenarios(options['tiers'], options['variants'], options['seed'])
+
+        def progress(result):
+            report = result['report']
+            self.stdout.write(
+                f"{result['scenario']['name']:<22} {result['scenario']['n_techs']:>5} techs  "
+                f"served {result['served_pct']:6.2f}%  objective {report['objective']}  "
+                f"wall {result['wall_seconds']:8.3f}s  cpu {report['cpu_seconds']:8.3f}s  "
+                f"peak {(report['peak_rss_kb'] or 0) / 1024:7.1f} MiB"
+            )
+
+        results = run_suite(suite, parameters, progress)
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results['results'])} results to {options['output']}"))
+
+        if baseline is not None:
+            for change in compare(results, baseline):
+                self.stdout.write(
+                    f"{change['name']:<22} wall {change['wall_change_pct']}%  "
+                    f"objective {change['objective_change_pct']}%  served {change['served_pct_change']:+} pts"
+                )
+
+    def compare_callbacks(self, options):
+        results = []
+        for scenario in scenarios(options['tiers'], options['variants'], options['seed']):
+            result = compare_callbacks(scenario, options['time_limit'])
+            results.append(result)
+            for mode in ('python', 'native'):
+                self.stdout.write(
+                    f"{scenario['name']:<22} {mode:<7} {result[mode]['branches_per_second']:10.1f} branches/s  "
+                    f"{result[mode]['solutions_per_second']:7.1f} solutions/s  objective {result[mode]['objective']}"
+                )
+            self.stdout.write(f"{scenario['name']:<22} native speedup {result['speedup']}x")
+        with open(options['output'], 'w') as f:
+            json.dump({'callbacks': results}, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
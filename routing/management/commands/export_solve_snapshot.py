@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import GoogleMapsConfig, Technician
+from routing.models import SolveRun
+from routing.services import RoutingService
+from routing.snapshot import SolverSnapshot, candidate_requests
+
+
+class Command(BaseCommand):
+    help = 'Export the solver inputs for a date (or a recorded solve run) to a compressed .npz file for replay_solve_snapshot'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('date', nargs='?', help='Planning date (YYYY-MM-DD)')
+        parser.add_argument('-o', '--output', help='Output file (default: solve-<date>.npz)')
+        parser.add_argument('--warm-start', action='store_true',
+                            help="Include the date's persisted plan as the starting routes")
+        parser.add_argument('--run', type=int, help='Export the input snapshot of this SolveRun instead')
+    
+    def handle(self, *args, **options):
+        if options['run']:
+            run = SolveRun.objects.filter(pk=options['run']).first()
+            if run is None:
+                raise CommandError(f"Solve run {options['run']} does not exist")
+            snapshot = run.load_snapshot()
+            parameters = run.parameters
+        elif options['date']:
+            try:
+                assigned_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f"Invalid date '{options['date']}', expected YYYY-MM-DD")
+            config = GoogleMapsConfig.load()
+            # Same candidate selection as a solve job for the date
+            pending_requests = candidate_requests(
+                assigned_date, config.candidate_look_back_days, config.candidate_look_ahead_days
+            )
+            active_technicians = Technician.objects.filter(
+                is_active=True,
+                depot_lat__isnull=False,
+                depot_lon__isnull=False
+            )
+            snapshot = SolverSnapshot.load(
+                active_technicians, pending_requests, assigned_date, warm_start=options['warm_start']
+            )
+            parameters = RoutingService(config).parameters(warm_start=options['warm_start'])
+        else:
+            raise CommandError('Give a date or --run')
+        
+        output = options['output'] or f'solve-{snapshot.assigned_date}.npz'
+        with open(output, 'wb') as f:
+            snapshot.save(f, parameters=parameters)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {snapshot.K} technicians, {snapshot.I} requests and '
+            f'{len(snapshot.existing)} existing assignments for {snapshot.assigned_date} to {output}'
+        ))
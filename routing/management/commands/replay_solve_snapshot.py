@@ -0,0 +1,86 @@
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import GoogleMapsConfig
+from routing.report import SolveReport
+from routing.services import RoutingService
+from routing.snapshot import SolverSnapshot
+
+# Parameters stored with a snapshot that map onto GoogleMapsConfig fields
+CONFIG_FIELDS = ['avg_speed_kph', 'time_limit_seconds', 'drop_penalty_per_job', 'geo_decomposition',
+                 'region_target_requests', 'assign_then_sequence', 'solver_backend', 'portfolio_search', 'adaptive_time_limit',
+                 'plateau_seconds']
+
+
+def _no_queries(execute, sql, params, many, context):
+    raise CommandError(f'Replay attempted a database query: {sql}')
+
+
+class Command(BaseCommand):
+    help = 'Solve a snapshot written by export_solve_snapshot, without the database, and print its SolveReport'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Snapshot file (.npz)')
+        parser.add_argument('--time-limit', type=int, help='Solver time limit in seconds')
+        parser.add_argument('--geographic', action='store_true', default=None,
+                            help='Use geographic decomposition')
+        parser.add_argument('--no-geographic', action='store_false', dest='geographic',
+                            help='Do not use geographic decomposition')
+        parser.add_argument('--region-target', type=int, help='Target number of requests per region')
+        parser.add_argument('--assign-then-sequence', action='store_true', default=None,
+                            help="Assign requests to technicians first, then sequence each technician's route")
+        parser.add_argument('--no-assign-then-sequence', action='store_false', dest='assign_then_sequence',
+                            help='Solve one joint model per part')
+        parser.add_argument('--backend', choices=[choice for choice, _ in GoogleMapsConfig.SOLVER_BACKEND_CHOICES],
+                            help='Search backend')
+        parser.add_argument('--portfolio', action='store_true', default=None,
+                            help='Search with the strategy portfolio')
+        parser.add_argument('--no-portfolio', action='store_false', dest='portfolio',
+                            help='Search strategies sequentially')
+        parser.add_argument('--fixed-time-limit', action='store_false', dest='adaptive', default=None,
+                            help='Use the full time limit whatever the instance size')
+        parser.add_argument('--plateau', type=float, help='Seconds without improvement before the search ends (0 = never)')
+        parser.add_argument('--speed', type=int, help='Average speed in km/h')
+        parser.add_argument('--drop-penalty', type=int, help='Penalty per dropped job')
+    
+    def handle(self, *args, **options):
+        parameters = SolverSnapshot.read_parameters(options['file'])
+        overrides = {
+            'time_limit_seconds': options['time_limit'],
+            'geo_decomposition': options['geographic'],
+            'region_target_requests': options['region_target'],
+            'assign_then_sequence': options['assign_then_sequence'],
+            'solver_backend': options['backend'],
+            'portfolio_search': options['portfolio'],
+            'adaptive_time_limit': options['adaptive'],
+            'plateau_seconds': options['plateau'],
+            'avg_speed_kph': options['speed'],
+            'drop_penalty_per_job': options['drop_penalty'],
+        }
+        parameters.update({name: value for name, value in overrides.items() if value is not None})
+        # Unsaved instance: recorded settings on top of the model defaults
+        config = GoogleMapsConfig(**{name: parameters[name] for name in CONFIG_FIELDS if name in parameters})
+        
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_no_queries))
+            
+            report = SolveReport()
+            with report.phase('snapshot_load'):
+                snapshot = SolverSnapshot.from_file(options['file'])
+            self.stdout.write(
+                f'Replaying {snapshot.assigned_date}: {snapshot.K} technicians, {snapshot.I} requests, '
+                f'time limit {config.time_limit_seconds}s, '
+                f"geographic {'on' if config.geo_decomposition else 'off'}, backend {config.solver_backend}"
+            )
+            assignments, unserved, total_travel = RoutingService(config).solve_decomposed(
+                snapshot, geographic=config.geo_decomposition, report=report
+            )
+            report.finish()
+        
+        self.stdout.write(report.format())
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(assignments)} assigned, {len(unserved)} unserved, total travel {total_travel:.1f} minutes'
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from routing.jobs import recover_stale_jobs, run_solve_job
+from routing.models import SolveJob
+
+
+class Command(BaseCommand):
+    help = ('Run queued solve jobs one at a time, outside the web processes (for SOLVE_JOB_RUNNER = "worker"); '
+            'also re-queues jobs abandoned by workers that died mid-solve')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds between queue checks (default: 2)')
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs, then exit')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            for job in recover_stale_jobs():
+                self.stdout.write(self.style.WARNING(f'Re-queued abandoned job as #{job.pk} ({job.assigned_date})'))
+            job_id = SolveJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True).first()
+            if job_id is not None:
+                # run_solve_job claims the job atomically, so several workers can share the queue
+                self.stdout.write(f'Running solve job #{job_id}')
+                run_solve_job(job_id)
+                status = SolveJob.objects.filter(pk=job_id).values_list('status', flat=True).first()
+                self.stdout.write(f'Solve job #{job_id}: {status}')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll'])
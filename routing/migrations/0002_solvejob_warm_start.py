@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solvejob",
+            name="warm_start",
+            field=models.BooleanField(
+                default=False,
+                help_text="Re-plan the persisted plan for the date, starting from its routes",
+            ),
+        ),
+    ]
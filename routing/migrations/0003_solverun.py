@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routing", "0002_solvejob_warm_start"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SolveRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("assigned_date", models.DateField()),
+                (
+                    "parameters",
+                    models.JSONField(
+                        default=dict, help_text="Solver settings the run used"
+                    ),
+                ),
+                (
+                    "report",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Phase timings, model sizes and memory (SolveReport)",
+                    ),
+                ),
+                ("wall_seconds", models.FloatField(default=0.0)),
+                ("cpu_seconds", models.FloatField(default=0.0)),
+                ("objective", models.FloatField(blank=True, null=True)),
+                ("request_count", models.IntegerField(default=0)),
+                ("assigned_count", models.IntegerField(default=0)),
+                ("unserved_count", models.IntegerField(default=0)),
+                ("total_travel", models.FloatField(default=0.0)),
+                (
+                    "unserved",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Unserved requests with reasons",
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.BinaryField(
+                        help_text="Compressed solver input arrays (.npz)"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "job",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="run",
+                        to="routing.solvejob",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["assigned_date", "-created_at"],
+                        name="routing_sol_assigne_7e40e0_idx",
+                    )
+                ],
+            },
+        ),
+    ]
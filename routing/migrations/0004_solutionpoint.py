@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routing", "0003_solverun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solvejob",
+            name="accept_requested",
+            field=models.BooleanField(
+                default=False,
+                help_text="End the search early and save the best plan found so far",
+            ),
+        ),
+        migrations.CreateModel(
+            name="SolutionPoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("part", models.IntegerField(default=0)),
+                (
+                    "elapsed_seconds",
+                    models.FloatField(help_text="Seconds since the job started"),
+                ),
+                ("objective", models.BigIntegerField()),
+                ("served_count", models.IntegerField()),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="solution_points",
+                        to="routing.solvejob",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["elapsed_seconds"],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("routing", "0004_solutionpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solvejob",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Last sign of life from the process running the job",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,231 @@
+"""
+OR-Tools routing model built from plain arrays (no Django), so that worker
+processes can rebuild the same model the service builds
+"""
+import time
+import weakref
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+from ortools.constraint_solver import routing_enums_pb2
+
+
+class RoutingData:
+    """
+    Numeric model inputs. Nodes 0..K-1 are depots, K..K+I-1 are requests.
+
+    `transit[a, b]` is travel plus service at a, in minutes; `tw_start` / `tw_end`
+    are per-node windows already clamped to [0, horizon]; `allowed[i, k]` says
+    whether technician k may serve request i.
+    """
+    __slots__ = ('transit', 'tw_start', 'tw_end', 'demands', 'capacities', 'allowed', 'drop_penalty', 'horizon')
+
+    def __init__(self, transit: np.ndarray, tw_start: np.ndarray, tw_end: np.ndarray, demands: np.ndarray,
+                 capacities: List[int], allowed: np.ndarray, drop_penalty: int, horizon: int):
+        self.transit = transit
+        self.tw_start = tw_start
+        self.tw_end = tw_end
+        self.demands = demands
+        self.capacities = capacities
+        self.allowed = allowed
+        self.drop_penalty = drop_penalty
+        self.horizon = horizon
+
+    @classmethod
+    def from_snapshot(cls, snapshot, travel: np.ndarray, allowed: np.ndarray, drop_penalty: int) -> 'RoutingData':
+        """
+        Model arrays for a routing.snapshot.SolverSnapshot and its travel-minutes
+        matrix, with the horizon and window clamping of RoutingService.solve_snapshot
+        """
+        service = np.concatenate([np.zeros(snapshot.K, dtype=np.int64), snapshot.service_minutes.astype(np.int64)])
+        tw_start = np.concatenate([snapshot.tech_windows[:, 0], snapshot.job_windows[:, 0]]).astype(np.int64)
+        tw_end = np.concatenate([snapshot.tech_windows[:, 1], snapshot.job_windows[:, 1]]).astype(np.int64)
+        horizon = max(24 * 60, int(tw_end.max()) + 60)
+        return cls(np.rint(travel).astype(np.int64) + service[:, None], np.maximum(tw_start, 0),
+                   np.minimum(tw_end, horizon), service, snapshot.capacities.tolist(), allowed, drop_penalty,
+                   horizon)
+
+    @property
+    def K(self) -> int:
+        return len(self.capacities)
+
+    @property
+    def I(self) -> int:
+        return self.allowed.shape[0]
+
+
+def build_model(data: RoutingData, python_callbacks: bool = False
+                ) -> Tuple[pywrapcp.RoutingIndexManager, pywrapcp.RoutingModel, object]:
+    """
+    Routing model with time windows, capacities, skills and optional (droppable) jobs.
+    Transit and demand are native matrix/vector callbacks; `python_callbacks`
+    registers equivalent Python closures instead (only to benchmark the difference,
+    see routing.benchmark.compare_callbacks).
+    """
+    K, I = data.K, data.I
+    num_nodes = K + I
+    start_nodes = list(range(K))
+    manager = pywrapcp.RoutingIndexManager(num_nodes, K, start_nodes, start_nodes)
+    routing = pywrapcp.RoutingModel(manager)
+
+    if python_callbacks:
+        transit, demands, to_node = data.transit, data.demands, manager.IndexToNode
+        transit_cb_idx = routing.RegisterTransitCallback(lambda a, b: int(transit[to_node(a), to_node(b)]))
+    else:
+        transit_cb_idx = routing.RegisterTransitMatrix(data.transit.tolist())
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_cb_idx)
+
+    routing.AddDimension(transit_cb_idx, 0, data.horizon, False, "Time")
+    time_dim = routing.GetDimensionOrDie("Time")
+    for node, (start, end) in enumerate(zip(data.tw_start.tolist(), data.tw_end.tolist())):
+        time_dim.CumulVar(manager.NodeToIndex(node)).SetRange(start, end)
+
+    if python_callbacks:
+        demand_cb_idx = routing.RegisterUnaryTransitCallback(lambda a: int(demands[to_node(a)]))
+    else:
+        demand_cb_idx = routing.RegisterUnaryTransitVector(data.demands.tolist())
+    routing.AddDimensionWithVehicleCapacity(demand_cb_idx, 0, data.capacities, True, "Capacity")
+
+    # Skills constraints
+    for i in range(I):
+        disallowed = np.flatnonzero(~data.allowed[i]).tolist()
+        if disallowed:
+            routing.VehicleVar(manager.NodeToIndex(K + i)).RemoveValues(disallowed)
+
+    # Optional jobs with drop penalty
+    for i in range(I):
+        routing.AddDisjunction([manager.NodeToIndex(K + i)], data.drop_penalty)
+
+    return manager, routing, time_dim
+
+
+class PlateauStop:
+    """
+    Ends a search once its objective has not improved for `window` seconds.
+    Improvements are tracked by an at-solution callback and checked by a custom
+    search limit; the clock starts at the first solution, so a search that is still
+    looking for one is not cut short. Keep the instance alive for the search.
+    The model holds the callbacks, so the instance refers to it weakly: a strong
+    reference would make a cycle through C++ that keeps both alive for good.
+    """
+    __slots__ = ('routing', 'window', 'best', 'improved_at', 'stopped', '_limit')
+
+    def __init__(self, routing: pywrapcp.RoutingModel, window: float):
+        self.routing = weakref.ref(routing)
+        self.window = window
+        self.best = None
+        self.improved_at = None
+        self.stopped = False
+        routing.AddAtSolutionCallback(self._at_solution)
+        self._limit = routing.solver().CustomLimit(self._plateaued)
+        routing.AddSearchMonitor(self._limit)
+
+    def _at_solution(self):
+        objective = self.routing().CostVar().Value()
+        if self.best is None or objective < self.best:
+            self.best = objective
+            self.improved_at = time.monotonic()
+
+    def _plateaued(self) -> bool:
+        if self.improved_at is not None and time.monotonic() - self.improved_at > self.window:
+            self.stopped = True
+        return self.stopped
+
+
+class ProgressMonitor:
+    """
+    Reports improving solutions while a search runs and lets the caller end it early.
+
+    `on_solution(objective, served)` is called at the first solution and then at
+    improving solutions at most once per `interval` seconds (counting served requests
+    walks every request node). `should_finish()` is polled by a custom search limit at
+    most once per `interval`; once it has returned True the search ends at the first
+    check after a solution exists, keeping the best one. Keep the instance alive for
+    the search. Like PlateauStop, it refers to the model weakly.
+    """
+    __slots__ = ('routing', 'manager', 'data', 'on_solution', 'should_finish', 'interval',
+                 'best', 'finished', '_published_at', '_polled_at', '_limit')
+
+    def __init__(self, routing: pywrapcp.RoutingModel, manager: pywrapcp.RoutingIndexManager, data: RoutingData,
+                 on_solution: Optional[Callable[[int, int], None]] = None,
+                 should_finish: Optional[Callable[[], bool]] = None, interval: float = 0.5):
+        self.routing = weakref.ref(routing)
+        self.manager = manager
+        self.data = data
+        self.on_solution = on_solution
+        self.should_finish = should_finish
+        self.interval = interval
+        self.best = None
+        self.finished = False
+        self._published_at = None
+        self._polled_at = 0.0
+        self._limit = None
+        routing.AddAtSolutionCallback(self._at_solution)
+        if should_finish is not None:
+            self._limit = routing.solver().CustomLimit(self._finish_requested)
+            routing.AddSearchMonitor(self._limit)
+
+    def served(self) -> int:
+        """Requests visited by the current solution (dropped ones loop on themselves)"""
+        routing, manager, K = self.routing(), self.manager, self.data.K
+        served = 0
+        for node in range(K, K + self.data.I):
+            index = manager.NodeToIndex(node)
+            if routing.NextVar(index).Value() != index:
+                served += 1
+        return served
+
+    def _at_solution(self):
+        objective = self.routing().CostVar().Value()
+        if self.best is not None and objective >= self.best:
+            return
+        self.best = objective
+        if self.on_solution is None:
+            return
+        now = time.monotonic()
+        if self._published_at is None or now - self._published_at >= self.interval:
+            self._published_at = now
+            self.on_solution(objective, self.served())
+
+    def _finish_requested(self) -> bool:
+        now = time.monotonic()
+        if not self.finished and now - self._polled_at >= self.interval:
+            self._polled_at = now
+            self.finished = bool(self.should_finish())
+        return self.finished and self.best is not None
+
+
+def search_parameters(first_solution_strategy: int, metaheuristic: int, time_limit: float):
+    params = pywrapcp.DefaultRoutingSearchParameters()
+    params.first_solution_strategy = first_solution_strategy
+    params.local_search_metaheuristic = metaheuristic
+    params.time_limit.FromMilliseconds(int(time_limit * 1000))
+    return params
+
+
+def strategy_name(first_solution_strategy: int, metaheuristic: Optional[int] = None) -> str:
+    name = routing_enums_pb2.FirstSolutionStrategy.Value.Name(first_solution_strategy)
+    if metaheuristic is not None:
+        name += '+' + routing_enums_pb2.LocalSearchMetaheuristic.Value.Name(metaheuristic)
+    return name
+
+
+def read_routes(data: RoutingData, manager, routing, time_dim, solution) -> Tuple[List[List[int]], np.ndarray]:
+    """
+    Routes of a solution as request positions per technician, in visiting order,
+    and each request's start minute (-1 where dropped)
+    """
+    K = data.K
+    routes = []
+    starts = np.full(data.I, -1, dtype=np.int64)
+    for k in range(K):
+        route = []
+        idx = solution.Value(routing.NextVar(routing.Start(k)))
+        while not routing.IsEnd(idx):
+            i = manager.IndexToNode(idx) - K
+            route.append(i)
+            starts[i] = solution.Value(time_dim.CumulVar(idx))
+            idx = solution.Value(routing.NextVar(idx))
+        routes.append(route)
+    return routes, starts
@@ -1,3 +1,96 @@
+import io
+
 from django.db import models
+from django.contrib.auth import get_user_model
+
+from routing.snapshot import SolverSnapshot
+
+User = get_user_model()
+
+
+class SolveJob(models.Model):
+    """Background OR-Tools assignment run for one date"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+    
+    assigned_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='solve_jobs')
+    warm_start = models.BooleanField(default=False, help_text="Re-plan the persisted plan for the date, starting from its routes")
+    progress = models.CharField(max_length=200, blank=True, help_text="Current phase of the run")
+    cancel_requested = models.BooleanField(default=False)
+    accept_requested = models.BooleanField(default=False, help_text="End the search early and save the best plan found so far")
+    result = models.JSONField(null=True, blank=True, help_text="Summary of saved assignments and unserved requests")
+    error = models.TextField(blank=True)
+    result_reported = models.BooleanField(default=False, help_text="Result messages already shown to the admin")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the process running the job")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Solve job #{self.pk} for {self.assigned_date} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+
+class SolutionPoint(models.Model):
+    """
+    Improving solution reported while a job's search runs (its convergence curve).
+    Parallel sub-problems report separately, by `part`.
+    """
+    job = models.ForeignKey(SolveJob, on_delete=models.CASCADE, related_name='solution_points')
+    part = models.IntegerField(default=0)
+    elapsed_seconds = models.FloatField(help_text="Seconds since the job started")
+    objective = models.BigIntegerField()
+    served_count = models.IntegerField()
+    
+    class Meta:
+        ordering = ['elapsed_seconds']
+    
+    def __str__(self):
+        return f"Job #{self.job_id} part {self.part} at {self.elapsed_seconds:.1f}s: {self.objective}"
+
 
-# Create your models here.
+class SolveRun(models.Model):
+    """
+    History record of one solver run: parameters, SolveReport timings, result and
+    unserved diagnostics, plus the solver input as a compressed .npz snapshot
+    (see SolverSnapshot.save) so the run can be replayed without the database.
+    """
+    job = models.OneToOneField(SolveJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='run')
+    assigned_date = models.DateField()
+    parameters = models.JSONField(default=dict, help_text="Solver settings the run used")
+    report = models.JSONField(default=dict, help_text="Phase timings, model sizes and memory (SolveReport)")
+    wall_seconds = models.FloatField(default=0.0)
+    cpu_seconds = models.FloatField(default=0.0)
+    objective = models.FloatField(null=True, blank=True)
+    request_count = models.IntegerField(default=0)
+    assigned_count = models.IntegerField(default=0)
+    unserved_count = models.IntegerField(default=0)
+    total_travel = models.FloatField(default=0.0)
+    unserved = models.JSONField(default=list, blank=True, help_text="Unserved requests with reasons")
+    snapshot = models.BinaryField(editable=False, help_text="Compressed solver input arrays (.npz)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['assigned_date', '-created_at'])]
+    
+    def __str__(self):
+        return f"Solve run #{self.pk} for {self.assigned_date}"
+    
+    def load_snapshot(self):
+        """The SolverSnapshot this run solved"""
+        return SolverSnapshot.from_file(io.BytesIO(bytes(self.snapshot)))
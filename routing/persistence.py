@@ -0,0 +1,148 @@
+"""
+Persistence of solver output as Assignment rows
+"""
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Assignment, ServiceRequest
+
+ASSIGNMENT_FIELDS = ['technician', 'sequence_order', 'planned_start', 'planned_finish',
+                     'travel_time_minutes', 'status', 'updated_at']
+
+
+def _tech_name(technician) -> str:
+    if technician and technician.user:
+        return technician.user.username
+    return 'Unassigned'
+
+
+def _changed_fields(row: Assignment, assignment_data: Dict) -> List[str]:
+    """Names of the planned fields on which `row` differs from the solver's assignment"""
+    changed = []
+    if row.technician_id != assignment_data['technician'].pk:
+        changed.append('technician')
+    if row.sequence_order != assignment_data['sequence_order']:
+        changed.append('sequence_order')
+    if row.planned_start != assignment_data['planned_start']:
+        changed.append('planned_start')
+    if row.planned_finish != assignment_data['planned_finish']:
+        changed.append('planned_finish')
+    if abs(row.travel_time_minutes - assignment_data.get('travel_time', 0.0)) > 1e-6:
+        changed.append('travel_time_minutes')
+    if row.status != 'assigned':
+        changed.append('status')
+    return changed
+
+
+def _change_entry(action: str, service_request, technician, planned_start, fields=None, previous=None) -> Dict:
+    """JSON-friendly changeset line for the assign page"""
+    entry = {
+        'action': action,
+        'request_name': service_request.name,
+        'technician': _tech_name(technician),
+        'planned_start': timezone.localtime(planned_start).strftime('%H:%M') if planned_start else 'N/A',
+    }
+    if fields:
+        entry['fields'] = fields
+    if previous:
+        entry['previous'] = previous
+    return entry
+
+
+def commit_plan(assignments_data: List[Dict], assigned_date, released_request_ids: List[int] = ()) -> Dict:
+    """
+    Write the solver's plan for `assigned_date` as the minimal set of Assignment changes.
+
+    The plan is diffed against the current rows for its requests: new requests are
+    inserted, rows whose technician, sequence, times or status differ are updated, and
+    identical rows are left untouched (no write, no updated_at churn). Planned
+    ('assigned') rows of `released_request_ids` are deleted, returning those requests
+    to pending. Everything happens in one transaction.
+
+    bulk_create / bulk_update and the raw delete bypass the Assignment post_save and
+    post_delete signals; their side effects (request status -> 'assigned', and back
+    to 'pending' once a request has no assignments left) are applied with single
+    queryset updates instead.
+
+    Returns the changeset: counts plus one entry per inserted, updated or deleted row.
+    """
+    now = timezone.now()
+    request_ids = [item['service_request'].pk for item in assignments_data]
+    changes = []
+    
+    with transaction.atomic():
+        existing = {
+            row.service_request_id: row
+            for row in Assignment.objects.select_for_update().filter(
+                service_request_id__in=request_ids, assigned_date=assigned_date
+            ).select_related('technician__user')
+        }
+        
+        to_create = []
+        to_update = []
+        unchanged_count = 0
+        for assignment_data in assignments_data:
+            service_request = assignment_data['service_request']
+            row = existing.get(service_request.pk)
+            if row is None:
+                row = Assignment(service_request=service_request, assigned_date=assigned_date)
+                to_create.append(row)
+                changes.append(_change_entry(
+                    'created', service_request, assignment_data['technician'], assignment_data['planned_start']
+                ))
+            else:
+                fields = _changed_fields(row, assignment_data)
+                if not fields:
+                    unchanged_count += 1
+                    continue
+                to_update.append(row)
+                previous = {
+                    'technician': _tech_name(row.technician),
+                    'sequence_order': row.sequence_order,
+                    'planned_start': timezone.localtime(row.planned_start).strftime('%H:%M') if row.planned_start else 'N/A',
+                }
+                changes.append(_change_entry(
+                    'updated', service_request, assignment_data['technician'], assignment_data['planned_start'],
+                    fields=fields, previous=previous,
+                ))
+            row.technician = assignment_data['technician']
+            row.sequence_order = assignment_data['sequence_order']
+            row.planned_start = assignment_data['planned_start']
+            row.planned_finish = assignment_data['planned_finish']
+            row.travel_time_minutes = assignment_data.get('travel_time', 0.0)
+            row.status = 'assigned'
+            row.updated_at = now  # auto_now is not applied by bulk_update
+        
+        Assignment.objects.bulk_create(to_create, batch_size=500)
+        Assignment.objects.bulk_update(to_update, ASSIGNMENT_FIELDS, batch_size=500)
+        
+        # Signal replacement: every planned request is now assigned
+        ServiceRequest.objects.filter(pk__in=request_ids).exclude(status='assigned').update(
+            status='assigned', updated_at=now
+        )
+        
+        released = list(Assignment.objects.filter(
+            service_request_id__in=released_request_ids, assigned_date=assigned_date, status='assigned'
+        ).select_related('service_request', 'technician__user')) if released_request_ids else []
+        for row in released:
+            changes.append(_change_entry('deleted', row.service_request, row.technician, row.planned_start))
+        if released:
+            # Nothing references assignments, so one DELETE without per-row signals is enough
+            Assignment.objects.filter(pk__in=[row.pk for row in released])._raw_delete(Assignment.objects.db)
+            # Signal replacement: requests left without any assignment are pending again
+            ServiceRequest.objects.filter(
+                pk__in=[row.service_request_id for row in released], status__in=['assigned', 'in_progress']
+            ).exclude(assignments__isnull=False).update(status='pending', updated_at=now)
+    
+    for assignment_data in assignments_data:
+        assignment_data['service_request'].status = 'assigned'
+    
+    return {
+        'created_count': len(to_create),
+        'updated_count': len(to_update),
+        'deleted_count': len(released),
+        'unchanged_count': unchanged_count,
+        'changes': changes,
+    }
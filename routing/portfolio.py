@@ -0,0 +1,176 @@
+"""
+Strategy portfolio: several OR-Tools search configurations solving one model at once
+"""
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from ortools.constraint_solver import routing_enums_pb2
+
+from routing.model import PlateauStop, ProgressMonitor, RoutingData, build_model, read_routes, search_parameters, strategy_name
+
+FirstSolution = routing_enums_pb2.FirstSolutionStrategy
+Metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic
+
+logger = logging.getLogger(__name__)
+
+# (first solution strategy, metaheuristic), in the order they are given workers
+PORTFOLIO = [
+    (FirstSolution.PATH_CHEAPEST_ARC, Metaheuristic.TABU_SEARCH),
+    (FirstSolution.PATH_MOST_CONSTRAINED_ARC, Metaheuristic.GUIDED_LOCAL_SEARCH),
+    (FirstSolution.PARALLEL_CHEAPEST_INSERTION, Metaheuristic.SIMULATED_ANNEALING),
+    (FirstSolution.SAVINGS, Metaheuristic.GUIDED_LOCAL_SEARCH),
+    (FirstSolution.LOCAL_CHEAPEST_INSERTION, Metaheuristic.TABU_SEARCH),
+    (FirstSolution.PATH_CHEAPEST_ARC, Metaheuristic.SIMULATED_ANNEALING),
+]
+
+
+# Set in pool workers by _init_member when the caller follows progress
+_solutions = None
+_finish = None
+
+
+def _init_member(solutions, finish):
+    """Pool initializer: queue for improving solutions and event asking members to finish"""
+    global _solutions, _finish
+    _solutions, _finish = solutions, finish
+
+
+def _solve_member(shm_name: str, shape: Tuple[int, int], data: RoutingData, first_solution_strategy: int,
+                  metaheuristic: int, time_limit: float, plateau: Optional[float] = None,
+                  initial_routes: Optional[List[List[int]]] = None) -> Optional[Dict]:
+    """
+    Pool entry point: build the model from the shared transit matrix and search it
+    with one configuration, from `initial_routes` when the model accepts them.
+    Returns the solution's routes, or None if none was found.
+    """
+    cpu_start = time.process_time()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data.transit = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+        manager, routing, time_dim = build_model(data)
+        data.transit = None  # The model holds its own copy; release the view before closing
+    finally:
+        shm.close()
+
+    label = strategy_name(first_solution_strategy, metaheuristic)
+    plateau_stop = PlateauStop(routing, plateau) if plateau else None
+    monitor = None
+    if _solutions is not None:
+        monitor = ProgressMonitor(routing, manager, data,
+                                  on_solution=lambda objective, served: _solutions.put((label, objective, served)),
+                                  should_finish=_finish.is_set)
+    params = search_parameters(first_solution_strategy, metaheuristic, time_limit)
+    solution = None
+    if initial_routes:
+        routing.CloseModelWithParameters(params)
+        initial = routing.ReadAssignmentFromRoutes([[data.K + i for i in route] for route in initial_routes], True)
+        if initial is not None:
+            solution = routing.SolveFromAssignmentWithParameters(initial, params)
+    if solution is None:
+        solution = routing.SolveWithParameters(params)
+    if not solution:
+        return None
+    routes, starts = read_routes(data, manager, routing, time_dim, solution)
+    return {
+        'label': label,
+        'objective': solution.ObjectiveValue(),
+        'routes': routes,
+        'starts': starts,
+        'cpu': time.process_time() - cpu_start,
+        'plateaued': plateau_stop is not None and plateau_stop.stopped,
+        'finished_early': monitor is not None and monitor.finished,
+    }
+
+
+def solve_portfolio(data: RoutingData, time_limit: float, workers: int,
+                    members: List[Tuple[int, int]] = PORTFOLIO, plateau: Optional[float] = None,
+                    initial_routes: Optional[List[List[int]]] = None,
+                    should_stop: Optional[Callable[[], bool]] = None,
+                    on_solution: Optional[Callable[[int, int], None]] = None,
+                    should_finish: Optional[Callable[[], bool]] = None) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Search `data` with the first `workers` portfolio members at once, one process
+    each, every member with the full `time_limit` (ending early after `plateau`
+    seconds without improvement, see PlateauStop). The transit matrix is placed in
+    shared memory once instead of being pickled to every worker; that saves the
+    transfer only, as each member still copies it into its model (OR-Tools takes
+    the matrix as nested lists).
+
+    Members start from `initial_routes` (a warm start's plan or the greedy plan)
+    when given. Searches from one start that share a metaheuristic would repeat
+    each other, so only the first member of each metaheuristic does; the others
+    build their own first solution.
+
+    Members still running a few seconds past the limit (model building included)
+    are terminated, as are all members when `should_stop` returns True (then
+    `stopped` is set on the returned best). Members send their improving solutions
+    here; `on_solution(objective, served)` is called for those that improve on all
+    members so far. Once `should_finish` returns True, members end their searches as
+    soon as they have a solution (see ProgressMonitor). Returns (best result by
+    objective, all results); best is None when no member found a solution.
+    """
+    members = members[:max(1, workers)]
+    transit = np.ascontiguousarray(data.transit, dtype=np.int64)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, transit.nbytes))
+    shared = RoutingData(None, data.tw_start, data.tw_end, data.demands, data.capacities, data.allowed,
+                         data.drop_penalty, data.horizon)
+    context = multiprocessing.get_context('spawn')
+    follow = on_solution is not None or should_finish is not None
+    solutions = context.Queue() if follow else None
+    finish = context.Event() if follow else None
+    pool = context.Pool(len(members), initializer=_init_member, initargs=(solutions, finish))
+    try:
+        np.ndarray(transit.shape, dtype=np.int64, buffer=shm.buf)[:] = transit
+        pending = []
+        started_from_routes = set()
+        for first_solution, metaheuristic in members:
+            start = initial_routes if metaheuristic not in started_from_routes else None
+            started_from_routes.add(metaheuristic)
+            pending.append(pool.apply_async(_solve_member, (shm.name, transit.shape, shared, first_solution,
+                                                            metaheuristic, time_limit, plateau, start)))
+        deadline = time.monotonic() + time_limit + max(5.0, time_limit / 2)
+        results = []
+        stopped = False
+        best_objective = None
+        while pending and time.monotonic() < deadline:
+            if should_stop is not None and should_stop():
+                stopped = True
+                break
+            if should_finish is not None and not finish.is_set() and should_finish():
+                finish.set()
+            pending[0].wait(timeout=0.5)
+            while follow:
+                try:
+                    _, objective, served = solutions.get_nowait()
+                except queue.Empty:
+                    break
+                if best_objective is None or objective < best_objective:
+                    best_objective = objective
+                    if on_solution is not None:
+                        on_solution(objective, served)
+            for result in [r for r in pending if r.ready()]:
+                pending.remove(result)
+                try:
+                    solved = result.get()
+                except Exception:
+                    logger.exception("Portfolio member failed")
+                    continue
+                if solved is not None:
+                    results.append(solved)
+    finally:
+        pool.terminate()
+        pool.join()
+        if follow:
+            solutions.close()
+        shm.close()
+        shm.unlink()
+
+    best = min(results, key=lambda r: r['objective'], default=None)
+    if stopped:
+        best = dict(best or {}, stopped=True)
+    return best, results
@@ -0,0 +1,166 @@
+"""
+Per-phase timings and model metrics of one solve
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB (None where unsupported)"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class SolveReport:
+    """
+    What a solve spent its time on and what it produced.
+
+    `phases` maps a phase name ('snapshot_load', 'matrix', 'model_build',
+    'search:<strategy>', 'extraction', 'pool_startup') to its wall and CPU seconds.
+    Reports of the sub-problems of a decomposed solve are folded in with `absorb`:
+    phase times and model sizes add up (so phase wall times of parallel parts
+    overlap), peak RSS is the largest of the processes involved.
+    `wall_seconds` is the elapsed time from creation to `finish()`; the per-phase
+    sums are `phase_wall_seconds` and `cpu_seconds`.
+    """
+    __slots__ = ('phases', 'nodes', 'vehicles', 'arcs', 'requests', 'assigned_count',
+                 'dropped_count', 'objective', 'strategy', 'time_limit', 'peak_rss_kb', 'parts', 'elapsed',
+                 '_started', '_mark')
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.nodes = 0
+        self.vehicles = 0
+        self.arcs = 0
+        self.requests = 0
+        self.assigned_count = 0
+        self.dropped_count = 0
+        self.objective = None
+        self.strategy = None
+        self.time_limit = None
+        self.peak_rss_kb = None
+        self.parts = 1
+        self.elapsed: Optional[float] = None
+        self._started = time.perf_counter()
+        self._mark = (self._started, time.process_time())
+
+    def __repr__(self):
+        return (f"<SolveReport {self.assigned_count}/{self.requests} assigned, "
+                f"objective={self.objective}, wall={self.wall_seconds:.3f}s>")
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as phase `name` (repeated phases accumulate)"""
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter(), time.process_time()
+            self.add_phase(name, wall - wall_start, cpu - cpu_start)
+            self._mark = (wall, cpu)
+
+    def lap(self, name: str) -> None:
+        """Charge the time since the previous phase or lap (or since creation) to phase `name`"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.add_phase(name, wall - self._mark[0], cpu - self._mark[1])
+        self._mark = (wall, cpu)
+
+    def add_phase(self, name: str, wall: float, cpu: float) -> None:
+        timing = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+        timing['wall'] += wall
+        timing['cpu'] += cpu
+
+    @property
+    def wall_seconds(self) -> float:
+        """Elapsed seconds from creation to finish() (so far, before it)"""
+        if self.elapsed is not None:
+            return self.elapsed
+        return time.perf_counter() - self._started
+
+    @property
+    def phase_wall_seconds(self) -> float:
+        return sum(timing['wall'] for timing in self.phases.values())
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(timing['cpu'] for timing in self.phases.values())
+
+    def finish(self) -> 'SolveReport':
+        """Record the elapsed time and the peak memory of this process; call at the end of a solve"""
+        self.elapsed = time.perf_counter() - self._started
+        rss = peak_rss_kb()
+        if rss is not None:
+            self.peak_rss_kb = max(self.peak_rss_kb or 0, rss)
+        return self
+
+    def absorb(self, other: 'SolveReport', model: bool = True) -> None:
+        """
+        Add the phase times and peak memory of a sub-problem's report to this one and,
+        with `model`, its model sizes. Results (counts, objective) are left to the caller,
+        and the elapsed time stays this report's own.
+        """
+        for name, timing in other.phases.items():
+            self.add_phase(name, timing['wall'], timing['cpu'])
+        if other.peak_rss_kb is not None:
+            self.peak_rss_kb = max(self.peak_rss_kb or 0, other.peak_rss_kb)
+        if model:
+            self.nodes += other.nodes
+            self.vehicles += other.vehicles
+            self.arcs += other.arcs
+            self.strategy = self.strategy or other.strategy
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly form, as persisted on SolveRun.report"""
+        return {
+            'phases': {name: {'wall': round(t['wall'], 4), 'cpu': round(t['cpu'], 4)}
+                       for name, t in self.phases.items()},
+            'wall_seconds': round(self.wall_seconds, 4),
+            'phase_wall_seconds': round(self.phase_wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'nodes': self.nodes,
+            'vehicles': self.vehicles,
+            'arcs': self.arcs,
+            'requests': self.requests,
+            'assigned_count': self.assigned_count,
+            'dropped_count': self.dropped_count,
+            'objective': self.objective,
+            'strategy': self.strategy,
+            'time_limit': self.time_limit,
+            'peak_rss_kb': self.peak_rss_kb,
+            'parts': self.parts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SolveReport':
+        report = cls()
+        for name, timing in data.get('phases', {}).items():
+            report.add_phase(name, timing['wall'], timing['cpu'])
+        report.elapsed = data.get('wall_seconds')
+        for field in ('nodes', 'vehicles', 'arcs', 'requests', 'assigned_count', 'dropped_count',
+                      'objective', 'strategy', 'time_limit', 'peak_rss_kb', 'parts'):
+            if field in data:
+                setattr(report, field, data[field])
+        return report
+
+    def format(self) -> str:
+        """Human-readable multi-line summary (management commands, logs)"""
+        lines = [
+            f"Model: {self.nodes} nodes, {self.vehicles} vehicles, {self.arcs} arcs"
+            + (f" in {self.parts} parts" if self.parts > 1 else ""),
+            f"Result: {self.assigned_count} assigned, {self.dropped_count} dropped, objective {self.objective}"
+            + (f" ({self.strategy})" if self.strategy else ""),
+        ]
+        for name, timing in self.phases.items():
+            lines.append(f"  {name:<32} wall {timing['wall']:8.3f}s  cpu {timing['cpu']:8.3f}s")
+        lines.append(f"  {'phases total':<32} wall {self.phase_wall_seconds:8.3f}s  cpu {self.cpu_seconds:8.3f}s")
+        lines.append(f"  {'elapsed':<32} wall {self.wall_seconds:8.3f}s")
+        if self.peak_rss_kb is not None:
+            lines.append(f"Peak RSS: {self.peak_rss_kb / 1024:.1f} MiB")
+        return "\n".join(lines)
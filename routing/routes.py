@@ -0,0 +1,177 @@
+"""
+Plans as route arrays: padded node sequences, their timing, and vectorized
+insertion pricing, shared by the NumPy heuristics
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from routing.model import RoutingData
+
+
+class Plan:
+    """
+    Result of a search backend or heuristic: request positions per technician in
+    visiting order, each request's start minute (-1 where not served), and the
+    routing model's objective for the plan (arc costs plus drop penalties)
+    """
+    __slots__ = ('routes', 'starts', 'objective')
+
+    def __init__(self, routes: List[List[int]], starts: np.ndarray, objective: int):
+        self.routes = routes
+        self.starts = starts
+        self.objective = objective
+
+    def __repr__(self):
+        return f"<Plan {self.served} served, objective={self.objective}>"
+
+    @property
+    def served(self) -> int:
+        return sum(len(route) for route in self.routes)
+
+
+def route_nodes(data: RoutingData, routes: List[List[int]], vehicles: np.ndarray) -> np.ndarray:
+    """
+    Node sequences of the routes of `vehicles`, depot to depot, as one array padded
+    with further depot visits (zero-cost arcs) to the longest route
+    """
+    width = max((len(routes[k]) for k in vehicles), default=0) + 2
+    nodes = np.repeat(vehicles[:, None], width, axis=1)
+    for row, k in enumerate(vehicles.tolist()):
+        if routes[k]:
+            nodes[row, 1:len(routes[k]) + 1] = np.asarray(routes[k]) + data.K
+    return nodes
+
+
+def insertion_costs(data: RoutingData, vehicles: np.ndarray, nodes: np.ndarray, lengths: np.ndarray,
+                    loads: np.ndarray, jobs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cheapest feasible insertion of each of `jobs` (request positions) into each route
+    of `vehicles` (`nodes` from route_nodes, route lengths and loads per vehicle).
+
+    The Time dimension has no slack: once a route's start time s is chosen, every
+    visit happens at s plus the transit times before it. A route is feasible when some
+    s satisfies every window (and the return by the horizon), so insertion only has to
+    keep that interval of start times non-empty, which prefix and suffix bounds of the
+    windows give for every position at once. Skills and availability (`allowed`) and
+    capacities are checked too.
+    Returns: added cost (inf where infeasible) and best position, both (jobs, vehicles)
+    """
+    T, K = data.transit, data.K
+    a, b = nodes[:, :-1], nodes[:, 1:]
+    arc = T[a, b]
+    offsets = np.concatenate([np.zeros((len(vehicles), 1), dtype=arc.dtype), np.cumsum(arc, axis=1)], axis=1)
+    total = offsets[:, -1]
+
+    # Start times allowed by the visits before / after each insertion position
+    # (padding depot visits after the route end impose nothing)
+    position = np.arange(a.shape[1])
+    real = position[None, :] <= lengths[:, None]
+    early = np.where(real, data.tw_start[a] - offsets[:, :-1], -np.inf)
+    late = np.where(real, data.tw_end[a] - offsets[:, :-1], np.inf)
+    before_lo = np.maximum.accumulate(early, axis=1)
+    before_hi = np.minimum.accumulate(late, axis=1)
+    after_lo = np.concatenate([np.maximum.accumulate(early[:, :0:-1], axis=1)[:, ::-1],
+                               np.full((len(vehicles), 1), -np.inf)], axis=1)
+    after_hi = np.concatenate([np.minimum.accumulate(late[:, :0:-1], axis=1)[:, ::-1],
+                               np.full((len(vehicles), 1), np.inf)], axis=1)
+
+    job_nodes = (K + jobs)[:, None, None]
+    to_job = T[a[None], job_nodes]  # (jobs, vehicles, positions)
+    delta = to_job + T[job_nodes, b[None]] - arc[None]
+    job_offset = offsets[None, :, :-1] + to_job
+    lo = np.maximum(np.maximum(before_lo[None], data.tw_start[job_nodes] - job_offset), after_lo[None] - delta)
+    hi = np.minimum(np.minimum(before_hi[None], data.tw_end[job_nodes] - job_offset), after_hi[None] - delta)
+    feasible = (lo <= hi) & (lo + total[None, :, None] + delta <= data.horizon) & real[None]
+    feasible &= (data.allowed[np.ix_(jobs, vehicles)]
+                 & (loads[None, :] + data.demands[K + jobs][:, None] <= np.asarray(data.capacities)[vehicles][None, :])
+                 )[:, :, None]
+    cost = np.where(feasible, delta, np.inf)
+    best = cost.argmin(axis=2)
+    return np.take_along_axis(cost, best[:, :, None], axis=2)[:, :, 0], best
+
+
+def route_timing(data: RoutingData, k: int, route: List[int]) -> Optional[Tuple[int, int, np.ndarray]]:
+    """
+    Start times technician k's route (request positions) can leave the depot at, as
+    the model times it: every visit at the start plus the transit before it.
+    Returns: (earliest start, latest start, offsets of each node of the route from
+    the start, depot to depot), or None when a route breaks a window, the horizon,
+    the technician's capacity or eligibility
+    """
+    K, T = data.K, data.transit
+    jobs = np.asarray(route, dtype=np.int64)
+    if not data.allowed[jobs, k].all() or data.demands[K + jobs].sum() > data.capacities[k]:
+        return None
+    nodes = np.concatenate([[k], K + jobs, [k]])
+    offsets = np.concatenate([[0], np.cumsum(T[nodes[:-1], nodes[1:]])])
+    earliest = int(np.max(data.tw_start[nodes[:-1]] - offsets[:-1]))
+    latest = min(int(np.min(data.tw_end[nodes[:-1]] - offsets[:-1])), data.horizon - int(offsets[-1]))
+    if earliest > latest:
+        return None
+    return earliest, latest, offsets
+
+
+def insertions_after_fixed_visits(data: RoutingData, k: int, route: List[int], starts: np.ndarray,
+                                  job: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Insertion of request `job` at every position of technician k's planned route
+    (request positions, visited at minute `starts`), keeping the visits before the
+    position where they are. As in the model there is no waiting: the job starts on
+    arrival from the previous visit (in first position, when leaving the depot
+    within the shift lets the first visit stay put, or as close to that as the
+    windows allow) and the later visits follow it back to back.
+    Returns: the job's start per position (n+1,), every visit's start per position
+    (n+1, n), and which positions keep all windows and the horizon
+    """
+    K, T = data.K, data.transit
+    x = K + job
+    n = len(route)
+    nodes = np.concatenate([[k], K + np.asarray(route, dtype=np.int64), [k]])
+    starts = np.asarray(starts, dtype=np.int64)
+    visits = nodes[1:-1]
+    # Offsets of the visits and of the return from the first visit, back to back
+    chain = np.concatenate([[0], np.cumsum(T[visits, nodes[2:]])])
+
+    # Start times of the moved chain allowed by the visits from each position on
+    after_lo = np.append(np.maximum.accumulate((data.tw_start[visits] - chain[:-1])[::-1])[::-1], -np.inf)
+    after_hi = np.minimum(
+        np.append(np.minimum.accumulate((data.tw_end[visits] - chain[:-1])[::-1])[::-1], np.inf),
+        data.horizon - chain[-1],
+    )
+    to_next = T[x, nodes[1:]]
+
+    job_start = np.empty(n + 1, dtype=np.int64)
+    job_start[1:] = starts + T[visits, x]
+    lo = max(data.tw_start[x], data.tw_start[k] + T[k, x], after_lo[0] - to_next[0])
+    hi = min(data.tw_end[x], data.tw_end[k] + T[k, x], after_hi[0] - to_next[0])
+    target = starts[0] - to_next[0] if n else lo
+    job_start[0] = min(max(target, lo), hi)
+
+    # Visits from the position on start at base + chain
+    base = job_start + to_next - chain
+    feasible = (job_start >= data.tw_start[x]) & (job_start <= data.tw_end[x]) & (base >= after_lo) & (base <= after_hi)
+    feasible[0] &= lo <= hi
+    moved = np.arange(n)[None, :] >= np.arange(n + 1)[:, None]
+    new_starts = np.where(moved, base[:, None] + chain[None, :-1], starts[None, :])
+    return job_start, new_starts, feasible
+
+
+def plan_from_routes(data: RoutingData, routes: List[List[int]]) -> Optional[Plan]:
+    """
+    Plan of the given routes, each starting as early as it can; None when a route
+    breaks a window, the horizon, its technician's capacity or eligibility
+    """
+    starts = np.full(data.I, -1, dtype=np.int64)
+    objective = 0
+    for k, route in enumerate(routes):
+        if not route:
+            continue
+        timing = route_timing(data, k, route)
+        if timing is None:
+            return None
+        start, _, offsets = timing
+        starts[route] = start + offsets[1:-1]
+        objective += int(offsets[-1])
+    served = sum(len(route) for route in routes)
+    return Plan(routes, starts, objective + (data.I - served) * data.drop_penalty)
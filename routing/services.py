@@ -1,19 +1,114 @@
 import re
+import os
+import logging
+import pickle
 import hashlib
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
-from ortools.constraint_solver import pywrapcp
-from ortools.constraint_solver import routing_enums_pb2
+from typing import Callable, List, Dict, Tuple, Optional
+import django
+import numpy as np
+from django.conf import settings
+from django.db import transaction
 from core.models import Technician, ServiceRequest, Assignment, GoogleMapsConfig
-from maps.services import GeocodingService, DistanceService
+from maps.services import DistanceService
+from routing.snapshot import SolverSnapshot
+from routing.eligibility import EligibilityMatrix
+from routing.decomposition import geographic_partition, refine, skill_partition, technician_partition
+from routing.report import SolveReport
+from routing.model import RoutingData
+from routing.construction import construct_routes
+from routing.routes import insertions_after_fixed_visits
+from routing.backends import SolveCancelled, get_backend, portfolio_workers
+
+logger = logging.getLogger(__name__)
+
+# Adaptive search budget: seconds for any instance plus seconds per request,
+# capped by the configured time limit
+BUDGET_BASE_SECONDS = 0.5
+BUDGET_SECONDS_PER_REQUEST = 0.05
+# Shortest search of a decomposed solve's part, and of a single technician's route
+PART_MIN_SECONDS = 0.5
+ROUTE_MIN_SECONDS = 0.05
+# Shortest plateau window, and the window as a fraction of the budget
+PLATEAU_MIN_SECONDS = 0.2
+PLATEAU_BUDGET_FRACTION = 0.2
+
+
+def subproblem_workers() -> int:
+    """Number of processes used to solve sub-problems in parallel"""
+    return getattr(settings, 'ROUTING_SUBPROBLEM_WORKERS', None) or os.cpu_count() or 1
+
+
+def decompose_min_requests() -> int:
+    """
+    Smallest day that is solved as sub-problems; smaller ones search one model
+    faster than several parts, each with its own minimum search time
+    """
+    return getattr(settings, 'ROUTING_DECOMPOSE_MIN_REQUESTS', 100)
+
+
+def parallel_min_requests() -> int:
+    """
+    Smallest decomposed day whose sub-problems are solved in a process pool; smaller
+    ones are solved in this process, one after another, since starting the pool
+    (spawning workers and setting up Django in each) takes longer than their searches
+    """
+    return getattr(settings, 'ROUTING_PARALLEL_MIN_REQUESTS', 300)
+
+
+def subproblem_executor(n_parts: int) -> ProcessPoolExecutor:
+    """
+    New process pool for the sub-problems of one decomposed solve. It is not kept
+    between solves: solves usually run inside a solve-job worker process, and
+    such processes hang on exit while a nested pool is still alive.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, min(subproblem_workers(), n_parts)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+def start_workers(executor: ProcessPoolExecutor, n_workers: int) -> None:
+    """
+    Start the pool's worker processes (spawn, django.setup) and wait until they
+    are up, so that their startup can be timed apart from the work sent to them
+    """
+    wait([executor.submit(os.getpid) for _ in range(n_workers)])
+
+
+def _solve_part(config: GoogleMapsConfig, snapshot: SolverSnapshot, time_limit: float,
+                should_stop: Optional[Callable[[], bool]] = None,
+                progress=None, backend: Optional[str] = None) -> Tuple[Tuple[List[Dict], List[Dict], float], SolveReport]:
+    """
+    Pool entry point: solve one sub-problem, returning its result and report. Parts
+    already run in parallel, so they search sequentially rather than as a portfolio.
+    """
+    report = SolveReport()
+    result = RoutingService(config).solve_snapshot(snapshot, should_stop=should_stop, time_limit=time_limit,
+                                                   report=report, portfolio=False, progress=progress,
+                                                   backend=backend)
+    return result, report.finish()
+
+
+def _picklable(obj) -> bool:
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
 
 
 class RoutingService:
     """Service for OR-Tools based job assignment"""
     
-    def __init__(self):
-        self.config = GoogleMapsConfig.load()
-        self.geocoding_service = GeocodingService()
+    def __init__(self, config: Optional[GoogleMapsConfig] = None):
+        """`config` replaces the stored configuration (e.g. an unsaved instance for offline replays)"""
+        self.config = config or GoogleMapsConfig.load()
         self.distance_service = DistanceService()
         self.avg_kph = self.config.avg_speed_kph
     
@@ -27,809 +122,810 @@ class RoutingService:
         return f"#{r:02x}{g:02x}{b:02x}"
     
     def solve(self, technicians: List[Technician], service_requests: List[ServiceRequest],
-              assigned_date: datetime) -> Tuple[List[Dict], List[ServiceRequest], float]:
+              assigned_date: datetime,
+              should_stop: Optional[Callable[[], bool]] = None,
+              geographic: Optional[bool] = None,
+              warm_start: bool = False,
+              snapshot: Optional[SolverSnapshot] = None,
+              report: Optional[SolveReport] = None,
+              progress=None) -> Tuple[List[Dict], List[Dict], float, SolveReport]:
         """
         Solve routing problem using OR-Tools
-        Returns: (assignments, unserved_requests, total_travel_time)
+        Returns: (assignments, unserved_requests, total_travel_time, report)
+        
+        Inputs are loaded into a SolverSnapshot first; assignment and unserved entries
+        are then mapped back to the model instances that were passed in.
+        `should_stop` is polled between phases and at each improving solution; when it
+        returns True the search is finished early and SolveCancelled is raised.
+        `progress` follows the search while it runs (see solve_snapshot).
+        `geographic` overrides the configured geographic decomposition setting.
+        With `warm_start`, the persisted plan for the date is re-planned as well,
+        starting the search from its routes (see SolverSnapshot.load).
+        `snapshot` is used instead of loading one when the caller already has it
+        (e.g. to keep it with the run's history); `report` continues a caller's report.
+        The SolveReport holds per-phase wall/CPU times, model sizes and the result.
+        """
+        if report is None:
+            report = SolveReport()
+        if snapshot is None:
+            with report.phase('snapshot_load'):
+                snapshot = SolverSnapshot.load(technicians, service_requests, assigned_date, warm_start=warm_start)
+        if geographic is None:
+            geographic = self.config.geo_decomposition
+        assignments, unserved, total_travel = self.solve_decomposed(
+            snapshot, should_stop=should_stop, geographic=geographic, report=report, progress=progress
+        )
+        
+        with report.phase('extraction'):
+            tech_by_id = self._instances_by_id(
+                Technician.objects.all(), technicians, {a['technician_id'] for a in assignments}
+            )
+            # Unserved summaries read each request's customer
+            req_by_id = self._instances_by_id(
+                ServiceRequest.objects.select_related('customer'), service_requests,
+                {a['service_request_id'] for a in assignments} | {u['request_id'] for u in unserved}
+            )
+            for assignment in assignments:
+                assignment['technician'] = tech_by_id[assignment['technician_id']]
+                assignment['service_request'] = req_by_id[assignment['service_request_id']]
+            for item in unserved:
+                item['request'] = req_by_id[item['request_id']]
+        
+        report.finish()
+        logger.debug("Solve report:\n%s", report.format())
+        return assignments, unserved, total_travel, report
+    
+    def parameters(self, **overrides) -> Dict:
+        """Settings that shape a solve, as recorded on SolveRun.parameters"""
+        parameters = {
+            'avg_speed_kph': self.avg_kph,
+            'time_limit_seconds': self.config.time_limit_seconds,
+            'drop_penalty_per_job': self.config.drop_penalty_per_job,
+            'geo_decomposition': self.config.geo_decomposition,
+            'region_target_requests': self.config.region_target_requests,
+            'assign_then_sequence': self.config.assign_then_sequence,
+            'solver_backend': self.config.solver_backend,
+            'portfolio_search': self.config.portfolio_search,
+            'adaptive_time_limit': self.config.adaptive_time_limit,
+            'plateau_seconds': self.config.plateau_seconds,
+            'candidate_look_back_days': self.config.candidate_look_back_days,
+            'candidate_look_ahead_days': self.config.candidate_look_ahead_days,
+            'subproblem_workers': subproblem_workers(),
+            'portfolio_workers': portfolio_workers(),
+        }
+        parameters.update(overrides)
+        return parameters
+    
+    def insert_request(self, service_request: ServiceRequest, assigned_date) -> Optional[Dict]:
+        """
+        Insert one pending request into the persisted plan for `assigned_date` at its
+        cheapest feasible position, without re-solving the day.
+        
+        Visits before the chosen position keep their times. As in the routing model
+        there is no waiting between visits (see
+        routing.routes.insertions_after_fixed_visits), so the job starts on arrival
+        and the later visits follow it back to back; they must still fit their
+        windows and stay clear of work in progress, and are re-timed in one bulk
+        update. The job must be eligible as in solve() (skills, shift, free at its
+        window start) and fit the technician's capacity. Existing visits are checked
+        as timed only, so a route holding one its technician could no longer take
+        (e.g. after a skill change) is still used.
+        Returns: the created assignment (as in solve()) plus 'shifted_count', or None
+        when no position is feasible (or the request is not pending with coordinates)
+        """
+        snapshot = SolverSnapshot.load(
+            Technician.objects.filter(is_active=True), [service_request], assigned_date, warm_start=True
+        )
+        new_i = next((i for i, req in enumerate(snapshot.reqs) if req.id == service_request.pk), None)
+        if new_i is None or not snapshot.techs:
+            return None
+        
+        K = snapshot.K
+        job_node = K + new_i
+        travel = self.distance_service.travel_minutes_matrix(snapshot.depot_coords, snapshot.job_coords, self.avg_kph)
+        eligibility = EligibilityMatrix.build(snapshot, travel)
+        busy_index = snapshot.busy_index()
+        window_start = snapshot.job_windows[[new_i], 0]
+        window_finish = window_start + snapshot.service_minutes[[new_i]]
+        free = np.ones((snapshot.I, K), dtype=bool)
+        for k in range(K):
+            if k in busy_index:
+                free[new_i, k] = not busy_index.overlaps_many(k, window_start, window_finish)[0]
+        eligibility.restrict(free)
+        data = RoutingData.from_snapshot(snapshot, travel, eligibility.allowed, self.config.drop_penalty_per_job)
+        
+        routes = snapshot.initial_routes
+        planned_by_request = {pl.service_request_id: pl for pl in snapshot.planned}
+        job_service = int(snapshot.service_minutes[new_i])
+        rint_travel = np.rint(travel).astype(np.int64)
+        best = None
+        for k in np.flatnonzero(eligibility.allowed[new_i]).tolist():
+            route = routes[k]
+            if int(snapshot.service_minutes[route].sum()) + job_service > snapshot.capacities[k]:
+                continue
+            starts = np.array([
+                snapshot.minutes_from_ref(planned_by_request[snapshot.reqs[i].id].planned_start) for i in route
+            ], dtype=np.int64)
+            job_start, new_starts, feasible = insertions_after_fixed_visits(data, k, route, starts, new_i)
+            if k in busy_index:
+                # The job and every visit it moves must stay clear of work in progress
+                service = snapshot.service_minutes[route]
+                moved = busy_index.overlaps_many(k, new_starts, new_starts + service) & (new_starts != starts)
+                feasible &= ~moved.any(axis=1)
+                feasible &= ~busy_index.overlaps_many(k, job_start, job_start + job_service)
+            if not feasible.any():
+                continue
+            nodes = np.concatenate([[k], K + np.asarray(route, dtype=np.int64), [k]])
+            prev, nxt = nodes[:-1], nodes[1:]
+            added = rint_travel[prev, job_node] + rint_travel[job_node, nxt] - rint_travel[prev, nxt]
+            added = np.where(feasible, added, np.iinfo(np.int64).max)
+            p = int(added.argmin())
+            if best is None or added[p] < best[0]:
+                best = (added[p], k, p, int(job_start[p]), new_starts[p])
+        if best is None:
+            return None
+        _, k, p, job_start, new_starts = best
+        
+        route = routes[k]
+        stops = [planned_by_request[snapshot.reqs[i].id] for i in route]
+        if p < len(route):
+            sequence_order = stops[p].sequence_order
+        else:
+            sequence_order = stops[-1].sequence_order + 1 if route else 1
+        prev_node = K + route[p - 1] if p > 0 else k
+        
+        with transaction.atomic():
+            # Visits before the job keep their times; the rest move one place down and back to back after it
+            by_id = Assignment.objects.in_bulk([stop.id for stop in stops[p:]])
+            shifted = [by_id[stop.id] for stop in stops[p:]]
+            for j, assignment in enumerate(shifted, start=p):
+                planned_start = snapshot.earliest + timedelta(minutes=int(new_starts[j]))
+                assignment.planned_finish += planned_start - assignment.planned_start
+                assignment.planned_start = planned_start
+                assignment.sequence_order += 1
+                if j == p:
+                    assignment.travel_time_minutes = float(np.rint(travel[job_node, K + route[p]]))
+            Assignment.objects.bulk_update(
+                shifted, ['planned_start', 'planned_finish', 'sequence_order', 'travel_time_minutes']
+            )
+            
+            planned_start = snapshot.earliest + timedelta(minutes=job_start)
+            technician = Technician.objects.get(pk=snapshot.techs[k].id)
+            assignment = Assignment.objects.create(
+                service_request=service_request,
+                technician=technician,
+                assigned_date=snapshot.assigned_date,
+                sequence_order=sequence_order,
+                planned_start=planned_start,
+                planned_finish=planned_start + timedelta(minutes=job_service),
+                travel_time_minutes=float(np.rint(travel[prev_node, job_node])),
+                status='assigned',
+            )
+        
+        return {
+            'service_request_id': service_request.pk,
+            'technician_id': technician.pk,
+            'assigned_date': snapshot.assigned_date,
+            'sequence_order': sequence_order,
+            'planned_start': assignment.planned_start,
+            'planned_finish': assignment.planned_finish,
+            'travel_time': assignment.travel_time_minutes,
+            'technician': technician,
+            'service_request': service_request,
+            'shifted_count': len(shifted),
+        }
+    
+    @staticmethod
+    def _instances_by_id(queryset, items, ids) -> Dict:
+        """Map ids to the given model instances, fetching any that were passed as pks from `queryset`"""
+        by_id = {item.pk: item for item in items if isinstance(item, queryset.model) and item.pk in ids}
+        missing = ids - by_id.keys()
+        if missing:
+            by_id.update(queryset.in_bulk(missing))
+        return by_id
+    
+    def solve_decomposed(self, snapshot: SolverSnapshot,
+                         should_stop: Optional[Callable[[], bool]] = None,
+                         geographic: bool = False,
+                         report: Optional[SolveReport] = None,
+                         progress=None,
+                         assign_then_sequence: Optional[bool] = None) -> Tuple[List[Dict], List[Dict], float]:
+        """
+        Solve a snapshot as independent sub-problems, one model each.
+        
+        The snapshot is split into skill components, which is exact. With `geographic`,
+        components are further clustered into regions; a request dropped in its region
+        is offered to the nearest region that can serve it, which is re-solved and
+        kept if it then serves more. With `assign_then_sequence` (default: the
+        configured setting), the greedy plan assigns requests to technicians instead,
+        and each route is sequenced on its own by the 'descent' backend (see
+        technician_partition). Its repair re-solves geographic regions of technicians
+        with ALNS, starting from the sequenced routes: the greedy plan already tried
+        every route for the requests it dropped, so placing them means moving others
+        between routes.
+        
+        Days under decompose_min_requests() requests are solved as one model. Parts run
+        in this process below parallel_min_requests() requests, otherwise in a new
+        process pool (its startup timed as phase 'pool_startup'). Each gets a share of
+        the time budget by request count, at least PART_MIN_SECONDS (ROUTE_MIN_SECONDS
+        per route). Part reports are folded into `report`, and part j reports its
+        solutions to `progress.for_part(j)`; the repair pass is skipped once the plan
+        has been accepted.
+        Returns: (assignments, unserved_requests, total_travel_time), keyed by record ids
+        """
+        if report is None:
+            report = SolveReport()
+        if snapshot.I < decompose_min_requests():
+            return self.solve_snapshot(snapshot, should_stop=should_stop, report=report, progress=progress)
+        if assign_then_sequence is None:
+            assign_then_sequence = self.config.assign_then_sequence
+        assign_then_sequence = assign_then_sequence and snapshot.K > 1
+        if assign_then_sequence:
+            snapshot = self._assign(snapshot, should_stop, report)
+        with report.phase('decomposition'):
+            components = skill_partition(snapshot)
+            n_components = components.n_parts
+            partition = components
+            if assign_then_sequence or geographic:
+                partition = refine(
+                    snapshot, components, lambda sub: geographic_partition(sub, self.config.region_target_requests)
+                )
+            # Repair regions: the parts themselves, or for assign-then-sequence the
+            # geographic regions over the per-technician parts
+            regions = partition
+            if assign_then_sequence:
+                partition = technician_partition(snapshot, snapshot.initial_routes, self.avg_kph)
+            parts = partition.parts()
+            region_parts = regions.parts()
+            # Parts (by number) of each region's technicians
+            region_members = [np.unique(partition.tech_labels[tech_idx]).tolist() for tech_idx, _ in region_parts]
+        solvable = [p for p, (_, req_idx) in enumerate(parts) if len(req_idx)]
+        if len(solvable) <= 1 and (not solvable or len(parts[solvable[0]][0]) == snapshot.K):
+            return self.solve_snapshot(snapshot, should_stop=should_stop, report=report, progress=progress)
+        
+        parallel = snapshot.I >= parallel_min_requests() and subproblem_workers() > 1
+        workers = min(subproblem_workers(), len(solvable)) if parallel else 1
+        budget = min(self.config.time_limit_seconds, 30) * workers
+        
+        # Single-technician routes are sequenced by local search to the first local optimum
+        min_share = ROUTE_MIN_SECONDS if assign_then_sequence else PART_MIN_SECONDS
+        backend = 'descent' if assign_then_sequence else None
+        
+        def share(n_requests, fraction=1.0, minimum=min_share):
+            return min(max(minimum, budget * fraction * n_requests / snapshot.I), 30)
+        
+        logger.info("Decomposition: %d skill components, %d parts with requests, requests per part = %s (%s)",
+                    n_components, len(solvable), [len(parts[p][1]) for p in solvable],
+                    f"{workers} processes" if parallel else "in process")
+        with subproblem_executor(len(solvable)) if parallel else nullcontext() as executor:
+            if executor is not None:
+                with report.phase('pool_startup'):
+                    start_workers(executor, workers)
+            results = self._solve_parts(
+                executor,
+                [(snapshot.subset(*parts[p]), share(len(parts[p][1]))) for p in solvable],
+                should_stop,
+                progress,
+                backend,
+            )
+            part_assignments = [[] for _ in parts]
+            part_objectives = [None for _ in parts]
+            for p, ((assignments, _, _), part_report) in zip(solvable, results):
+                part_assignments[p] = assignments
+                part_objectives[p] = part_report.objective
+                report.absorb(part_report)
+            unserved_by_id = {item['request_id']: item for (_, unserved, _), _ in results for item in unserved}
+            
+            req_pos = {req.id: i for i, req in enumerate(snapshot.reqs)}
+            offered = defaultdict(list)
+            if geographic or assign_then_sequence:
+                # Repair: offer each dropped request to the nearest region with a technician
+                # who has its skill on a shift overlapping its window (other than the region
+                # it was dropped in; assign-then-sequence has not solved any region yet)
+                skip = 0 if assign_then_sequence else 1
+                for request_id in unserved_by_id:
+                    i = req_pos[request_id]
+                    skill_id = snapshot.reqs[i].required_skill_id
+                    window_start, window_end = snapshot.job_windows[i].tolist()
+                    for region in regions.req_preference[i][skip:].tolist():
+                        if any(
+                            (skill_id is None or skill_id in snapshot.techs[k].skill_ids)
+                            and window_start <= snapshot.tech_windows[k, 1] and window_end >= snapshot.tech_windows[k, 0]
+                            for k in region_parts[region][0].tolist()
+                        ):
+                            offered[region].append(i)
+                            break
+            
+            if offered and progress is not None and progress.accept_requested():
+                logger.info("Repair pass skipped: current plan accepted")
+            elif offered:
+                repair_regions = sorted(offered)
+                if assign_then_sequence:
+                    # Start the regions from the sequenced routes (one part per technician)
+                    snapshot.initial_routes = [
+                        [req_pos[a['service_request_id']] for a in sorted(part, key=lambda a: a['sequence_order'])]
+                        for part in part_assignments
+                    ]
+                repair_jobs = []
+                for region in repair_regions:
+                    served_idx = [req_pos[a['service_request_id']]
+                                  for p in region_members[region] for a in part_assignments[p]]
+                    req_idx = served_idx + offered[region]
+                    repair_jobs.append((snapshot.subset(region_parts[region][0], req_idx),
+                                        share(len(req_idx), 1 / 3, PART_MIN_SECONDS)))
+                logger.info("Repair pass: %d assigned so far, re-solving %d regions with %d dropped requests offered",
+                            sum(len(part) for part in part_assignments), len(repair_regions),
+                            sum(len(v) for v in offered.values()))
+            
+                # ALNS moves requests between the routes of a region by removing and reinserting them
+                repaired = self._solve_parts(executor, repair_jobs, should_stop,
+                                             backend='alns' if assign_then_sequence else backend)
+                tech_part = {tech.id: int(p) for tech, p in zip(snapshot.techs, partition.tech_labels)}
+                for region, ((assignments, unserved, _), part_report) in zip(repair_regions, repaired):
+                    # Repair models re-solve existing regions: their time counts, their size does not
+                    report.absorb(part_report, model=False)
+                    members = region_members[region]
+                    if len(assignments) <= sum(len(part_assignments[p]) for p in members):
+                        continue
+                    for p in members:
+                        part_assignments[p] = []
+                        part_objectives[p] = None
+                    for assignment in assignments:
+                        part_assignments[tech_part[assignment['technician_id']]].append(assignment)
+                    part_objectives[members[0]] = part_report.objective
+                    for item in unserved:
+                        unserved_by_id.setdefault(item['request_id'], item)
+                    for assignment in assignments:
+                        unserved_by_id.pop(assignment['service_request_id'], None)
+        
+        assignments = [a for part in part_assignments for a in part]
+        unserved = [unserved_by_id[req.id] for req in snapshot.reqs if req.id in unserved_by_id]
+        total_travel = sum(a['travel_time'] for a in assignments)
+        objectives = [objective for objective in part_objectives if objective is not None]
+        report.parts = len(solvable)
+        report.requests = snapshot.I
+        report.assigned_count = len(assignments)
+        report.dropped_count = len(unserved)
+        report.objective = sum(objectives) if objectives else None
+        report.time_limit = budget
+        logger.info("Decomposition result: %d assigned, %d unserved", len(assignments), len(unserved))
+        return assignments, unserved, total_travel
+    
+    def _assign(self, snapshot: SolverSnapshot, should_stop: Optional[Callable[[], bool]],
+                report: SolveReport) -> SolverSnapshot:
+        """
+        Assignment phase of an assign-then-sequence solve: the greedy plan for the whole
+        snapshot, charged to `report` as one 'assignment' phase.
+        Returns: a copy of the snapshot with the plan's routes as its initial routes
         """
-        import sys
-        print(f"\n{'='*80}")
-        print(f"ROUTING SERVICE - SOLVE CALLED")
-        print(f"{'='*80}")
-        print(f"Technicians provided: {len(technicians)}")
-        print(f"Service requests provided: {len(service_requests)}")
-        sys.stdout.flush()
-        
-        # Filter valid technicians and requests
-        techs = [t for t in technicians if t.depot_lat is not None and t.depot_lon is not None]
-        reqs = [r for r in service_requests if r.lat is not None and r.lon is not None and r.status == 'pending']
-        
-        print(f"Valid technicians: {len(techs)}")
-        print(f"Valid pending requests: {len(reqs)}")
-        sys.stdout.flush()
+        assignment_report = SolveReport()
+        assignments, _, _ = self.solve_snapshot(snapshot, should_stop=should_stop, report=assignment_report,
+                                                backend='greedy')
+        report.add_phase('assignment', assignment_report.finish().wall_seconds, assignment_report.cpu_seconds)
+        
+        tech_pos = {tech.id: k for k, tech in enumerate(snapshot.techs)}
+        req_pos = {req.id: i for i, req in enumerate(snapshot.reqs)}
+        routes = [[] for _ in range(snapshot.K)]
+        for assignment in sorted(assignments, key=lambda a: a['sequence_order']):
+            routes[tech_pos[assignment['technician_id']]].append(req_pos[assignment['service_request_id']])
+        logger.info("Assignment: %d of %d requests on %d technicians' routes in %.2fs",
+                    len(assignments), snapshot.I, sum(1 for route in routes if route), assignment_report.wall_seconds)
+        
+        assigned = snapshot.subset(range(snapshot.K), range(snapshot.I))
+        assigned.initial_routes = routes
+        return assigned
+    
+    def _solve_parts(self, executor: Optional[ProcessPoolExecutor], jobs: List[Tuple[SolverSnapshot, float]],
+                     should_stop: Optional[Callable[[], bool]] = None,
+                     progress=None,
+                     backend: Optional[str] = None) -> List[Tuple[Tuple[List[Dict], List[Dict], float], SolveReport]]:
+        """
+        Solve (snapshot, time_limit) sub-problems, on `executor` when there is more
+        than one (without one, in this process one after another). `should_stop`
+        is polled here while the workers run, and is also
+        passed to the workers when it can be pickled (as solve-job CancelCheck hooks
+        can) so that they stop promptly too. Sub-problem j follows `progress.for_part(j)`
+        (in the workers only when it can be pickled). `backend` overrides the
+        configured search backend.
+        Returns: one (result, report) pair per sub-problem
+        """
+        if executor is None or len(jobs) == 1:
+            results = []
+            for j, (sub_snapshot, time_limit) in enumerate(jobs):
+                part_report = SolveReport()
+                result = self.solve_snapshot(
+                    sub_snapshot, should_stop=should_stop, time_limit=time_limit, report=part_report,
+                    portfolio=False if len(jobs) > 1 else None, backend=backend,
+                    progress=progress.for_part(j) if progress is not None and len(jobs) > 1 else progress,
+                )
+                results.append((result, part_report.finish()))
+            return results
+        
+        worker_stop = should_stop if _picklable(should_stop) else None
+        worker_progress = progress if _picklable(progress) else None
+        futures = [
+            executor.submit(_solve_part, self.config, sub_snapshot, time_limit, worker_stop,
+                            worker_progress.for_part(j) if worker_progress is not None else None, backend)
+            for j, (sub_snapshot, time_limit) in enumerate(jobs)
+        ]
+        pending = set(futures)
+        while pending:
+            if should_stop is not None and should_stop():
+                for future in futures:
+                    future.cancel()
+                raise SolveCancelled()
+            _, pending = wait(pending, timeout=0.5)
+        return [future.result() for future in futures]
+    
+    def solve_snapshot(self, snapshot: SolverSnapshot,
+                       should_stop: Optional[Callable[[], bool]] = None,
+                       time_limit: Optional[float] = None,
+                       report: Optional[SolveReport] = None,
+                       portfolio: Optional[bool] = None,
+                       progress=None,
+                       backend: Optional[str] = None) -> Tuple[List[Dict], List[Dict], float]:
+        """
+        Solve routing problem for a loaded snapshot. Performs no database access
+        (other than whatever `should_stop` does).
+        `time_limit` (seconds) overrides the configured solver time limit,
+        `portfolio` the configured portfolio search setting and `backend` the search
+        backend (see routing.backends) they select.
+        Phase timings, model sizes and the result are recorded on `report`.
+        `progress` (e.g. routing.jobs.JobProgress) follows the search: its
+        `publish(objective, served)` receives improving solutions and, once its
+        `accept_requested()` returns True, the search ends with the best plan so far.
+        Returns: (assignments, unserved_requests, total_travel_time), keyed by record ids
+        """
+        def check_stop():
+            if should_stop is not None and should_stop():
+                raise SolveCancelled()
+        
+        techs = snapshot.techs
+        reqs = snapshot.reqs
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if report is None:
+            report = SolveReport()
         
         if not techs:
             raise ValueError("No technicians with valid depot coordinates.")
         if not reqs:
             return [], [], 0.0
         
-        K = len(techs)
-        I = len(reqs)
+        K = snapshot.K
+        I = snapshot.I
+        report.requests = I
         
-        # Build travel time matrices with timing
-        import time
-        import math
+        # Single (K+I)x(K+I) matrix: nodes 0..K-1 are depots, K..K+I-1 are requests
+        # (fast vectorized Haversine - no API calls)
+        travel = self.distance_service.travel_minutes_matrix(snapshot.depot_coords, snapshot.job_coords, self.avg_kph)
+        travel_int = np.rint(travel).astype(np.int32)
         
-        print(f"\nBuilding distance matrices...")
-        start_time = time.time()
+        invalid_count = int(np.count_nonzero(travel >= DistanceService.INVALID_TRAVEL_MINUTES))
+        if invalid_count:
+            logger.warning("Invalid travel times replaced with penalty: %d arcs", invalid_count)
         
-        t_s_i = {}  # Tech depot to customer
-        t_i_j = {}  # Customer to customer
-        t_i_e = {}  # Customer to depot
+        report.lap('matrix')
+        check_stop()
+        logger.debug("Distance matrix built in %.2fs (%dx%d nodes)",
+                     report.phases['matrix']['wall'], travel.shape[0], travel.shape[1])
         
-        # Calculate matrices (using fast Haversine - no API calls)
-        matrix_calc_start = time.time()
-        
-        for k in range(K):
-            for i in range(I):
-                travel_time = self.distance_service.travel_minutes(
-                    techs[k].depot_lat, techs[k].depot_lon,
-                    reqs[i].lat, reqs[i].lon,
-                    self.avg_kph
-                )
-                # Check for valid values
-                if travel_time is None or math.isnan(travel_time) or travel_time < 0:
-                    print(f"Invalid travel time for tech {k} to request {i}: {travel_time}")
-                    travel_time = 999999  # Use a large penalty for invalid routes
-                t_s_i[(k, i)] = travel_time
-                
-                travel_time_e = self.distance_service.travel_minutes(
-                    reqs[i].lat, reqs[i].lon,
-                    techs[k].depot_lat, techs[k].depot_lon,
-                    self.avg_kph
-                )
-                if travel_time_e is None or math.isnan(travel_time_e) or travel_time_e < 0:
-                    print(f"Invalid travel time from request {i} to tech {k}: {travel_time_e}")
-                    travel_time_e = 999999
-                t_i_e[(k, i)] = travel_time_e
-        
-        for i in range(I):
-            for j in range(I):
-                if i == j:
-                    t_i_j[(i, j)] = 0.0
-                else:
-                    travel_time = self.distance_service.travel_minutes(
-                        reqs[i].lat, reqs[i].lon,
-                        reqs[j].lat, reqs[j].lon,
-                        self.avg_kph
-                    )
-                    if travel_time is None or math.isnan(travel_time) or travel_time < 0:
-                        print(f"Invalid travel time from request {i} to request {j}: {travel_time}")
-                        travel_time = 999999
-                    t_i_j[(i, j)] = travel_time
-        
-        matrix_time = time.time() - matrix_calc_start
-        print(f"✓ Distance matrix built in {matrix_time:.2f} seconds ({K*I*2 + I*I} calculations)")
-        
-        # DEBUG: Show sample travel times and distances
-        print(f"\n{'='*80}")
-        print(f"TRAVEL TIME ANALYSIS")
-        print(f"{'='*80}")
-        print(f"Average speed: {self.avg_kph} km/h")
-        print(f"\nSample distances and times:")
-        
-        # Show a few sample calculations
-        if K > 0 and I > 0:
-            # Tech 0 to first request
-            sample_dist_km = DistanceService.haversine_km(
-                techs[0].depot_lat, techs[0].depot_lon,
-                reqs[0].lat, reqs[0].lon
-            )
-            sample_time = t_s_i.get((0, 0), 0)
-            print(f"  Tech '{techs[0].user.username}' depot → Request '{reqs[0].name}':")
-            print(f"    Distance: {sample_dist_km:.2f} km")
-            print(f"    Travel time: {sample_time:.2f} minutes ({sample_time/60:.2f} hours)")
-            print(f"    Speed used: {self.avg_kph} km/h")
-            
-            # Between two requests if available
-            if I > 1:
-                sample_dist_km2 = DistanceService.haversine_km(
-                    reqs[0].lat, reqs[0].lon,
-                    reqs[1].lat, reqs[1].lon
-                )
-                sample_time2 = t_i_j.get((0, 1), 0)
-                print(f"  Request '{reqs[0].name}' → Request '{reqs[1].name}':")
-                print(f"    Distance: {sample_dist_km2:.2f} km")
-                print(f"    Travel time: {sample_time2:.2f} minutes ({sample_time2/60:.2f} hours)")
-        
-        # Show max and min travel times
-        all_times = list(t_s_i.values()) + list(t_i_j.values()) + list(t_i_e.values())
-        valid_times = [t for t in all_times if t < 999999 and t > 0]
-        
-        if valid_times:
-            min_time = min(valid_times)
-            max_time = max(valid_times)
-            avg_time = sum(valid_times) / len(valid_times)
-            
-            print(f"\nTravel time statistics:")
-            print(f"  Min travel time: {min_time:.2f} minutes ({min_time/60:.2f} hours)")
-            print(f"  Max travel time: {max_time:.2f} minutes ({max_time/60:.2f} hours)")
-            print(f"  Average travel time: {avg_time:.2f} minutes ({avg_time/60:.2f} hours)")
-            
-            # Analyze if times are high
-            print(f"\n⚠️  TRAVEL TIME ANALYSIS:")
-            if max_time > 60:  # More than 1 hour
-                print(f"  ⚠️  WARNING: Some locations are {max_time/60:.1f} hours apart!")
-                print(f"  This suggests locations are far from each other or speed setting is too low.")
-                
-                # Find which pairs have high travel times
-                high_time_pairs = []
-                for (k, i), time_val in t_s_i.items():
-                    if time_val > 60:
-                        dist = DistanceService.haversine_km(
-                            techs[k].depot_lat, techs[k].depot_lon,
-                            reqs[i].lat, reqs[i].lon
-                        )
-                        high_time_pairs.append((
-                            f"Tech '{techs[k].user.username}' → '{reqs[i].name}'",
-                            dist, time_val
-                        ))
-                
-                for (i, j), time_val in t_i_j.items():
-                    if time_val > 60:
-                        dist = DistanceService.haversine_km(
-                            reqs[i].lat, reqs[i].lon,
-                            reqs[j].lat, reqs[j].lon
-                        )
-                        high_time_pairs.append((
-                            f"'{reqs[i].name}' → '{reqs[j].name}'",
-                            dist, time_val
-                        ))
-                
-                if high_time_pairs:
-                    print(f"\n  Long travel time pairs (>1 hour):")
-                    for pair_name, dist_km, time_min in high_time_pairs[:10]:  # Show first 10
-                        print(f"    - {pair_name}: {dist_km:.2f} km = {time_min:.1f} min")
-                
-                print(f"\n  Possible reasons:")
-                print(f"    1. Actual distance is large (locations far apart)")
-                print(f"    2. Speed setting ({self.avg_kph} km/h) is too low for Melbourne")
-                print(f"    3. Coordinates might be incorrect (check lat/lon values)")
-            
-            elif avg_time > 30:  # Average more than 30 minutes
-                print(f"  ⚠️  Average travel time is {avg_time:.1f} minutes")
-                print(f"  Consider increasing speed from {self.avg_kph} km/h if locations are nearby")
-            else:
-                print(f"  ✓ Travel times look reasonable for Melbourne area")
-        
-        print(f"{'='*80}")
-        print(f"OR-TOOLS SOLVER SETUP")
-        print(f"{'='*80}")
-        print(f"Distance matrices built: K={K} techs, I={I} requests")
+        if debug:
+            self._log_travel_analysis(snapshot, travel)
         
         # Node indices
-        start_nodes = list(range(K))
         cust_base = K
         num_nodes = K + I
-        print(f"Nodes: start_nodes={start_nodes}, cust_base={cust_base}, num_nodes={num_nodes}")
-        
-        # Time windows (in minutes from reference time)
-        # Convert time objects to datetime for comparison
-        from datetime import datetime as dt
-        from django.utils import timezone
-        
-        # Ensure date_anchor is a date object
-        date_anchor = assigned_date.date() if hasattr(assigned_date, 'date') else assigned_date
-        
-        # Convert all times to aware datetime
-        from datetime import time as time_cls
-        window_starts = []
-        for req in reqs:
-            if hasattr(req.window_start, 'replace'):
-                # It's a datetime object
-                if timezone.is_aware(req.window_start):
-                    window_starts.append(req.window_start)
-                else:
-                    window_starts.append(timezone.make_aware(req.window_start))
-            elif isinstance(req.window_start, time_cls):
-                window_starts.append(timezone.make_aware(dt.combine(date_anchor, req.window_start)))
-            else:
-                window_starts.append(req.window_start)
-        
-        shift_starts = []
-        for tech in techs:
-            if isinstance(tech.shift_start, time_cls):
-                dt_obj = dt.combine(date_anchor, tech.shift_start)
-                # Make timezone-aware
-                if not timezone.is_aware(dt_obj):
-                    dt_obj = timezone.make_aware(dt_obj)
-                shift_starts.append(dt_obj)
-            elif hasattr(tech.shift_start, 'replace'):
-                if not timezone.is_aware(tech.shift_start):
-                    shift_starts.append(timezone.make_aware(tech.shift_start))
-                else:
-                    shift_starts.append(tech.shift_start)
-            else:
-                shift_starts.append(tech.shift_start)
-        
-        earliest = min(window_starts + shift_starts)
-        
-        def mins_from_ref(dt_obj):
-            # Ensure dt_obj is timezone-aware
-            if isinstance(dt_obj, time_cls):
-                dt_obj_combined = dt.combine(date_anchor, dt_obj)
-                if not timezone.is_aware(dt_obj_combined):
-                    dt_obj_combined = timezone.make_aware(dt_obj_combined)
-            elif hasattr(dt_obj, 'replace'):
-                if not timezone.is_aware(dt_obj):
-                    dt_obj_combined = timezone.make_aware(dt_obj)
-                else:
-                    dt_obj_combined = dt_obj
-            else:
-                dt_obj_combined = dt_obj
-            
-            delta = dt_obj_combined - earliest
-            return int(round(delta.total_seconds() / 60.0))
-        
-        tw_start = {}
-        tw_end = {}
-        
-        for n in range(num_nodes):
-            if n in start_nodes:
-                k = n
-                # Convert time objects to datetime
-                if isinstance(techs[k].shift_start, time_cls):
-                    shift_start_dt = dt.combine(date_anchor, techs[k].shift_start)
-                    if not timezone.is_aware(shift_start_dt):
-                        shift_start_dt = timezone.make_aware(shift_start_dt)
-                elif hasattr(techs[k].shift_start, 'replace'):
-                    shift_start_dt = techs[k].shift_start
-                    if not timezone.is_aware(shift_start_dt):
-                        shift_start_dt = timezone.make_aware(shift_start_dt)
-                else:
-                    shift_start_dt = techs[k].shift_start
-                
-                if shift_start_dt is None:
-                    raise ValueError(f"Technician {k} ({techs[k].user.username if techs[k].user else 'Unknown'}) has no shift_start")
-                
-                if isinstance(techs[k].shift_end, time_cls):
-                    shift_end_dt = dt.combine(date_anchor, techs[k].shift_end)
-                    if not timezone.is_aware(shift_end_dt):
-                        shift_end_dt = timezone.make_aware(shift_end_dt)
-                elif hasattr(techs[k].shift_end, 'replace'):
-                    shift_end_dt = techs[k].shift_end
-                    if not timezone.is_aware(shift_end_dt):
-                        shift_end_dt = timezone.make_aware(shift_end_dt)
-                else:
-                    shift_end_dt = techs[k].shift_end
-                
-                if shift_end_dt is None:
-                    raise ValueError(f"Technician {k} ({techs[k].user.username if techs[k].user else 'Unknown'}) has no shift_end")
-                
-                # Validate that shift_end is after shift_start
-                if shift_end_dt <= shift_start_dt:
-                    raise ValueError(
-                        f"Technician {k} ({techs[k].user.username if techs[k].user else 'Unknown'}) has invalid shift: "
-                        f"shift_end ({shift_end_dt}) must be after shift_start ({shift_start_dt})"
-                    )
-                
-                tw_start[n] = mins_from_ref(shift_start_dt)
-                tw_end[n] = mins_from_ref(shift_end_dt)
-                
-                # Additional validation: ensure calculated values are valid
-                if tw_start[n] < 0 or tw_end[n] < 0:
-                    raise ValueError(
-                        f"Technician {k} ({techs[k].user.username if techs[k].user else 'Unknown'}) calculated invalid time window: "
-                        f"start={tw_start[n]}, end={tw_end[n]}. "
-                        f"Original: shift_start={shift_start_dt}, shift_end={shift_end_dt}, "
-                        f"earliest={earliest}"
-                    )
-                if tw_start[n] >= tw_end[n]:
-                    raise ValueError(
-                        f"Technician {k} ({techs[k].user.username if techs[k].user else 'Unknown'}) calculated invalid time window: "
-                        f"start={tw_start[n]} >= end={tw_end[n]}"
-                    )
-            else:
-                i = n - cust_base
-                # reqs[i].window_start and window_end should already be datetime
-                window_start_dt = reqs[i].window_start
-                if window_start_dt is None:
-                    raise ValueError(f"Service request {i} ({reqs[i].name}) has no window_start")
-                if hasattr(window_start_dt, 'replace') and not timezone.is_aware(window_start_dt):
-                    window_start_dt = timezone.make_aware(window_start_dt)
-                
-                window_end_dt = reqs[i].window_end
-                if window_end_dt is None:
-                    raise ValueError(f"Service request {i} ({reqs[i].name}) has no window_end")
-                if hasattr(window_end_dt, 'replace') and not timezone.is_aware(window_end_dt):
-                    window_end_dt = timezone.make_aware(window_end_dt)
-                
-                # Validate that window_end is after window_start
-                if window_end_dt <= window_start_dt:
-                    raise ValueError(
-                        f"Service request {i} ({reqs[i].name}) has invalid time window: "
-                        f"window_end ({window_end_dt}) must be after window_start ({window_start_dt})"
-                    )
-                
-                tw_start[n] = mins_from_ref(window_start_dt)
-                tw_end[n] = mins_from_ref(window_end_dt)
-                
-                # Additional validation: ensure calculated values are valid
-                if tw_start[n] < 0 or tw_end[n] < 0:
-                    raise ValueError(
-                        f"Service request {i} ({reqs[i].name}) calculated invalid time window: "
-                        f"start={tw_start[n]}, end={tw_end[n]}. "
-                        f"Original: window_start={window_start_dt}, window_end={window_end_dt}, "
-                        f"earliest={earliest}"
-                    )
-                if tw_start[n] >= tw_end[n]:
-                    raise ValueError(
-                        f"Service request {i} ({reqs[i].name}) calculated invalid time window: "
-                        f"start={tw_start[n]} >= end={tw_end[n]}"
-                    )
-        
-        # Service times and capacities
-        service = {(cust_base + i): reqs[i].service_minutes for i in range(I)}
+        
+        # Time windows (in minutes from the snapshot reference time), indexed by node
+        earliest = snapshot.earliest
+        tw_start = np.concatenate([snapshot.tech_windows[:, 0], snapshot.job_windows[:, 0]]).astype(np.int64)
+        tw_end = np.concatenate([snapshot.tech_windows[:, 1], snapshot.job_windows[:, 1]]).astype(np.int64)
+        
+        # Service times and capacities, precomputed once as integer arrays so the
+        # routing model can evaluate arcs natively (no Python inside the search loop)
         capacities = [t.capacity_minutes for t in techs]
-        demands = {(cust_base + i): reqs[i].service_minutes for i in range(I)}
+        service_by_node = np.zeros(num_nodes, dtype=np.int64)
+        service_by_node[cust_base:] = [req.service_minutes for req in reqs]
+        transit = travel_int.astype(np.int64) + service_by_node[:, None]  # travel + service at origin
+        demands = service_by_node
         
-        # Get existing assignments for each technician on the assigned date
+        # Existing assignments for each technician on the assigned date
         # This prevents double-booking technicians who already have jobs
-        existing_assignments_by_tech = {}
-        for k, tech in enumerate(techs):
-            existing = Assignment.objects.filter(
-                technician=tech,
-                assigned_date=assigned_date.date(),
-                status__in=['assigned', 'in_progress']
-            ).select_related('service_request')
-            
-            # Store time windows of existing assignments
-            existing_windows = []
-            for assign in existing:
-                # Convert to minutes from reference
-                planned_start_mins = mins_from_ref(assign.planned_start)
-                planned_finish_mins = mins_from_ref(assign.planned_finish) + assign.service_request.service_minutes
-                existing_windows.append((planned_start_mins, planned_finish_mins))
-            
-            existing_assignments_by_tech[k] = existing_windows
-        
-        print(f"\nExisting assignments check:")
-        for k, tech in enumerate(techs):
-            if existing_assignments_by_tech[k]:
-                print(f"  Tech {k} ({tech.user.username}): {len(existing_assignments_by_tech[k])} existing assignment(s)")
+        if debug:
+            existing_counts = np.bincount(snapshot.existing_tech_idx, minlength=K)
+            for k in np.flatnonzero(existing_counts).tolist():
+                logger.debug("Tech %d (%s): %d existing assignment(s)", k, techs[k].username, existing_counts[k])
         
         # Skills matching - inspired by Gurobi technician routing
-        # Only allow technicians with the required skill AND available time slots
-        allowed_vehicles = {}
-        for i, req in enumerate(reqs):
-            allowed = []
-            required_skill = req.required_skill if hasattr(req, 'required_skill') else None
-            
-            # Get request time window in minutes
-            req_start_mins = tw_start[cust_base + i]
-            req_end_mins = tw_end[cust_base + i]
-            req_duration = req.service_minutes
-            
-            if required_skill:
-                # Only allow technicians with the required skill
-                for k, t in enumerate(techs):
-                    if t.skills.filter(id=required_skill.id).exists():
-                        # Check 1: Technician shift overlaps with customer window
-                        if tw_start[cust_base + i] <= tw_end[k] and tw_end[cust_base + i] >= tw_start[k]:
-                            # Check 2: No existing assignments conflict (technician is available)
-                            has_conflict = False
-                            for existing_start, existing_end in existing_assignments_by_tech[k]:
-                                # Check if request window overlaps with existing assignment
-                                # Overlap if: req_start < existing_end AND req_end > existing_start
-                                if req_start_mins < existing_end and (req_start_mins + req_duration) > existing_start:
-                                    has_conflict = True
-                                    print(f"  Tech {k} ({t.user.username}) has conflict: existing ({existing_start}-{existing_end}) vs request ({req_start_mins}-{req_start_mins + req_duration})")
-                                    break
-                            
-                            if not has_conflict:
-                                allowed.append(k)
-                        else:
-                            print(f"Request {i} ({req.name}) needs '{required_skill.name}' but tech {k} ({t.user.username}) has incompatible shift time window")
-                
-                if not allowed:
-                    print(f"WARNING: No technician has required skill '{required_skill.name}' with available time slot for request {i}")
-                    # Don't allow all - let the job be dropped if no matching tech
-                else:
-                    print(f"Request {i} ({req.name}) needs skill '{required_skill.name}', allowed techs: {allowed}")
-            else:
-                # No skill requirement - check time window compatibility and availability
-                for k, t in enumerate(techs):
-                    if tw_start[cust_base + i] <= tw_end[k] and tw_end[cust_base + i] >= tw_start[k]:
-                        # Check if technician has available time slot
-                        has_conflict = False
-                        for existing_start, existing_end in existing_assignments_by_tech[k]:
-                            if req_start_mins < existing_end and (req_start_mins + req_duration) > existing_start:
-                                has_conflict = True
-                                break
-                        
-                        if not has_conflict:
-                            allowed.append(k)
-                
-                if not allowed:
-                    print(f"WARNING: Request {i} ({req.name}) has no available technician with compatible time window")
-                else:
-                    print(f"Request {i} has no skill requirement, allowing all {len(allowed)} techs with available time slots")
-            
-            allowed_vehicles[cust_base + i] = allowed
-
-        print(f"\nSummary of allowed vehicles:")
-        for i in range(I):
-            node = cust_base + i
-            allowed = allowed_vehicles.get(node, [])
-            req_name = reqs[i].name
-            print(f"  Request '{req_name}' (node {node}): allowed techs = {allowed}")
-        sys.stdout.flush()
-        
-        # Create manager and routing
-        manager = pywrapcp.RoutingIndexManager(num_nodes, K, start_nodes, start_nodes)
-        routing = pywrapcp.RoutingModel(manager)
-        
-        def time_callback(from_index, to_index):
-            a = manager.IndexToNode(from_index)
-            b = manager.IndexToNode(to_index)
-            travel = 0
-            svc = service.get(a, 0)
-            
-            if a in start_nodes and (cust_base <= b < cust_base + I):
-                k = a
-                i = b - cust_base
-                travel = int(round(t_s_i[(k, i)]))
-            elif (cust_base <= a < cust_base + I) and (cust_base <= b < cust_base + I):
-                i = a - cust_base
-                j = b - cust_base
-                travel = int(round(t_i_j[(i, j)]))
-            elif (cust_base <= a < cust_base + I) and b in start_nodes:
-                i = a - cust_base
-                k = b
-                travel = int(round(t_i_e[(k, i)]))
-            
-            return travel + svc
-        
-        transit_cb_idx = routing.RegisterTransitCallback(time_callback)
-        routing.SetArcCostEvaluatorOfAllVehicles(transit_cb_idx)
+        # Only allow technicians with the required skill, a compatible shift, a reachable
+        # window AND available time slots (one vectorized I x K eligibility matrix)
+        eligibility = EligibilityMatrix.build(snapshot, travel)
+        
+        # No existing assignments may conflict with [window_start, window_start + service)
+        req_start_mins = snapshot.job_windows[:, 0]
+        req_finish_mins = req_start_mins + snapshot.service_minutes
+        busy_index = snapshot.busy_index()
+        free = np.ones((I, K), dtype=bool)
+        for k in range(K):
+            if k in busy_index:
+                free[:, k] = ~busy_index.overlaps_many(k, req_start_mins, req_finish_mins)
+        eligibility.restrict(free)
+        
+        allowed_vehicles = {
+            cust_base + i: np.flatnonzero(eligibility.allowed[i]).tolist() for i in range(I)
+        }
+        
+        no_eligible = [i for i in range(I) if not allowed_vehicles[cust_base + i]]
+        if no_eligible:
+            logger.info("%d of %d requests have no eligible technician", len(no_eligible), I)
+        if debug:
+            for i in range(I):
+                logger.debug("Request '%s' (node %d): allowed techs = %s",
+                             reqs[i].name, cust_base + i, allowed_vehicles[cust_base + i])
         
-        # Add time dimension
+        # Time dimension horizon
         # Use a longer horizon to accommodate all possible time windows
         # Check the maximum time window value
-        max_window_end = max(tw_end.values()) if tw_end else 24 * 60
+        max_window_end = int(tw_end.max()) if tw_end.size else 24 * 60
         horizon = max(24 * 60, int(max_window_end) + 60)  # At least 24 hours, more if needed
-        
-        print(f"Setting horizon to: {horizon} minutes (max_window_end={max_window_end})")
-        sys.stdout.flush()
-        routing.AddDimension(transit_cb_idx, 0, horizon, False, "Time")
-        time_dim = routing.GetDimensionOrDie("Time")
-        
-        # Add time windows with validation
-        print(f"\nAdding time windows...")
-        import sys
-        sys.stdout.flush()
-        
-        for node in range(num_nodes):
-            try:
-                index = manager.NodeToIndex(node)
-                start = tw_start.get(node, 0)
-                end = tw_end.get(node, horizon)
-                
-                # Validate time window
-                if start > end:
-                    print(f"ERROR: Node {node} has invalid time window: {start} > {end}")
-                    sys.stdout.flush()
-                    raise ValueError(f"Invalid time window for node {node}: start={start}, end={end}")
-                
-                # Check if it's within valid range
-                if start < 0 or end > horizon:
-                    print(f"WARNING: Node {node} time window outside horizon: start={start}, end={end}, horizon={horizon}")
-                    print(f"  Clamping to valid range...")
-                    sys.stdout.flush()
-                    # Clamp to valid range
-                    if start < 0:
-                        start = 0
-                    if end > horizon:
-                        end = horizon
-                
-                # Final validation
-                if start > end:
-                    print(f"FATAL: After clamping, still invalid: start={start}, end={end}")
-                    sys.stdout.flush()
-                    raise ValueError(f"Invalid time window after clamping: start={start}, end={end}")
-                
-                time_dim.CumulVar(index).SetRange(start, end)
-            except Exception as e:
-                print(f"ERROR setting time window for node {node}: {str(e)}")
-                print(f"  tw_start[{node}] = {tw_start.get(node, 'NOT SET')}")
-                print(f"  tw_end[{node}] = {tw_end.get(node, 'NOT SET')}")
-                sys.stdout.flush()
-                import traceback
-                traceback.print_exc()
-                raise
-        
-        print(f"Time windows set successfully for {num_nodes} nodes")
-        sys.stdout.flush()
-        
-        # Add capacity dimension
-        def demand_callback(from_index):
-            node = manager.IndexToNode(from_index)
-            return demands.get(node, 0)
-        
-        demand_cb_idx = routing.RegisterUnaryTransitCallback(demand_callback)
-        routing.AddDimensionWithVehicleCapacity(demand_cb_idx, 0, capacities, True, "Capacity")
-        
-        # Skills constraints
-        for i, req in enumerate(reqs):
-            node = cust_base + i
-            allowed = set(allowed_vehicles[node])
-            index = manager.NodeToIndex(node)
-            for k in range(K):
-                if k not in allowed:
-                    routing.VehicleVar(index).RemoveValue(k)
-        
-        # Optional jobs with drop penalty
-        drop_penalty = self.config.drop_penalty_per_job
-        for i in range(I):
-            node = cust_base + i
-            routing.AddDisjunction([manager.NodeToIndex(node)], drop_penalty)
-        
-        # Search
-        print(f"\n{'='*80}")
-        print(f"SOLVING WITH OR-TOOLS")
-        print(f"{'='*80}")
-        print(f"Total time windows: {len([k for k in tw_start.keys() if k < cust_base])} techs, {len([k for k in tw_start.keys() if k >= cust_base])} requests")
-        print(f"Time window ranges:")
-        for k in range(num_nodes):
-            if k in tw_start and k in tw_end:
-                print(f"  Node {k}: {tw_start[k]} - {tw_end[k]} minutes")
-        
-        search_params = pywrapcp.DefaultRoutingSearchParameters()
-        # Optimize for nearby locations - use faster strategy first
-        search_params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-        
-        # For nearby locations, reduce time limit and use simpler search
-        # If all locations are nearby Melbourne, solver should find solution quickly
-        time_limit = min(self.config.time_limit_seconds, 30)  # Max 30 seconds for nearby locations
-        search_params.time_limit.FromSeconds(time_limit)
-        
-        # Use faster local search for nearby locations (TABU_SEARCH is faster than GUIDED_LOCAL_SEARCH)
-        search_params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH
-        
-        print(f"Attempting to solve (time limit: {time_limit}s)...")
-        import sys
-        sys.stdout.flush()
-        
-        solver_start = time.time()
-        
-        # For nearby locations, try fastest strategy first
-        solution = None
-        strategies = [
-            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,  # Fastest
-            routing_enums_pb2.FirstSolutionStrategy.PATH_MOST_CONSTRAINED_ARC,  # Second fastest
-        ]
-        
-        for strategy in strategies:
-            try:
-                search_params.first_solution_strategy = strategy
-                strategy_start = time.time()
-                print(f"Trying strategy: {strategy} (max {time_limit}s)")
-                sys.stdout.flush()
-                solution = routing.SolveWithParameters(search_params)
-                strategy_time = time.time() - strategy_start
-                
-                if solution:
-                    total_solver_time = time.time() - solver_start
-                    print(f"✓ Solution found with strategy: {strategy}")
-                    print(f"  Strategy took: {strategy_time:.2f} seconds")
-                    print(f"  Total solver time: {total_solver_time:.2f} seconds")
-                    sys.stdout.flush()
-                    break
-                else:
-                    print(f"  Strategy returned no solution in {strategy_time:.2f}s")
-                    sys.stdout.flush()
-            except Exception as e:
-                strategy_time = time.time() - strategy_start
-                print(f"  Strategy failed in {strategy_time:.2f}s: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                sys.stdout.flush()
-                continue
-        
-        if solution is None:
-            print("ERROR: OR-Tools returned no solution after trying all strategies")
-            print(f"Parameters: K={K} techs, I={I} requests, num_nodes={num_nodes}")
-            print("This means the solver could not find a valid assignment.")
-            print("Possible reasons:")
-            print("  - No technicians match the required skills")
-            print("  - Time windows are incompatible")
-            print("  - Service requests exceed technician capacity")
-            sys.stdout.flush()
-            return [], reqs, 0.0
-        
-        print(f"Solver result: Solution found")
-        sys.stdout.flush()
+        logger.debug("Setting horizon to: %d minutes (max_window_end=%d)", horizon, max_window_end)
+        
+        # Validate time windows and clamp them to [0, horizon]
+        inverted = np.flatnonzero(tw_start > tw_end)
+        if inverted.size:
+            node = int(inverted[0])
+            logger.error("Node %d has invalid time window: %d > %d", node, tw_start[node], tw_end[node])
+            raise ValueError(f"Invalid time window for node {node}: start={tw_start[node]}, end={tw_end[node]}")
+        outside = np.flatnonzero((tw_start < 0) | (tw_end > horizon))
+        for node in outside.tolist():
+            logger.warning("Node %d time window outside horizon (start=%d, end=%d, horizon=%d), clamping",
+                           node, tw_start[node], tw_end[node], horizon)
+        tw_start = np.maximum(tw_start, 0)
+        tw_end = np.minimum(tw_end, horizon)
+        still_inverted = np.flatnonzero(tw_start > tw_end)
+        if still_inverted.size:
+            node = int(still_inverted[0])
+            logger.error("Node %d time window still invalid after clamping: start=%d, end=%d",
+                         node, tw_start[node], tw_end[node])
+            raise ValueError(f"Invalid time window after clamping: start={tw_start[node]}, end={tw_end[node]}")
+        
+        if debug:
+            for k in range(num_nodes):
+                logger.debug("Node %d time window: %d - %d minutes", k, tw_start[k], tw_end[k])
+        
+        data = RoutingData(transit, tw_start, tw_end, demands, capacities, eligibility.allowed,
+                           self.config.drop_penalty_per_job, horizon)
+        report.nodes = num_nodes
+        report.vehicles = K
+        report.arcs = num_nodes * (num_nodes - 1)
+        
+        time_limit, plateau = self.search_budget(I, time_limit)
+        report.time_limit = time_limit
+        logger.debug("Solving %d techs x %d requests (time limit: %.2fs, plateau: %s)", K, I, time_limit, plateau)
+        check_stop()
+        
+        # Greedy plan in milliseconds: the search's starting point, and the plan if the search finds none
+        report.lap('model_build')
+        with report.phase('construction'):
+            seed = construct_routes(data)
+        logger.debug("Greedy construction: %d of %d requests inserted in %.3fs",
+                     seed.served, I, report.phases['construction']['wall'])
+        
+        backend = get_backend(backend or self.backend_name(portfolio))
+        warm_routes = snapshot.initial_routes if snapshot.initial_routes and any(snapshot.initial_routes) else None
+        solved = backend.search(data, time_limit, plateau=plateau, warm_routes=warm_routes, seed=seed,
+                                should_stop=should_stop, progress=progress, report=report)
+        
+        check_stop()
+        if solved is None and seed.served:
+            logger.warning("Search found no solution; using the greedy plan (%d of %d requests)", seed.served, I)
+            solved = seed
+            report.strategy = 'greedy'
+        report.dropped_count = I
+        if solved is None:
+            logger.error(
+                "OR-Tools returned no solution after trying all strategies (K=%d techs, I=%d requests); "
+                "check skills, time windows and technician capacity", K, I
+            )
+            unserved_all = [
+                {
+                    'request_id': req.id,
+                    'reason_short': "No solution found",
+                    'reason_detail': "The solver could not find any valid assignment within the time limit",
+                    'required_skill': req.required_skill_name if req.required_skill_id else 'None',
+                    'allowed_technicians': [],
+                }
+                for req in reqs
+            ]
+            return [], unserved_all, 0.0
         
         # Extract solution
-        extraction_start = time.time()
-        print(f"\nExtracting assignments from solution...")
-        sys.stdout.flush()
+        routes, starts, report.objective = solved.routes, solved.starts, solved.objective
         assignments = []
         served_ids = set()
         
-        for k in range(K):
-            idx = routing.Start(k)
-            order = 0
-            route_assignments = []
-            
-            print(f"Tech {k} ({techs[k].user.username}):")
-            step = 0
-            while not routing.IsEnd(idx):
-                node = manager.IndexToNode(idx)
-                print(f"  Step {step}: node={node} (cust_base={cust_base}, I={I})")
-                if cust_base <= node < cust_base + I:
-                    order += 1
-                    req = reqs[node - cust_base]
-                    try:
-                        t_start_min = solution.Value(time_dim.CumulVar(idx))
-                        start_dt = earliest + timedelta(minutes=t_start_min)
-                        finish_dt = start_dt + timedelta(minutes=req.service_minutes)
-                        
-                        print(f"  Assignment {order}: {req.name} at {start_dt.strftime('%Y-%m-%d %H:%M')}")
-                    except Exception as e:
-                        print(f"  ERROR extracting assignment for node {node}: {e}")
-                        break
-                    
-                    assignments.append({
-                        'service_request': req,
-                        'technician': techs[k],
-                        'assigned_date': assigned_date.date(),
-                        'sequence_order': order,
-                        'planned_start': start_dt,
-                        'planned_finish': finish_dt,
-                        'travel_time': 0.0
-                    })
-                    served_ids.add(req.id)
+        for k, route in enumerate(routes):
+            prev_node = k
+            for order, i in enumerate(route, start=1):
+                node = cust_base + i
+                req = reqs[i]
+                start_dt = earliest + timedelta(minutes=int(starts[i]))
+                finish_dt = start_dt + timedelta(minutes=req.service_minutes)
+                if debug:
+                    logger.debug("Tech %s assignment %d: %s at %s",
+                                 techs[k].username, order, req.name, start_dt.strftime('%Y-%m-%d %H:%M'))
                 
-                idx = solution.Value(routing.NextVar(idx))
-                step += 1
-            
-            if not route_assignments:
-                print(f"  No assignments for this tech")
-            sys.stdout.flush()
-        
-        extraction_time = time.time() - extraction_start
-        print(f"Extracted {len(assignments)} assignments in {extraction_time:.3f}s")
-        sys.stdout.flush()
-        
-        unserved = [req for req in reqs if req.id not in served_ids]
+                assignments.append({
+                    'service_request_id': req.id,
+                    'technician_id': techs[k].id,
+                    'assigned_date': snapshot.assigned_date,
+                    'sequence_order': order,
+                    'planned_start': start_dt,
+                    'planned_finish': finish_dt,
+                    'travel_time': float(travel[prev_node, node])
+                })
+                served_ids.add(req.id)
+                prev_node = node
+        
+        unserved = [i for i, req in enumerate(reqs) if req.id not in served_ids]
         unserved_with_reasons = []
         
-        print(f"\n{'='*80}")
-        print(f"ASSIGNMENT VERIFICATION")
-        print(f"{'='*80}")
-        print(f"Total requests: {len(reqs)}")
-        print(f"Assigned: {len(assignments)}")
-        print(f"Unserved: {len(unserved)}")
-        
-        if unserved:
-            print(f"\nUnserved requests and reasons:")
-            for req in unserved:
-                req_idx = reqs.index(req)
-                node = cust_base + req_idx
-                allowed_techs = allowed_vehicles.get(node, [])
-                required_skill = req.required_skill.name if req.required_skill else 'None'
-                reason_detail = ""
-                reason_short = ""
+        for req_idx in unserved:
+            req = reqs[req_idx]
+            node = cust_base + req_idx
+            allowed_techs = allowed_vehicles.get(node, [])
+            required_skill = req.required_skill_name if req.required_skill_id else 'None'
+            reason_detail = ""
+            reason_short = ""
+            
+            if not allowed_techs:
+                # Check why no techs allowed, one eligibility check at a time
+                with_skill = eligibility.skill_ok[req_idx]
+                with_shift = with_skill & eligibility.shift_ok[req_idx]
+                with_reach = with_shift & eligibility.reachable[req_idx]
+                techs_with_skill = np.flatnonzero(with_skill).tolist()
                 
-                if not allowed_techs:
-                    # Check why no techs allowed
+                if required_skill != 'None' and not techs_with_skill:
+                    reason_short = "No technician with required skill"
+                    reason_detail = f"No technician has the required skill '{required_skill}'"
+                elif not with_shift.any():
                     if required_skill != 'None':
-                        # Find techs with this skill
-                        techs_with_skill = [k for k, t in enumerate(techs) if t.skills.filter(name=required_skill).exists()]
-                        if not techs_with_skill:
-                            reason_short = "No technician with required skill"
-                            reason_detail = f"No technician has the required skill '{required_skill}'"
-                        else:
-                            # Check time windows
-                            time_incompatible = []
-                            compatible_techs = []
-                            for k in techs_with_skill:
-                                tech = techs[k]
-                                # Check if time windows overlap
-                                if tw_start[node] <= tw_end[k] and tw_end[node] >= tw_start[k]:
-                                    # Time windows overlap, check other constraints
-                                    compatible_techs.append(k)
-                                else:
-                                    time_incompatible.append(k)
-                            
-                            if len(compatible_techs) == 0:
-                                # All techs with skill have incompatible time windows
-                                tech_names = [techs[k].user.username for k in techs_with_skill[:3]]
-                                reason_short = "Time window mismatch"
-                                reason_detail = f"Technicians with skill '{required_skill}' ({', '.join(tech_names)}{'...' if len(techs_with_skill) > 3 else ''}) have shifts that don't overlap with the requested time window"
-                            else:
-                                reason_short = "Capacity or routing constraint"
-                                reason_detail = f"Skill '{required_skill}' available, but no technician could be assigned due to capacity limits or routing constraints"
+                        # All techs with skill have incompatible time windows
+                        tech_names = [techs[k].username for k in techs_with_skill[:3]]
+                        reason_short = "Time window mismatch"
+                        reason_detail = f"Technicians with skill '{required_skill}' ({', '.join(tech_names)}{'...' if len(techs_with_skill) > 3 else ''}) have shifts that don't overlap with the requested time window"
                     else:
-                        # No skill requirement
                         reason_short = "No compatible time windows"
                         reason_detail = "No technician has a shift that overlaps with the requested time window"
+                elif not with_reach.any():
+                    reason_short = "Too far to reach in time"
+                    reason_detail = "No compatible technician can travel from their depot and arrive before the requested window closes"
+                elif required_skill != 'None':
+                    reason_short = "Capacity or routing constraint"
+                    reason_detail = f"Skill '{required_skill}' available, but no technician could be assigned due to capacity limits or routing constraints"
                 else:
-                    # Some techs allowed but not assigned
-                    tech_names = [techs[k].user.username for k in allowed_techs]
-                    reason_short = "Capacity exhausted"
-                    reason_detail = f"Technicians {', '.join(tech_names[:3])}{'...' if len(tech_names) > 3 else ''} are compatible but don't have enough capacity or routing conflicts"
-                
-                unserved_info = {
-                    'request': req,
-                    'reason_short': reason_short,
-                    'reason_detail': reason_detail,
-                    'required_skill': required_skill,
-                    'allowed_technicians': [techs[k].user.username for k in allowed_techs] if allowed_techs else []
-                }
-                unserved_with_reasons.append(unserved_info)
-                
-                print(f"  - {req.name}")
-                print(f"    Required skill: {required_skill}")
-                print(f"    Reason: {reason_detail}")
-                if allowed_techs:
-                    tech_names = [techs[k].user.username for k in allowed_techs]
-                    print(f"    Allowed techs: {', '.join(tech_names)}")
-        else:
-            print(f"\n✓ All requests successfully assigned!")
+                    reason_short = "Capacity or routing constraint"
+                    reason_detail = "Compatible technicians are already booked at the requested time"
+            else:
+                # Some techs allowed but not assigned
+                tech_names = [techs[k].username for k in allowed_techs]
+                reason_short = "Capacity exhausted"
+                reason_detail = f"Technicians {', '.join(tech_names[:3])}{'...' if len(tech_names) > 3 else ''} are compatible but don't have enough capacity or routing conflicts"
+            
+            unserved_info = {
+                'request_id': req.id,
+                'reason_short': reason_short,
+                'reason_detail': reason_detail,
+                'required_skill': required_skill,
+                'allowed_technicians': [techs[k].username for k in allowed_techs] if allowed_techs else []
+            }
+            unserved_with_reasons.append(unserved_info)
+            if debug:
+                logger.debug("Unserved '%s' (skill %s): %s", req.name, required_skill, reason_detail)
         
         # Verify skill matching for assigned jobs
-        print(f"\n✓ Skill matching verification for assigned jobs:")
-        skill_match_errors = []
+        req_by_id = {req.id: req for req in reqs}
+        tech_by_id = {tech.id: tech for tech in techs}
         for assignment in assignments:
-            req = assignment['service_request']
-            tech = assignment['technician']
-            required_skill = req.required_skill
+            req = req_by_id[assignment['service_request_id']]
+            tech = tech_by_id[assignment['technician_id']]
             
-            if required_skill:
-                if not tech.skills.filter(id=required_skill.id).exists():
-                    skill_match_errors.append(
-                        f"ERROR: {req.name} assigned to {tech.user.username} but tech doesn't have skill '{required_skill.name}'"
-                    )
-        
-        if skill_match_errors:
-            for error in skill_match_errors:
-                print(f"  ✗ {error}")
-        else:
-            print(f"  ✓ All {len(assignments)} assignments have matching skills!")
+            if req.required_skill_id and req.required_skill_id not in tech.skill_ids:
+                logger.error("%s assigned to %s but tech doesn't have skill '%s'",
+                             req.name, tech.username, req.required_skill_name)
+        
+        # Calculate total travel time (depot → first job and between consecutive jobs)
+        total_travel = sum(a['travel_time'] for a in assignments)
+        
+        report.lap('extraction')
+        report.assigned_count = len(assignments)
+        report.dropped_count = len(unserved_with_reasons)
+        
+        # One summary record per run
+        logger.info(
+            "Solved %d techs x %d requests: %d assigned, %d unserved, travel %.1f min, objective %s (%s) | "
+            "matrix %.3fs, model %.3fs, extraction %.3fs, total %.3fs",
+            K, I, len(assignments), len(unserved_with_reasons), total_travel, report.objective, report.strategy,
+            report.phases['matrix']['wall'], report.phases['model_build']['wall'],
+            report.phases['extraction']['wall'], report.wall_seconds,
+        )
         
-        print(f"{'='*80}\n")
-        sys.stdout.flush()
+        return assignments, unserved_with_reasons, total_travel
+    
+    def backend_name(self, portfolio: Optional[bool] = None) -> str:
+        """
+        Search backend for a solve (see routing.backends): the configured one, with
+        the OR-Tools search run as a portfolio when `portfolio` (by default the
+        configured portfolio search setting) is set
+        """
+        if portfolio is None:
+            portfolio = self.config.portfolio_search
+        if self.config.solver_backend == 'ortools' and portfolio:
+            return 'portfolio'
+        return self.config.solver_backend
+    
+    def search_budget(self, n_requests: int, time_limit: Optional[float] = None) -> Tuple[float, Optional[float]]:
+        """
+        Search time limit and plateau window (seconds without improvement before the
+        search ends, None to never end early) for an instance of `n_requests`.
         
-        # Calculate total travel time
-        total_travel = 0.0
-        for k in range(K):
-            tech_assignments = [a for a in assignments if a['technician'] == techs[k]]
-            if tech_assignments:
-                if tech_assignments:
-                    first = tech_assignments[0]
-                    total_travel += t_s_i.get((k, first['service_request'].id - 1), 0.0)
-                    for a in tech_assignments[1:]:
-                        prev_idx = assignments.index(a) - 1
-                        if prev_idx >= 0:
-                            prev = assignments[prev_idx]
-                            total_travel += t_i_j.get((prev_idx, prev_idx + 1), 0.0)
-        
-        # Print total time summary
-        solver_end_time = time.time()
-        total_time = solver_end_time - start_time
-        solver_total_time = solver_end_time - solver_start
-        
-        print(f"\n{'='*80}")
-        print(f"⏱️  TIME SUMMARY")
-        print(f"{'='*80}")
-        print(f"Distance matrix calculation: {matrix_time:.3f}s ({K*I*2 + I*I} calculations, Haversine formula)")
-        print(f"Solver execution: {solver_total_time:.3f}s (OR-Tools CP-SAT solver)")
-        print(f"Assignment extraction: {extraction_time:.3f}s (parsing solution)")
-        print(f"{'─'*60}")
-        print(f"TOTAL TIME: {total_time:.3f}s")
-        print(f"{'='*80}\n")
+        `time_limit` overrides the configured limit; either is capped at 30 seconds.
+        With adaptive time limits the budget grows with the request count up to that
+        limit, and the plateau window is the configured one, shortened on small
+        budgets so that small days come back well within a second.
+        """
+        # For nearby locations, reduce time limit: max 30 seconds
+        time_limit = min(time_limit or self.config.time_limit_seconds, 30)
+        if self.config.adaptive_time_limit:
+            time_limit = min(time_limit, BUDGET_BASE_SECONDS + BUDGET_SECONDS_PER_REQUEST * n_requests)
+        plateau = None
+        if self.config.plateau_seconds > 0:
+            plateau = min(self.config.plateau_seconds,
+                          max(PLATEAU_MIN_SECONDS, PLATEAU_BUDGET_FRACTION * time_limit))
+        return time_limit, plateau
+    
+    def _log_travel_analysis(self, snapshot: SolverSnapshot, travel: np.ndarray) -> None:
+        """Debug-level sample distances and travel time statistics for a matrix"""
+        techs, reqs, K = snapshot.techs, snapshot.reqs, snapshot.K
+        logger.debug("Average speed: %s km/h", self.avg_kph)
+        if K > 0 and reqs:
+            logger.debug(
+                "Tech '%s' depot -> request '%s': %.2f km, %.2f min",
+                techs[0].username, reqs[0].name,
+                DistanceService.haversine_km(techs[0].depot_lat, techs[0].depot_lon, reqs[0].lat, reqs[0].lon),
+                float(travel[0, K]),
+            )
+            if len(reqs) > 1:
+                logger.debug(
+                    "Request '%s' -> request '%s': %.2f km, %.2f min",
+                    reqs[0].name, reqs[1].name,
+                    DistanceService.haversine_km(reqs[0].lat, reqs[0].lon, reqs[1].lat, reqs[1].lon),
+                    float(travel[K, K + 1]),
+                )
         
-        return assignments, unserved_with_reasons, total_travel
+        # Max and min travel times (depot<->request and request<->request arcs)
+        arc_mask = np.ones(travel.shape, dtype=bool)
+        arc_mask[:K, :K] = False
+        valid_mask = arc_mask & (travel > 0) & (travel < DistanceService.INVALID_TRAVEL_MINUTES)
+        valid_times = travel[valid_mask]
+        if not valid_times.size:
+            return
+        
+        max_time = float(valid_times.max())
+        avg_time = float(valid_times.mean(dtype=np.float64))
+        logger.debug("Travel time min/avg/max: %.2f / %.2f / %.2f min",
+                     float(valid_times.min()), avg_time, max_time)
+        if max_time > 60:  # More than 1 hour
+            # Which pairs have high travel times (depot → request, request → request)
+            long_mask = valid_mask & (travel > 60)
+            long_mask[K:, :K] = False
+            node_names = [f"Tech '{t.username}'" for t in techs] + [f"'{r.name}'" for r in reqs]
+            for a, b in np.argwhere(long_mask)[:10]:  # Show first 10
+                logger.debug("Long travel pair %s -> %s: %.2f km = %.1f min", node_names[a], node_names[b],
+                             float(travel[a, b]) * self.avg_kph / 60.0, float(travel[a, b]))
+            logger.debug("Some locations are %.1f hours apart: check coordinates and the speed setting (%s km/h)",
+                         max_time / 60, self.avg_kph)
+        elif avg_time > 30:  # Average more than 30 minutes
+            logger.debug("Average travel time is %.1f minutes; consider increasing speed from %s km/h",
+                         avg_time, self.avg_kph)
 
@@ -0,0 +1,505 @@
+"""
+Solver input snapshot: a compact, DB-free copy of everything RoutingService needs
+"""
+import json
+from datetime import date, datetime, time as time_cls, timedelta, timezone as dt_timezone
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from core.models import Technician, ServiceRequest, Assignment
+from routing.intervals import BUSY_STATUSES, IntervalIndex, busy_span
+
+
+class TechnicianRecord:
+    """Plain technician row used by the solver (no lazy relations)"""
+    __slots__ = ('id', 'username', 'depot_lat', 'depot_lon', 'capacity_minutes',
+                 'shift_start', 'shift_end', 'skill_ids')
+
+    def __init__(self, id, username, depot_lat, depot_lon, capacity_minutes,
+                 shift_start, shift_end, skill_ids=frozenset()):
+        self.id = id
+        self.username = username
+        self.depot_lat = depot_lat
+        self.depot_lon = depot_lon
+        self.capacity_minutes = capacity_minutes
+        self.shift_start = shift_start
+        self.shift_end = shift_end
+        self.skill_ids = skill_ids
+
+    def __repr__(self):
+        return f"<TechnicianRecord {self.id} {self.username}>"
+
+
+class RequestRecord:
+    """Plain service request row used by the solver (no lazy relations)"""
+    __slots__ = ('id', 'name', 'customer_username', 'lat', 'lon', 'service_minutes',
+                 'window_start', 'window_end', 'required_skill_id', 'required_skill_name',
+                 'priority')
+
+    def __init__(self, id, name, customer_username, lat, lon, service_minutes,
+                 window_start, window_end, required_skill_id=None, required_skill_name=None,
+                 priority=2):
+        self.id = id
+        self.name = name
+        self.customer_username = customer_username
+        self.lat = lat
+        self.lon = lon
+        self.service_minutes = service_minutes
+        self.window_start = window_start
+        self.window_end = window_end
+        self.required_skill_id = required_skill_id
+        self.required_skill_name = required_skill_name
+        self.priority = priority
+
+    def __repr__(self):
+        return f"<RequestRecord {self.id} {self.name}>"
+
+
+class ExistingAssignmentRecord:
+    """Committed (or, for warm starts, planned) assignment on a technician's day"""
+    __slots__ = ('id', 'technician_id', 'service_request_id', 'planned_start', 'planned_finish',
+                 'service_minutes', 'sequence_order')
+
+    def __init__(self, id, technician_id, service_request_id, planned_start, planned_finish,
+                 service_minutes, sequence_order=None):
+        self.id = id
+        self.technician_id = technician_id
+        self.service_request_id = service_request_id
+        self.planned_start = planned_start
+        self.planned_finish = planned_finish
+        self.service_minutes = service_minutes
+        self.sequence_order = sequence_order
+
+
+def _as_queryset(model, items):
+    """Return a queryset for `items` (a queryset, or model instances / primary keys)"""
+    if isinstance(items, QuerySet):
+        return items, None
+    pks = [getattr(item, 'pk', item) for item in items]
+    return model.objects.filter(pk__in=pks), pks
+
+
+def _ordered(rows, pks):
+    """Restore the caller's ordering when records were loaded by primary key"""
+    if pks is None:
+        return rows
+    position = {pk: n for n, pk in enumerate(pks)}
+    return sorted(rows, key=lambda row: position.get(row['id'], len(position)))
+
+
+def _aware(value, date_anchor):
+    """Convert a time or naive datetime to an aware datetime on the anchor date"""
+    if isinstance(value, time_cls):
+        value = datetime.combine(date_anchor, value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def day_bounds(assigned_date, look_back_days: int = 0, look_ahead_days: int = 0):
+    """Aware [start, end) datetimes covering `assigned_date`, widened by whole days"""
+    start = datetime.combine(assigned_date - timedelta(days=look_back_days), time_cls.min)
+    end = datetime.combine(assigned_date + timedelta(days=look_ahead_days + 1), time_cls.min)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def candidate_requests(assigned_date, look_back_days: int = 0, look_ahead_days: int = 0) -> QuerySet:
+    """
+    Pending requests with coordinates whose window overlaps the planning day
+    (plus the look-back / look-ahead days). Uses plain range predicates on
+    window_start / window_end so the (status, window_start, window_end) index applies.
+    """
+    start, end = day_bounds(assigned_date, look_back_days, look_ahead_days)
+    return ServiceRequest.objects.filter(
+        status='pending',
+        lat__isnull=False,
+        lon__isnull=False,
+        window_start__lt=end,
+        window_end__gt=start,
+    )
+
+
+def _pack_assignments(records: List[ExistingAssignmentRecord], seconds_from_ref) -> np.ndarray:
+    """(n, 7) int64 rows: id, technician, request, start, finish (seconds from ref), service, sequence"""
+    return np.array([
+        (e.id, e.technician_id, e.service_request_id, seconds_from_ref(e.planned_start),
+         seconds_from_ref(e.planned_finish), e.service_minutes,
+         e.sequence_order if e.sequence_order is not None else -1)
+        for e in records
+    ], dtype=np.int64).reshape(-1, 7)
+
+
+def _unpack_assignments(rows: np.ndarray, ref: datetime) -> List[ExistingAssignmentRecord]:
+    return [
+        ExistingAssignmentRecord(
+            id=row[0], technician_id=row[1], service_request_id=row[2],
+            planned_start=ref + timedelta(seconds=row[3]), planned_finish=ref + timedelta(seconds=row[4]),
+            service_minutes=row[5], sequence_order=row[6] if row[6] >= 0 else None,
+        )
+        for row in rows.tolist()
+    ]
+
+
+def _pack_lists(lists: List[Iterable[int]]):
+    """Flatten int lists into (values, offsets) arrays"""
+    lists = [list(values) for values in lists]
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(values) for values in lists])
+    values = np.array([v for values in lists for v in values], dtype=np.int64)
+    return values, offsets
+
+
+def _unpack_lists(values: np.ndarray, offsets: np.ndarray) -> List[List[int]]:
+    values, offsets = values.tolist(), offsets.tolist()
+    return [values[offsets[n]:offsets[n + 1]] for n in range(len(offsets) - 1)]
+
+
+class SolverSnapshot:
+    """
+    Everything the solver reads, loaded in a fixed number of `.values()` queries.
+
+    Records keep the identifying fields used for diagnostics and output; the NumPy
+    arrays hold the numeric model inputs, with all times as integer minute offsets
+    from `earliest`. Node layout matches the solver: techs first, then requests.
+    `initial_routes[k]` optionally lists request positions for technician k, in
+    visiting order, to start the search from; `planned` then holds the persisted
+    assignments behind those routes (see `load(warm_start=True)`).
+    """
+    __slots__ = ('assigned_date', 'earliest', 'techs', 'reqs', 'existing', 'initial_routes', 'planned',
+                 'depot_coords', 'job_coords', 'tech_windows', 'job_windows',
+                 'service_minutes', 'capacities', 'job_skill_ids',
+                 'existing_tech_idx', 'existing_windows')
+
+    def __init__(self, assigned_date, techs: List[TechnicianRecord], reqs: List[RequestRecord],
+                 existing: Optional[List[ExistingAssignmentRecord]] = None,
+                 initial_routes: Optional[List[List[int]]] = None,
+                 planned: Optional[List[ExistingAssignmentRecord]] = None):
+        self.assigned_date = assigned_date.date() if isinstance(assigned_date, datetime) else assigned_date
+        self.techs = techs
+        self.reqs = reqs
+        self.existing = existing or []
+        self.initial_routes = initial_routes
+        self.planned = planned or []
+        self._build_arrays()
+
+    @property
+    def K(self) -> int:
+        return len(self.techs)
+
+    @property
+    def I(self) -> int:
+        return len(self.reqs)
+
+    @classmethod
+    def load(cls, technicians: Iterable, service_requests: Iterable, assigned_date,
+             warm_start: bool = False) -> 'SolverSnapshot':
+        """
+        Load a snapshot for `assigned_date`.
+
+        `technicians` and `service_requests` may be querysets or iterables of model
+        instances / primary keys. Only technicians with depot coordinates and pending
+        requests with coordinates are kept. Runs four queries regardless of size.
+
+        With `warm_start`, the persisted plan for the date (assignments still in
+        'assigned' status) is re-planned too: its requests are added after the
+        pending ones, its assignments no longer block technician time, and it
+        becomes `initial_routes`. This takes one more query.
+        """
+        date_anchor = assigned_date.date() if isinstance(assigned_date, datetime) else assigned_date
+
+        tech_qs, tech_pks = _as_queryset(Technician, technicians)
+        tech_rows = _ordered(list(
+            tech_qs.filter(depot_lat__isnull=False, depot_lon__isnull=False).values(
+                'id', 'user__username', 'depot_lat', 'depot_lon', 'capacity_minutes',
+                'shift_start', 'shift_end',
+            )
+        ), tech_pks)
+        tech_ids = [row['id'] for row in tech_rows]
+
+        skills_by_tech: Dict[int, set] = {tech_id: set() for tech_id in tech_ids}
+        for tech_id, skill_id in Technician.skills.through.objects.filter(
+            technician_id__in=tech_ids
+        ).values_list('technician_id', 'skill_id'):
+            skills_by_tech[tech_id].add(skill_id)
+
+        techs = [
+            TechnicianRecord(
+                id=row['id'],
+                username=row['user__username'] or 'Unknown',
+                depot_lat=row['depot_lat'],
+                depot_lon=row['depot_lon'],
+                capacity_minutes=row['capacity_minutes'],
+                shift_start=_aware(row['shift_start'], date_anchor),
+                shift_end=_aware(row['shift_end'], date_anchor),
+                skill_ids=frozenset(skills_by_tech[row['id']]),
+            )
+            for row in tech_rows
+        ]
+
+        req_qs, req_pks = _as_queryset(ServiceRequest, service_requests)
+        req_rows = _ordered(list(
+            req_qs.filter(status='pending', lat__isnull=False, lon__isnull=False).values(
+                'id', 'name', 'customer__username', 'lat', 'lon', 'service_minutes',
+                'window_start', 'window_end', 'required_skill_id', 'required_skill__name',
+                'priority',
+            )
+        ), req_pks)
+        reqs = [
+            RequestRecord(
+                id=row['id'],
+                name=row['name'],
+                customer_username=row['customer__username'],
+                lat=row['lat'],
+                lon=row['lon'],
+                service_minutes=row['service_minutes'],
+                window_start=_aware(row['window_start'], date_anchor),
+                window_end=_aware(row['window_end'], date_anchor),
+                required_skill_id=row['required_skill_id'],
+                required_skill_name=row['required_skill__name'],
+                priority=row['priority'],
+            )
+            for row in req_rows
+        ]
+
+        existing_rows = list(Assignment.objects.filter(
+            technician_id__in=tech_ids,
+            assigned_date=date_anchor,
+            status__in=BUSY_STATUSES,
+        ).values(
+            'id', 'technician_id', 'service_request_id', 'planned_start', 'planned_finish',
+            'sequence_order', 'status', 'service_request__status', 'service_request__service_minutes',
+        ).order_by('technician_id', 'sequence_order')) if tech_ids else []
+
+        initial_routes = None
+        if warm_start:
+            planned_rows = [
+                row for row in existing_rows
+                if row['status'] == 'assigned' and row['service_request__status'] == 'assigned'
+            ]
+            planned_ids = {row['service_request_id'] for row in planned_rows}
+            existing_rows = [row for row in existing_rows if row['service_request_id'] not in planned_ids]
+            reqs = [req for req in reqs if req.id not in planned_ids]
+            reqs += [
+                RequestRecord(
+                    id=row['id'],
+                    name=row['name'],
+                    customer_username=row['customer__username'],
+                    lat=row['lat'],
+                    lon=row['lon'],
+                    service_minutes=row['service_minutes'],
+                    window_start=_aware(row['window_start'], date_anchor),
+                    window_end=_aware(row['window_end'], date_anchor),
+                    required_skill_id=row['required_skill_id'],
+                    required_skill_name=row['required_skill__name'],
+                    priority=row['priority'],
+                )
+                for row in ServiceRequest.objects.filter(
+                    pk__in=planned_ids, lat__isnull=False, lon__isnull=False
+                ).values(
+                    'id', 'name', 'customer__username', 'lat', 'lon', 'service_minutes',
+                    'window_start', 'window_end', 'required_skill_id', 'required_skill__name',
+                    'priority',
+                ).order_by('id')
+            ] if planned_ids else []
+
+            tech_index = {tech_id: k for k, tech_id in enumerate(tech_ids)}
+            req_index = {req.id: i for i, req in enumerate(reqs)}
+            initial_routes = [[] for _ in tech_ids]
+            for row in planned_rows:
+                if row['service_request_id'] in req_index:
+                    initial_routes[tech_index[row['technician_id']]].append(req_index[row['service_request_id']])
+
+        def assignment_record(row):
+            return ExistingAssignmentRecord(
+                id=row['id'],
+                technician_id=row['technician_id'],
+                service_request_id=row['service_request_id'],
+                planned_start=row['planned_start'],
+                planned_finish=row['planned_finish'],
+                service_minutes=row['service_request__service_minutes'],
+                sequence_order=row['sequence_order'],
+            )
+
+        existing = [assignment_record(row) for row in existing_rows]
+        planned = [assignment_record(row) for row in planned_rows] if warm_start else None
+
+        return cls(date_anchor, techs, reqs, existing, initial_routes, planned)
+
+    def save(self, file: Union[str, BinaryIO], parameters: Optional[Dict] = None) -> None:
+        """
+        Write the snapshot to `file` as a compressed .npz archive of plain arrays
+        (no pickles), so it can be read back without a database.
+
+        Datetimes are stored as whole seconds from `earliest`, and records
+        column-wise. `parameters` (solver settings, see RoutingService.parameters)
+        are stored alongside as JSON; `read_parameters` returns them.
+        """
+        ref = self.earliest or timezone.make_aware(datetime.combine(self.assigned_date, time_cls.min))
+
+        def seconds_from_ref(value):
+            return int(round((_aware(value, self.assigned_date) - ref).total_seconds()))
+
+        tech_skill_ids, tech_skill_offsets = _pack_lists([sorted(t.skill_ids) for t in self.techs])
+        arrays = {
+            'assigned_date': np.array(self.assigned_date.isoformat()),
+            'ref_timestamp': np.array(ref.timestamp(), dtype=np.float64),
+            'tech_ids': np.array([t.id for t in self.techs], dtype=np.int64),
+            'tech_usernames': np.array([t.username for t in self.techs], dtype=str),
+            'depot_coords': self.depot_coords,
+            'capacities': self.capacities,
+            'tech_shifts': np.array(
+                [(seconds_from_ref(t.shift_start), seconds_from_ref(t.shift_end)) for t in self.techs],
+                dtype=np.int64,
+            ).reshape(-1, 2),
+            'tech_skill_ids': tech_skill_ids,
+            'tech_skill_offsets': tech_skill_offsets,
+            'req_ids': np.array([r.id for r in self.reqs], dtype=np.int64),
+            'req_names': np.array([r.name for r in self.reqs], dtype=str),
+            'req_customers': np.array([r.customer_username or '' for r in self.reqs], dtype=str),
+            'job_coords': self.job_coords,
+            'service_minutes': self.service_minutes,
+            'req_windows': np.array(
+                [(seconds_from_ref(r.window_start), seconds_from_ref(r.window_end)) for r in self.reqs],
+                dtype=np.int64,
+            ).reshape(-1, 2),
+            'job_skill_ids': self.job_skill_ids,
+            'req_skill_names': np.array([r.required_skill_name or '' for r in self.reqs], dtype=str),
+            'req_priorities': np.array([r.priority for r in self.reqs], dtype=np.int64),
+            'existing': _pack_assignments(self.existing, seconds_from_ref),
+            'planned': _pack_assignments(self.planned, seconds_from_ref),
+        }
+        if self.initial_routes is not None:
+            arrays['route_nodes'], arrays['route_offsets'] = _pack_lists(self.initial_routes)
+        if parameters is not None:
+            arrays['parameters'] = np.array(json.dumps(parameters))
+        np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def from_file(cls, file: Union[str, BinaryIO]) -> 'SolverSnapshot':
+        """Read a snapshot written by `save`"""
+        with np.load(file, allow_pickle=False) as data:
+            ref = datetime.fromtimestamp(float(data['ref_timestamp']), tz=dt_timezone.utc)
+            techs = [
+                TechnicianRecord(
+                    id=tech_id, username=username,
+                    depot_lat=lat, depot_lon=lon, capacity_minutes=capacity,
+                    shift_start=ref + timedelta(seconds=start), shift_end=ref + timedelta(seconds=end),
+                    skill_ids=frozenset(skill_ids),
+                )
+                for tech_id, username, (lat, lon), capacity, (start, end), skill_ids in zip(
+                    data['tech_ids'].tolist(), data['tech_usernames'].tolist(), data['depot_coords'].tolist(),
+                    data['capacities'].tolist(), data['tech_shifts'].tolist(),
+                    _unpack_lists(data['tech_skill_ids'], data['tech_skill_offsets']),
+                )
+            ]
+            reqs = [
+                RequestRecord(
+                    id=req_id, name=name, customer_username=customer or None,
+                    lat=lat, lon=lon, service_minutes=service,
+                    window_start=ref + timedelta(seconds=start), window_end=ref + timedelta(seconds=end),
+                    required_skill_id=skill_id if skill_id >= 0 else None,
+                    required_skill_name=skill_name or None, priority=priority,
+                )
+                for req_id, name, customer, (lat, lon), service, (start, end), skill_id, skill_name, priority in zip(
+                    data['req_ids'].tolist(), data['req_names'].tolist(), data['req_customers'].tolist(),
+                    data['job_coords'].tolist(), data['service_minutes'].tolist(), data['req_windows'].tolist(),
+                    data['job_skill_ids'].tolist(), data['req_skill_names'].tolist(), data['req_priorities'].tolist(),
+                )
+            ]
+            initial_routes = (
+                _unpack_lists(data['route_nodes'], data['route_offsets']) if 'route_nodes' in data else None
+            )
+            return cls(
+                date.fromisoformat(str(data['assigned_date'])), techs, reqs,
+                _unpack_assignments(data['existing'], ref), initial_routes, _unpack_assignments(data['planned'], ref),
+            )
+
+    @staticmethod
+    def read_parameters(file: Union[str, BinaryIO]) -> Dict:
+        """Solver parameters stored by `save` (empty when none were)"""
+        with np.load(file, allow_pickle=False) as data:
+            return json.loads(str(data['parameters'])) if 'parameters' in data else {}
+
+    def _build_arrays(self):
+        """Validate windows and pack the numeric model inputs into arrays"""
+        techs, reqs = self.techs, self.reqs
+
+        for k, tech in enumerate(techs):
+            if tech.shift_start is None:
+                raise ValueError(f"Technician {k} ({tech.username}) has no shift_start")
+            if tech.shift_end is None:
+                raise ValueError(f"Technician {k} ({tech.username}) has no shift_end")
+            if tech.shift_end <= tech.shift_start:
+                raise ValueError(
+                    f"Technician {k} ({tech.username}) has invalid shift: "
+                    f"shift_end ({tech.shift_end}) must be after shift_start ({tech.shift_start})"
+                )
+        for i, req in enumerate(reqs):
+            if req.window_start is None:
+                raise ValueError(f"Service request {i} ({req.name}) has no window_start")
+            if req.window_end is None:
+                raise ValueError(f"Service request {i} ({req.name}) has no window_end")
+            if req.window_end <= req.window_start:
+                raise ValueError(
+                    f"Service request {i} ({req.name}) has invalid time window: "
+                    f"window_end ({req.window_end}) must be after window_start ({req.window_start})"
+                )
+
+        starts = [t.shift_start for t in techs] + [r.window_start for r in reqs]
+        self.earliest = min(starts) if starts else None
+
+        self.depot_coords = np.array([(t.depot_lat, t.depot_lon) for t in techs], dtype=np.float64).reshape(-1, 2)
+        self.job_coords = np.array([(r.lat, r.lon) for r in reqs], dtype=np.float64).reshape(-1, 2)
+        self.tech_windows = np.array(
+            [(self.minutes_from_ref(t.shift_start), self.minutes_from_ref(t.shift_end)) for t in techs],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        self.job_windows = np.array(
+            [(self.minutes_from_ref(r.window_start), self.minutes_from_ref(r.window_end)) for r in reqs],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        self.service_minutes = np.array([r.service_minutes for r in reqs], dtype=np.int32)
+        self.capacities = np.array([t.capacity_minutes for t in techs], dtype=np.int32)
+        self.job_skill_ids = np.array(
+            [r.required_skill_id if r.required_skill_id is not None else -1 for r in reqs], dtype=np.int64
+        )
+
+        tech_index = {t.id: k for k, t in enumerate(techs)}
+        existing = [e for e in self.existing if e.technician_id in tech_index]
+        self.existing_tech_idx = np.array([tech_index[e.technician_id] for e in existing], dtype=np.int32)
+        self.existing_windows = np.array(
+            [tuple(map(self.minutes_from_ref, busy_span(e.planned_start, e.planned_finish, e.service_minutes)))
+             for e in existing],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+
+    def subset(self, tech_idx: Iterable[int], req_idx: Iterable[int]) -> 'SolverSnapshot':
+        """Sub-problem over the technicians and requests at the given positions"""
+        tech_idx, req_idx = list(tech_idx), list(req_idx)
+        techs = [self.techs[k] for k in tech_idx]
+        tech_ids = {tech.id for tech in techs}
+        initial_routes = None
+        if self.initial_routes is not None:
+            new_pos = {i: n for n, i in enumerate(req_idx)}
+            initial_routes = [[new_pos[i] for i in self.initial_routes[k] if i in new_pos] for k in tech_idx]
+        return SolverSnapshot(
+            self.assigned_date, techs, [self.reqs[i] for i in req_idx],
+            [e for e in self.existing if e.technician_id in tech_ids],
+            initial_routes,
+            [p for p in self.planned if p.technician_id in tech_ids],
+        )
+
+    def busy_index(self) -> IntervalIndex:
+        """Committed busy windows as an interval index keyed by technician position"""
+        return IntervalIndex(
+            (k, start, end)
+            for k, (start, end) in zip(self.existing_tech_idx.tolist(), self.existing_windows.tolist())
+        )
+
+    def minutes_from_ref(self, value) -> int:
+        """Whole minutes from the snapshot reference time to `value`"""
+        value = _aware(value, self.assigned_date)
+        return int(round((value - self.earliest).total_seconds() / 60.0))
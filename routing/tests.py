@@ -1,3 +1,865 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from time import monotonic
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Assignment, GoogleMapsConfig, ServiceRequest, Skill, Technician
+from routing.alns import ALNS
+from routing.backends import ALNSBackend, ORToolsBackend, PortfolioBackend
+from routing.batch import plan_dates
+from routing.benchmark import routing_data, synthetic_snapshot
+from routing.construction import construct_routes
+from routing.decomposition import geographic_partition, skill_partition
+from routing.eligibility import EligibilityMatrix
+from routing.intervals import IntervalIndex
+from routing.jobs import (
+    CancelCheck, JobProgress, _run_solve_job, accept_solve_job, active_job, cancel_solve_job, convergence,
+    recover_stale_jobs, record_run, unserved_summary,
+)
+from routing.models import SolutionPoint, SolveJob, SolveRun
+from routing.persistence import commit_plan
+from routing.portfolio import solve_portfolio
+from routing.report import SolveReport
+from routing.routes import plan_from_routes
+from routing.services import RoutingService, SolveCancelled
+from routing.snapshot import (
+    ExistingAssignmentRecord, RequestRecord, SolverSnapshot, TechnicianRecord, candidate_requests,
+)
+
+DAY = date(2026, 11, 2)
+DEPOT = (-37.8136, 144.9631)
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime.combine(DAY, time(hour, minute)))
+
+
+def tech_record(tech_id, skills=(), shift=(8, 16)):
+    return TechnicianRecord(tech_id, f'tech{tech_id}', *DEPOT, (shift[1] - shift[0]) * 60,
+                            at(shift[0]), at(shift[1]), frozenset(skills))
+
+
+def request_record(request_id, window=(9, 12), skill=None, service=60):
+    return RequestRecord(request_id, f'request{request_id}', f'customer{request_id}', -37.82, 144.97, service,
+                         at(window[0]), at(window[1]), skill, f'skill{skill}' if skill else None)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = IntervalIndex([(1, 0, 10), (1, 5, 20), (1, 20, 30), (1, 40, 50), (2, 5, 5)])
+
+    def test_merges_overlapping_and_touching_intervals(self):
+        self.assertEqual(self.index.busy(1), [(0, 30), (40, 50)])
+        self.assertEqual(len(self.index), 2)
+
+    def test_skips_empty_intervals(self):
+        self.assertNotIn(2, self.index)
+        self.assertEqual(self.index.busy(2), [])
+
+    def test_overlaps_many_is_half_open(self):
+        overlaps = self.index.overlaps_many(1, [25, 30, 35, 45, 50, -5], [35, 40, 40, 46, 60, 0])
+        np.testing.assert_array_equal(overlaps, [True, False, False, True, False, False])
+        self.assertFalse(self.index.overlaps_many(3, [0], [100]).any())
+
+    def test_free_slots(self):
+        self.assertEqual(self.index.free_slots(1, 0, 60), [(30, 40), (50, 60)])
+        self.assertEqual(self.index.free_slots(1, 10, 45), [(30, 40)])
+        self.assertEqual(self.index.free_slots(3, 0, 60), [(0, 60)])
+
+    def test_from_assignments_spans_service_buffer_of_busy_rows(self):
+        service_request = ServiceRequest(service_minutes=30)
+        assignments = [
+            Assignment(technician_id=7, service_request=service_request, status='assigned',
+                       planned_start=at(9), planned_finish=at(10)),
+            Assignment(technician_id=7, service_request=service_request, status='completed',
+                       planned_start=at(12), planned_finish=at(13)),
+        ]
+        index = IntervalIndex.from_assignments(assignments)
+        self.assertEqual(index.busy(7), [(at(9), at(10, 30))])
+
+
+class EligibilityMatrixTests(SimpleTestCase):
+    def setUp(self):
+        self.snapshot = SolverSnapshot(DAY, [
+            tech_record(1, skills={1}),
+            tech_record(2, skills={2}, shift=(8, 12)),
+            tech_record(3, skills={1, 2}, shift=(13, 17)),
+        ], [
+            request_record(1, window=(9, 12), skill=1),
+            request_record(2, window=(14, 15), skill=2),
+            request_record(3, window=(8, 9)),
+            request_record(4, window=(9, 12), skill=9),
+        ])
+        # Depot to request travel: 90 minutes to request 3 from the first depot, 10 otherwise
+        K, I = self.snapshot.K, self.snapshot.I
+        self.travel = np.full((K + I, K + I), 10.0)
+        self.travel[0, K + 2] = 90.0
+
+    def test_checks(self):
+        eligibility = EligibilityMatrix.build(self.snapshot, self.travel)
+        np.testing.assert_array_equal(eligibility.skill_ok, [
+            [True, False, True],
+            [False, True, True],
+            [True, True, True],
+            [False, False, False],
+        ])
+        np.testing.assert_array_equal(eligibility.shift_ok, [
+            [True, True, False],
+            [True, False, True],
+            [True, True, False],
+            [True, True, False],
+        ])
+        np.testing.assert_array_equal(eligibility.reachable[2], [False, True, False])
+        np.testing.assert_array_equal(eligibility.allowed, [
+            [True, False, False],
+            [False, False, True],
+            [False, True, False],
+            [False, False, False],
+        ])
+
+    def test_restrict(self):
+        eligibility = EligibilityMatrix.build(self.snapshot, self.travel)
+        free = np.ones((self.snapshot.I, self.snapshot.K), dtype=bool)
+        free[0, 0] = False
+        eligibility.restrict(free)
+        self.assertFalse(eligibility.allowed[0].any())
+        self.assertTrue(eligibility.allowed[1, 2])
+
+
+class SkillPartitionTests(SimpleTestCase):
+    def test_components_of_shared_skills(self):
+        snapshot = SolverSnapshot(DAY, [
+            tech_record(1, skills={1}),
+            tech_record(2, skills={2}),
+            tech_record(3, skills={2, 3}),
+            tech_record(4, skills={4}),
+        ], [request_record(n, skill=skill) for n, skill in enumerate([1, 3, 2, 4, 9], start=1)])
+        partition = skill_partition(snapshot)
+        self.assertEqual(partition.n_parts, 3)
+        np.testing.assert_array_equal(partition.tech_labels, [0, 1, 1, 2])
+        np.testing.assert_array_equal(partition.req_labels, [0, 1, 1, 2, 0])
+        tech_idx, req_idx = partition.parts()[1]
+        np.testing.assert_array_equal(tech_idx, [1, 2])
+        np.testing.assert_array_equal(req_idx, [1, 2])
+
+    def test_request_without_skill_joins_everyone(self):
+        snapshot = SolverSnapshot(DAY, [tech_record(1, skills={1}), tech_record(2, skills={2})],
+                                  [request_record(1, skill=1), request_record(2)])
+        partition = skill_partition(snapshot)
+        self.assertEqual(partition.n_parts, 1)
+        np.testing.assert_array_equal(partition.req_labels, [0, 0])
+
+
+CBD = (-37.8136, 144.9631)
+DANDENONG = (-37.9870, 145.2140)
+
+
+class GeographicDecompositionTests(SimpleTestCase):
+    """A technician in the CBD and one in Dandenong, about 45 minutes apart at 40 km/h"""
+
+    def make_snapshot(self, cbd_windows, dandenong_windows):
+        techs = [TechnicianRecord(k + 1, f'tech{k + 1}', *depot, 480, at(8), at(16), frozenset())
+                 for k, depot in enumerate([CBD, DANDENONG])]
+        places = [CBD] * len(cbd_windows) + [DANDENONG] * len(dandenong_windows)
+        reqs = [RequestRecord(n, f'request{n}', f'customer{n}', lat + 0.001 * n, lon, 60,
+                              at(window[0]), at(window[1]), None, None)
+                for n, ((lat, lon), window) in enumerate(zip(places, cbd_windows + dandenong_windows), start=1)]
+        return SolverSnapshot(DAY, techs, reqs)
+
+    def test_regions_follow_the_depots(self):
+        snapshot = self.make_snapshot([(9, 12)] * 3, [(9, 12)] * 3)
+        partition = geographic_partition(snapshot, target_requests=3)
+        self.assertEqual(partition.n_parts, 2)
+        cbd, dandenong = partition.tech_labels
+        np.testing.assert_array_equal(partition.req_labels, [cbd] * 3 + [dandenong] * 3)
+        np.testing.assert_array_equal(partition.req_preference[:, 0], partition.req_labels)
+        np.testing.assert_array_equal(partition.req_preference[:3, 1], [dandenong] * 3)
+
+    def test_one_region_when_small(self):
+        partition = geographic_partition(self.make_snapshot([(9, 12)] * 3, [(9, 12)] * 3), target_requests=10)
+        self.assertEqual(partition.n_parts, 1)
+        self.assertFalse(partition.req_labels.any())
+
+    def test_every_region_has_a_technician(self):
+        snapshot = self.make_snapshot([(9, 12)] * 3, [(9, 12)] * 3)
+        snapshot = snapshot.subset(np.array([0]), np.arange(6))
+        partition = geographic_partition(snapshot, target_requests=3)
+        self.assertEqual(partition.n_parts, 1)
+
+    @override_settings(ROUTING_DECOMPOSE_MIN_REQUESTS=0)
+    def test_request_dropped_in_its_region_is_served_by_the_next(self):
+        # The CBD technician can start two of the three 9:00-10:00 visits; the third goes to Dandenong
+        snapshot = self.make_snapshot([(9, 10)] * 3, [(9, 16)])
+        config = GoogleMapsConfig(region_target_requests=2, time_limit_seconds=2)
+        assignments, unserved, _ = RoutingService(config).solve_decomposed(snapshot, geographic=True)
+        self.assertEqual(unserved, [])
+        technicians = {a['service_request_id']: a['technician_id'] for a in assignments}
+        self.assertEqual(sorted(technicians.values()), [1, 1, 2, 2])
+        self.assertEqual(technicians[4], 2)
+
+
+@override_settings(ROUTING_DECOMPOSE_MIN_REQUESTS=0)
+class AssignThenSequenceTests(SimpleTestCase):
+    """Two technicians at one depot; only the first holds skill 1"""
+
+    def setUp(self):
+        self.service = RoutingService(GoogleMapsConfig(time_limit_seconds=2))
+
+    def test_repair_moves_requests_between_routes(self):
+        # The greedy plan gives the first two-hour 10:00-11:00 visit to technician 1,
+        # leaving no room for the second, which needs their skill
+        snapshot = SolverSnapshot(DAY, [tech_record(1, skills={1}), tech_record(2)],
+                                  [request_record(1, (10, 11), service=120),
+                                   request_record(2, (10, 11), skill=1, service=120)])
+        _, greedy_unserved, _ = self.service.solve_snapshot(snapshot, backend='greedy')
+        self.assertEqual([item['request_id'] for item in greedy_unserved], [2])
+
+        report = SolveReport()
+        assignments, unserved, _ = self.service.solve_decomposed(snapshot, report=report, assign_then_sequence=True)
+        self.assertEqual(unserved, [])
+        self.assertEqual({a['service_request_id']: a['technician_id'] for a in assignments}, {1: 2, 2: 1})
+        self.assertIn('assignment', report.phases)
+
+
+class SolveReportTests(SimpleTestCase):
+    def make_report(self, phases, **fields):
+        report = SolveReport()
+        for name, (wall, cpu) in phases.items():
+            report.add_phase(name, wall, cpu)
+        for field, value in fields.items():
+            setattr(report, field, value)
+        return report
+
+    def test_phases_accumulate(self):
+        report = SolveReport()
+        for _ in range(2):
+            with report.phase('matrix'):
+                sum(range(1000))
+        report.lap('model_build')
+        self.assertEqual(list(report.phases), ['matrix', 'model_build'])
+        self.assertGreater(report.phases['matrix']['wall'], 0)
+        self.assertAlmostEqual(report.phase_wall_seconds,
+                               report.phases['matrix']['wall'] + report.phases['model_build']['wall'])
+
+    def test_elapsed_time_is_fixed_by_finish(self):
+        report = self.make_report({'search': (5.0, 4.0)})
+        # Phase times are summed separately and may exceed the elapsed time (parallel parts)
+        self.assertLess(report.wall_seconds, report.phase_wall_seconds)
+        report.finish()
+        self.assertIsNotNone(report.elapsed)
+        self.assertEqual(report.wall_seconds, report.elapsed)
+        self.assertEqual(report.to_dict()['wall_seconds'], round(report.elapsed, 4))
+        self.assertEqual(report.to_dict()['phase_wall_seconds'], 5.0)
+
+    def test_absorb(self):
+        report = self.make_report({'matrix': (1.0, 1.0)}, nodes=10, vehicles=2, peak_rss_kb=100)
+        part = self.make_report({'matrix': (0.5, 0.5), 'search': (2.0, 2.0)}, nodes=5, vehicles=1,
+                                strategy='greedy_seed', peak_rss_kb=300, assigned_count=4)
+        report.absorb(part)
+        report.absorb(part, model=False)
+        self.assertEqual(report.phases, {'matrix': {'wall': 2.0, 'cpu': 2.0}, 'search': {'wall': 4.0, 'cpu': 4.0}})
+        self.assertEqual((report.nodes, report.vehicles, report.strategy), (15, 3, 'greedy_seed'))
+        self.assertEqual((report.peak_rss_kb, report.assigned_count), (300, 0))
+        self.assertEqual(report.cpu_seconds, 6.0)
+
+    def test_dict_round_trip(self):
+        report = self.make_report({'matrix': (0.25, 0.125)}, nodes=7, requests=5, assigned_count=4,
+                                  dropped_count=1, objective=1234, strategy='warm_start', parts=2)
+        data = report.finish().to_dict()
+        self.assertEqual(SolveReport.from_dict(data).to_dict(), data)
+        self.assertIn('elapsed', report.format())
+
+class SnapshotFileTests(SimpleTestCase):
+    def test_save_and_from_file_round_trip(self):
+        existing = [ExistingAssignmentRecord(11, 2, 90, at(8, 30), at(9), 30)]
+        planned = [ExistingAssignmentRecord(12, 1, 2, at(10), at(11), 60, sequence_order=1)]
+        snapshot = SolverSnapshot(
+            DAY,
+            [tech_record(1, skills={1, 3}), tech_record(2, shift=(7, 15))],
+            [request_record(1, skill=1, service=45), request_record(2, window=(10, 14))],
+            existing=existing, initial_routes=[[1], []], planned=planned,
+        )
+        buffer = io.BytesIO()
+        snapshot.save(buffer, parameters={'time_limit_seconds': 5})
+        buffer.seek(0)
+        loaded = SolverSnapshot.from_file(buffer)
+
+        self.assertEqual(loaded.assigned_date, DAY)
+        self.assertEqual(loaded.earliest, snapshot.earliest)
+        self.assertEqual([(t.id, t.username, t.skill_ids, t.shift_start, t.shift_end) for t in loaded.techs],
+                         [(t.id, t.username, t.skill_ids, t.shift_start, t.shift_end) for t in snapshot.techs])
+        self.assertEqual(
+            [(r.id, r.name, r.customer_username, r.window_start, r.required_skill_id, r.required_skill_name)
+             for r in loaded.reqs],
+            [(r.id, r.name, r.customer_username, r.window_start, r.required_skill_id, r.required_skill_name)
+             for r in snapshot.reqs],
+        )
+        for name in ('depot_coords', 'job_coords', 'tech_windows', 'job_windows', 'service_minutes',
+                     'capacities', 'job_skill_ids', 'existing_tech_idx', 'existing_windows'):
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(snapshot, name), err_msg=name)
+        self.assertEqual(loaded.initial_routes, [[1], []])
+        self.assertEqual([(p.id, p.planned_start, p.sequence_order) for p in loaded.planned],
+                         [(12, at(10), 1)])
+        buffer.seek(0)
+        self.assertEqual(SolverSnapshot.read_parameters(buffer), {'time_limit_seconds': 5})
+
+class SearchTestCase(SimpleTestCase):
+    """A small synthetic day (tight windows, so not every request fits) and its greedy plan"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.data = routing_data(synthetic_snapshot(40, 8, seed=3))
+        cls.seed = construct_routes(cls.data)
+
+
+class PortfolioTests(SearchTestCase):
+    def test_members_search_from_the_start_plan(self):
+        best, results = solve_portfolio(self.data, 1.0, 2, plateau=0.3, initial_routes=self.seed.routes)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(best['objective'], min(result['objective'] for result in results))
+        seeded = next(result for result in results if result['label'] == 'PATH_CHEAPEST_ARC+TABU_SEARCH')
+        self.assertLessEqual(seeded['objective'], self.seed.objective)
+
+    @override_settings(ROUTING_PORTFOLIO_WORKERS=1)
+    def test_backend_starts_from_the_greedy_plan(self):
+        report = SolveReport()
+        plan = PortfolioBackend().search(self.data, 1.0, plateau=0.3, seed=self.seed, report=report)
+        self.assertLessEqual(plan.objective, self.seed.objective)
+        self.assertGreaterEqual(plan.served, self.seed.served)
+        self.assertIn('search:portfolio', report.phases)
+
+class SearchBudgetTests(SearchTestCase):
+    def budget(self, n_requests, time_limit=None, **config):
+        return RoutingService(GoogleMapsConfig(**config)).search_budget(n_requests, time_limit)
+
+    def test_grows_with_the_request_count(self):
+        self.assertEqual(self.budget(0, time_limit_seconds=10, plateau_seconds=3.0), (0.5, 0.2))
+        self.assertEqual(self.budget(100, time_limit_seconds=10, plateau_seconds=3.0), (5.5, 1.1))
+        self.assertEqual(self.budget(1000, time_limit_seconds=10, plateau_seconds=3.0), (10, 2.0))
+        self.assertEqual(self.budget(100000, time_limit_seconds=100, plateau_seconds=3.0), (30, 3.0))
+        self.assertEqual(self.budget(100, time_limit=2, time_limit_seconds=10, plateau_seconds=3.0), (2, 0.4))
+
+    def test_fixed_limit_and_no_plateau(self):
+        self.assertEqual(self.budget(0, time_limit_seconds=10, adaptive_time_limit=False, plateau_seconds=0), (10, None))
+
+    def test_plateau_ends_the_search(self):
+        started = monotonic()
+        plan = ORToolsBackend().search(self.data, 30, plateau=0.3, seed=self.seed)
+        self.assertLess(monotonic() - started, 10)
+        self.assertLessEqual(plan.objective, self.seed.objective)
+
+class RecordedProgress:
+    """`progress` hook that keeps what the search publishes and asks it to finish once `accept` is set"""
+
+    def __init__(self, accept=False):
+        self.points = []
+        self.accept = accept
+
+    def publish(self, objective, served):
+        self.points.append((objective, served))
+
+    def accept_requested(self):
+        return self.accept
+
+
+class ProgressTests(SearchTestCase):
+    def test_publishes_improving_solutions(self):
+        progress = RecordedProgress()
+        plan = ORToolsBackend().search(self.data, 1.0, plateau=0.3, seed=self.seed, progress=progress)
+        self.assertTrue(progress.points)
+        self.assertEqual(progress.points, sorted(progress.points, reverse=True))
+        self.assertGreaterEqual(progress.points[-1][0], plan.objective)
+
+    def test_accept_ends_the_search_with_the_current_plan(self):
+        started = monotonic()
+        plan = ORToolsBackend().search(self.data, 30, seed=self.seed, progress=RecordedProgress(accept=True))
+        self.assertLess(monotonic() - started, 10)
+        self.assertLessEqual(plan.objective, self.seed.objective)
+
+
+class ConstructRoutesTests(SearchTestCase):
+    def test_routes_are_a_feasible_plan(self):
+        plan = plan_from_routes(self.data, self.seed.routes)
+        self.assertIsNotNone(plan)
+        self.assertEqual(plan.objective, self.seed.objective)
+        np.testing.assert_array_equal(plan.starts, self.seed.starts)
+        served = [i for route in self.seed.routes for i in route]
+        self.assertEqual(len(served), len(set(served)))
+        self.assertTrue(0 < self.seed.served < self.data.I)
+
+    def test_respects_eligibility_windows_and_capacity(self):
+        data, K = self.data, self.data.K
+        for k, route in enumerate(self.seed.routes):
+            self.assertTrue(data.allowed[route, k].all())
+            self.assertLessEqual(int(data.demands[K + np.asarray(route, dtype=int)].sum()), data.capacities[k])
+        served = self.seed.starts >= 0
+        self.assertTrue((self.seed.starts[served] >= data.tw_start[K:][served]).all())
+        self.assertTrue((self.seed.starts[served] <= data.tw_end[K:][served]).all())
+
+    def test_no_requests(self):
+        plan = construct_routes(routing_data(synthetic_snapshot(0, 3)))
+        self.assertEqual(plan.routes, [[], [], []])
+        self.assertEqual((plan.served, plan.objective), (0, 0))
+
+
+class ALNSTests(SearchTestCase):
+    def test_improves_on_the_start_plan(self):
+        plan = ALNS(self.data, seed=0).search(self.seed, 1.0, plateau=0.3)
+        self.assertLessEqual(plan.objective, self.seed.objective)
+        self.assertEqual(plan_from_routes(self.data, plan.routes).objective, plan.objective)
+
+    def test_finish_keeps_the_start_plan(self):
+        plan = ALNS(self.data).search(self.seed, 30, should_finish=lambda: True)
+        self.assertIs(plan, self.seed)
+
+    def test_backend_starts_from_the_greedy_plan_when_the_warm_start_is_infeasible(self):
+        everything = [list(range(self.data.I))] + [[] for _ in range(self.data.K - 1)]
+        report = SolveReport()
+        plan = ALNSBackend().search(self.data, 1.0, plateau=0.3, warm_routes=everything, seed=self.seed,
+                                    report=report)
+        self.assertEqual(report.strategy, 'alns')
+        self.assertLessEqual(plan.objective, self.seed.objective)
+        self.assertIsNone(ALNSBackend().search(self.data, 1.0, warm_routes=everything))
+
+
+class PlanTestCase(TestCase):
+    """A technician whose depot is at every request's address, so travel takes no time"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.customer = User.objects.create(username='customer', role='CUSTOMER')
+        self.skill = Skill.objects.create(name='Gas')
+        self.technician = self.make_technician('tech1')
+
+    def make_technician(self, username):
+        technician = Technician.objects.create(
+            user=get_user_model().objects.create(username=username, role='TECHNICIAN'),
+            depot_address='Depot', depot_lat=DEPOT[0], depot_lon=DEPOT[1],
+            shift_start=time(8), shift_end=time(16),
+        )
+        technician.skills.add(self.skill)
+        return technician
+
+    def make_request(self, name, window=(at(9), at(12)), service=60, skill=None):
+        return ServiceRequest.objects.create(
+            customer=self.customer, name=name, address='Address', lat=DEPOT[0], lon=DEPOT[1],
+            service_minutes=service, window_start=window[0], window_end=window[1], required_skill=skill,
+        )
+
+    def plan(self, service_request, sequence_order, start, technician=None, service=60):
+        return Assignment.objects.create(
+            service_request=service_request, technician=technician or self.technician, assigned_date=DAY,
+            sequence_order=sequence_order, planned_start=start, planned_finish=start + timedelta(minutes=service),
+        )
+
+
+class CommitPlanTests(PlanTestCase):
+    def assignment_data(self, service_request, sequence_order, start, technician=None):
+        return {
+            'service_request': service_request,
+            'technician': technician or self.technician,
+            'sequence_order': sequence_order,
+            'planned_start': start,
+            'planned_finish': start + timedelta(minutes=60),
+            'travel_time': 0.0,
+        }
+
+    def test_creates_updates_and_deletes_only_what_changed(self):
+        unchanged, moved, new, released = (self.make_request(name) for name in ('a', 'b', 'c', 'd'))
+        kept_row = self.plan(unchanged, 1, at(9))
+        moved_row = self.plan(moved, 2, at(10))
+        self.plan(released, 3, at(11))
+        other = self.make_technician('tech2')
+        kept_updated_at = Assignment.objects.get(pk=kept_row.pk).updated_at
+
+        changeset = commit_plan([
+            self.assignment_data(unchanged, 1, at(9)),
+            self.assignment_data(moved, 1, at(10), technician=other),
+            self.assignment_data(new, 2, at(11), technician=other),
+        ], DAY, released_request_ids=[released.pk])
+
+        self.assertEqual(
+            (changeset['created_count'], changeset['updated_count'], changeset['deleted_count'],
+             changeset['unchanged_count']),
+            (1, 1, 1, 1),
+        )
+        self.assertEqual(sorted(change['action'] for change in changeset['changes']), ['created', 'deleted', 'updated'])
+        updated = next(change for change in changeset['changes'] if change['action'] == 'updated')
+        self.assertEqual(updated['fields'], ['technician', 'sequence_order'])
+
+        self.assertEqual(Assignment.objects.get(pk=kept_row.pk).updated_at, kept_updated_at)
+        moved_row.refresh_from_db()
+        self.assertEqual((moved_row.technician, moved_row.sequence_order), (other, 1))
+        self.assertEqual(Assignment.objects.get(service_request=new).technician, other)
+        self.assertFalse(Assignment.objects.filter(service_request=released).exists())
+
+        statuses = dict(ServiceRequest.objects.values_list('name', 'status'))
+        self.assertEqual(statuses, {'a': 'assigned', 'b': 'assigned', 'c': 'assigned', 'd': 'pending'})
+
+    def test_releases_without_per_row_signals(self):
+        released, kept = self.make_request('released'), self.make_request('kept')
+        self.plan(released, 1, at(9))
+        self.plan(kept, 2, at(10))
+        # Still planned on another day, so it stays assigned
+        Assignment.objects.create(service_request=kept, technician=self.technician,
+                                  assigned_date=DAY + timedelta(days=1), sequence_order=1,
+                                  planned_start=at(9) + timedelta(days=1), planned_finish=at(10) + timedelta(days=1))
+        deleted = []
+        post_delete.connect(lambda **kwargs: deleted.append(kwargs['instance']), sender=Assignment,
+                            dispatch_uid='commit_plan_test', weak=False)
+        self.addCleanup(post_delete.disconnect, sender=Assignment, dispatch_uid='commit_plan_test')
+
+        changeset = commit_plan([], DAY, released_request_ids=[released.pk, kept.pk])
+
+        self.assertEqual(changeset['deleted_count'], 2)
+        self.assertEqual(deleted, [])
+        self.assertFalse(Assignment.objects.filter(assigned_date=DAY).exists())
+        self.assertEqual(dict(ServiceRequest.objects.values_list('name', 'status')),
+                         {'released': 'pending', 'kept': 'assigned'})
+
+    def test_same_plan_twice_writes_nothing(self):
+        service_request = self.make_request('a')
+        plan = [self.assignment_data(service_request, 1, at(9))]
+        commit_plan(plan, DAY)
+        changeset = commit_plan(plan, DAY)
+        self.assertEqual((changeset['created_count'], changeset['updated_count'], changeset['unchanged_count']),
+                         (0, 0, 1))
+
+
+class InsertRequestTests(PlanTestCase):
+    def setUp(self):
+        super().setUp()
+        # Back-to-back 9:00-10:00 and 10:00-11:00, as the model plans them without travel
+        self.first = self.make_request('first', window=(at(9), at(10)))
+        self.second = self.make_request('second', window=(at(10), at(13)))
+        self.plan(self.first, 1, at(9))
+        self.plan(self.second, 2, at(10))
+
+    def planned(self):
+        return [
+            (a.service_request.name, timezone.localtime(a.planned_start).time(), a.sequence_order)
+            for a in Assignment.objects.filter(assigned_date=DAY).select_related('service_request')
+            .order_by('sequence_order')
+        ]
+
+    def test_inserts_first_as_late_as_the_first_stop_allows(self):
+        new = self.make_request('new', window=(at(8), at(9)), service=30)
+        result = RoutingService().insert_request(new, DAY)
+        self.assertEqual(result['technician'], self.technician)
+        self.assertEqual(result['shifted_count'], 2)
+        self.assertEqual(self.planned(), [('new', time(8, 30), 1), ('first', time(9), 2), ('second', time(10), 3)])
+
+    def test_pushes_later_stops_only(self):
+        new = self.make_request('new', window=(at(10), at(10, 15)), service=30)
+        result = RoutingService().insert_request(new, DAY)
+        self.assertEqual(result['shifted_count'], 1)
+        self.assertEqual(self.planned(), [('first', time(9), 1), ('new', time(10), 2), ('second', time(10, 30), 3)])
+
+    def test_earlier_stops_do_not_move_to_reach_a_window(self):
+        # Appending at 11:00 would mean waiting for the window; the model has no waiting,
+        # and only the stops after the job may move
+        new = self.make_request('new', window=(at(11, 30), at(11, 45)), service=30)
+        self.assertIsNone(RoutingService().insert_request(new, DAY))
+        self.assertEqual(self.planned(), [('first', time(9), 1), ('second', time(10), 2)])
+
+    def test_moved_stops_stay_clear_of_work_in_progress(self):
+        busy = self.make_request('busy', window=(at(11), at(12)))
+        in_progress = self.plan(busy, 3, at(11))
+        in_progress.status = 'in_progress'
+        in_progress.save()
+        new = self.make_request('new', window=(at(10), at(10, 15)), service=30)
+        self.assertIsNone(RoutingService().insert_request(new, DAY))
+        self.assertEqual(Assignment.objects.filter(service_request=new).count(), 0)
+
+    def test_route_with_a_stop_the_technician_could_not_take(self):
+        # Planned before the technician lost the skill: only the new job's eligibility counts
+        self.first.required_skill = Skill.objects.create(name='Electric')
+        self.first.save()
+        new = self.make_request('new', window=(at(10), at(10, 15)), service=30)
+        result = RoutingService().insert_request(new, DAY)
+        self.assertEqual(result['technician'], self.technician)
+        self.assertEqual(self.planned(), [('first', time(9), 1), ('new', time(10), 2), ('second', time(10, 30), 3)])
+
+    def test_no_feasible_position(self):
+        outside_shift = self.make_request('late', window=(at(17), at(18)))
+        missing_skill = self.make_request('skilled', skill=Skill.objects.create(name='Electric'))
+        for service_request in (outside_shift, missing_skill):
+            self.assertIsNone(RoutingService().insert_request(service_request, DAY))
+        self.assertEqual(Assignment.objects.count(), 2)
+
+
+class WarmStartTests(PlanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.make_request('first', window=(at(9), at(10)))
+        self.second = self.make_request('second', window=(at(10), at(13)))
+        self.busy = self.make_request('busy', window=(at(13), at(14)))
+        self.new = self.make_request('new', window=(at(11), at(12)))
+        self.plan(self.second, 2, at(10))
+        self.plan(self.first, 1, at(9))
+        in_progress = self.plan(self.busy, 3, at(13))
+        in_progress.status = 'in_progress'
+        in_progress.save()
+
+    def test_snapshot_replans_the_persisted_plan(self):
+        cold = SolverSnapshot.load([self.technician], ServiceRequest.objects.all(), DAY)
+        self.assertEqual([req.name for req in cold.reqs], ['new'])
+        self.assertEqual(len(cold.existing), 3)
+        self.assertIsNone(cold.initial_routes)
+
+        warm = SolverSnapshot.load([self.technician], ServiceRequest.objects.all(), DAY, warm_start=True)
+        self.assertEqual([req.name for req in warm.reqs], ['new', 'first', 'second'])
+        self.assertEqual(warm.initial_routes, [[1, 2]])
+        self.assertEqual([(p.service_request_id, p.sequence_order) for p in warm.planned],
+                         [(self.first.pk, 1), (self.second.pk, 2)])
+        # Work in progress still blocks the technician
+        self.assertEqual([e.service_request_id for e in warm.existing], [self.busy.pk])
+
+    def test_solve_starts_from_the_plan(self):
+        assigned_date = timezone.make_aware(datetime.combine(DAY, time.min))
+        assignments, unserved, _, report = RoutingService().solve(
+            [self.technician], [self.new], assigned_date, warm_start=True
+        )
+        self.assertEqual(unserved, [])
+        self.assertIn('search:warm_start', report.phases)
+        self.assertEqual(sorted(a['service_request'].name for a in assignments), ['first', 'new', 'second'])
+
+    def test_unserved_summary_of_replanned_requests_needs_no_queries(self):
+        # Planned before the technician's shift was cut short: the re-plan drops it
+        late = self.make_request('late', window=(at(17), at(18)))
+        self.plan(late, 4, at(17))
+        assigned_date = timezone.make_aware(datetime.combine(DAY, time.min))
+        _, unserved, _, _ = RoutingService().solve([self.technician], [self.new], assigned_date, warm_start=True)
+        with self.assertNumQueries(0):
+            summary = unserved_summary(unserved, DAY)
+        self.assertEqual([(item['request_name'], item['customer']) for item in summary], [('late', 'customer')])
+
+class CandidateRequestsTests(PlanTestCase):
+    def test_windows_overlapping_the_day(self):
+        day = timedelta(days=1)
+        self.make_request('today', window=(at(9), at(12)))
+        self.make_request('overnight', window=(at(22) - day, at(2)))
+        self.make_request('ends_at_midnight', window=(at(9) - day, at(0)))
+        self.make_request('tomorrow', window=(at(9) + day, at(12) + day))
+        ServiceRequest.objects.filter(pk=self.make_request('no_address').pk).update(lat=None)
+        ServiceRequest.objects.filter(pk=self.make_request('cancelled').pk).update(status='cancelled')
+
+        def names(*args):
+            return sorted(candidate_requests(DAY, *args).values_list('name', flat=True))
+
+        self.assertEqual(names(), ['overnight', 'today'])
+        self.assertEqual(names(1, 0), ['ends_at_midnight', 'overnight', 'today'])
+        self.assertEqual(names(0, 1), ['overnight', 'today', 'tomorrow'])
+
+    @override_settings(SOLVE_JOB_RUNNER='worker')
+    def test_job_model_size_counts_replanned_requests(self):
+        for n, hour in enumerate([9, 10, 11], start=1):
+            self.plan(self.make_request(f'planned{n}', window=(at(hour), at(hour + 1))), n, at(hour))
+        self.make_request('new', window=(at(12), at(13)))
+        self.make_request('other_day', window=(at(12) + timedelta(days=3), at(13) + timedelta(days=3)))
+        job = SolveJob.objects.create(assigned_date=DAY, warm_start=True)
+        _run_solve_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.result['model_size'], {
+            'pending_requests': 2, 'candidate_requests': 4, 'replanned_requests': 3, 'technicians': 1,
+            'nodes': 5, 'unscoped_nodes': 6,
+        })
+
+class SolveRunTests(PlanTestCase):
+    def test_records_the_run_with_its_input(self):
+        self.make_request('first', window=(at(9), at(10)))
+        self.make_request('late', window=(at(17), at(18)))
+        snapshot = SolverSnapshot.load([self.technician], ServiceRequest.objects.all(), DAY)
+        service = RoutingService()
+        _, unserved, total_travel, report = service.solve([self.technician], [], DAY, snapshot=snapshot)
+
+        run = record_run(None, snapshot, report, service.parameters(), unserved, total_travel)
+
+        run.refresh_from_db()
+        self.assertEqual((run.assigned_date, run.request_count, run.assigned_count, run.unserved_count),
+                         (DAY, 2, 1, 1))
+        self.assertEqual(run.wall_seconds, report.wall_seconds)
+        self.assertEqual(run.report, report.to_dict())
+        self.assertEqual(run.parameters['time_limit_seconds'], service.config.time_limit_seconds)
+        self.assertEqual([item['request_name'] for item in run.unserved], ['late'])
+        loaded = run.load_snapshot()
+        self.assertEqual([req.name for req in loaded.reqs], [req.name for req in snapshot.reqs])
+        np.testing.assert_array_equal(loaded.job_windows, snapshot.job_windows)
+
+class SnapshotReplayTests(PlanTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'day.npz')
+        self.make_request('first', window=(at(9), at(10)))
+        self.make_request('second', window=(at(10), at(13)))
+
+    def replay(self, *args):
+        out = io.StringIO()
+        with self.assertNumQueries(0):
+            call_command('replay_solve_snapshot', self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_export_and_replay_without_queries(self):
+        call_command('export_solve_snapshot', str(DAY), output=self.path, stdout=io.StringIO())
+        output = self.replay('--time-limit', '1')
+        self.assertIn(f'Replaying {DAY}: 1 technicians, 2 requests, time limit 1s', output)
+        self.assertIn('2 assigned, 0 unserved', output)
+
+    def test_export_a_recorded_run(self):
+        snapshot = SolverSnapshot.load([self.technician], ServiceRequest.objects.all(), DAY)
+        service = RoutingService()
+        _, unserved, total_travel, report = service.solve([self.technician], [], DAY, snapshot=snapshot)
+        run = record_run(None, snapshot, report, service.parameters(), unserved, total_travel)
+        call_command('export_solve_snapshot', run=run.pk, output=self.path, stdout=io.StringIO())
+        self.assertEqual(SolverSnapshot.read_parameters(self.path)['time_limit_seconds'],
+                         service.config.time_limit_seconds)
+        self.assertIn('2 assigned, 0 unserved', self.replay('--backend', 'alns'))
+
+@override_settings(SOLVE_JOB_RUNNER='worker')
+class SolveJobTests(PlanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = SolveJob.objects.create(assigned_date=DAY)
+
+    def make_stale(self, **fields):
+        SolveJob.objects.filter(pk=self.job.pk).update(**fields)
+        self.job.refresh_from_db()
+
+    def test_runs_and_commits_a_queued_job(self):
+        self.make_request('first', window=(at(9), at(10)))
+        self.make_request('second', window=(at(10), at(13)))
+        _run_solve_job(self.job.pk)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'succeeded', self.job.error)
+        self.assertEqual(self.job.result['saved_count'], 2)
+        self.assertEqual(self.job.result['unserved_count'], 0)
+        self.assertIsNotNone(self.job.finished_at)
+        self.assertEqual(Assignment.objects.filter(assigned_date=DAY, technician=self.technician).count(), 2)
+        self.assertEqual(SolveRun.objects.get().job, self.job)
+
+    def test_cancelled_before_start_is_never_run(self):
+        cancel_solve_job(self.job)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'cancelled')
+        self.make_request('first')
+        _run_solve_job(self.job.pk)
+        self.assertFalse(Assignment.objects.exists())
+
+    def test_cancel_and_accept_a_running_job(self):
+        self.assertFalse(accept_solve_job(self.job))
+        self.make_stale(status='running', heartbeat_at=timezone.now())
+        self.assertFalse(CancelCheck(self.job.pk, interval=0)())
+        self.assertTrue(accept_solve_job(self.job))
+        cancel_solve_job(self.job)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.cancel_requested, self.job.accept_requested),
+                         ('running', True, True))
+        self.assertTrue(CancelCheck(self.job.pk, interval=0)())
+        self.assertFalse(accept_solve_job(self.job))
+
+    def test_cancel_check_refreshes_the_heartbeat(self):
+        self.make_stale(status='running', heartbeat_at=timezone.now() - timedelta(minutes=1))
+        CancelCheck(self.job.pk, interval=0, heartbeat=0)()
+        self.job.refresh_from_db()
+        self.assertGreater(self.job.heartbeat_at, timezone.now() - timedelta(seconds=10))
+
+    @override_settings(SOLVE_JOB_STALE_SECONDS=60)
+    def test_recovers_a_running_job_without_heartbeat(self):
+        self.make_stale(status='running', heartbeat_at=timezone.now() - timedelta(minutes=5))
+        with self.assertLogs('routing.jobs', 'WARNING'):
+            self.assertIsNone(active_job(date(2026, 11, 3)))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        replacement = active_job(DAY)
+        self.assertEqual((replacement.status, replacement.assigned_date), ('queued', DAY))
+        self.assertIn(f'#{replacement.pk}', self.job.progress)
+        self.assertEqual(recover_stale_jobs(), [])
+
+    @override_settings(SOLVE_JOB_STALE_SECONDS=60)
+    def test_queued_job_is_stale_only_while_nothing_runs(self):
+        self.make_stale(created_at=timezone.now() - timedelta(minutes=5))
+        running = SolveJob.objects.create(assigned_date=date(2026, 11, 3), status='running',
+                                          heartbeat_at=timezone.now())
+        self.assertEqual(recover_stale_jobs(), [])
+        SolveJob.objects.filter(pk=running.pk).update(status='succeeded')
+        with self.assertLogs('routing.jobs', 'WARNING'):
+            self.assertEqual([job.assigned_date for job in recover_stale_jobs()], [DAY])
+
+    @override_settings(SOLVE_JOB_STALE_SECONDS=60)
+    def test_stale_job_being_cancelled_is_not_requeued(self):
+        self.make_stale(status='running', cancel_requested=True, started_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(recover_stale_jobs(), [])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertIsNone(active_job(DAY))
+
+
+@override_settings(ROUTING_BATCH_WORKERS=2)
+class PlanDatesTests(PlanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.config = GoogleMapsConfig(time_limit_seconds=2, plateau_seconds=0.5)
+        self.next_day = DAY + timedelta(days=1)
+        self.make_request('monday', window=(at(9), at(12)))
+        self.make_request('monday late', window=(at(17), at(18)))
+        self.make_request('tuesday', window=(at(9) + timedelta(days=1), at(12) + timedelta(days=1)))
+
+    def test_plans_and_records_each_date(self):
+        days, report = plan_dates(DAY, self.next_day, config=self.config)
+
+        self.assertEqual([(day['date'], day['requests'], day['assigned_count'], day['unserved_count'])
+                          for day in days], [(DAY, 2, 1, 1), (self.next_day, 1, 1, 0)])
+        self.assertEqual(
+            sorted(Assignment.objects.values_list('assigned_date', 'service_request__name')),
+            [(DAY, 'monday'), (self.next_day, 'tuesday')],
+        )
+        self.assertEqual(ServiceRequest.objects.get(name='monday late').status, 'pending')
+        runs = SolveRun.objects.order_by('assigned_date')
+        self.assertEqual([(run.assigned_date, run.assigned_count) for run in runs], [(DAY, 1), (self.next_day, 1)])
+        self.assertEqual([day['run_id'] for day in days], [run.pk for run in runs])
+        self.assertEqual((report.parts, report.requests, report.assigned_count, report.dropped_count), (2, 3, 2, 1))
+
+    def test_cancelled_batch_saves_nothing(self):
+        with self.assertRaises(SolveCancelled):
+            plan_dates(DAY, self.next_day, config=self.config, should_stop=lambda: True)
+        self.assertFalse(Assignment.objects.exists())
+        self.assertFalse(SolveRun.objects.exists())
+
+    def test_end_before_start(self):
+        with self.assertRaises(ValueError):
+            plan_dates(self.next_day, DAY, config=self.config)
+
+
+class ConvergenceTests(TestCase):
+    def setUp(self):
+        self.job = SolveJob.objects.create(assigned_date=DAY)
+
+    def test_parts_report_under_the_job(self):
+        progress = JobProgress(self.job.pk)
+        progress.publish(100, 3)
+        progress.for_part(2).publish(50, 1)
+        points = SolutionPoint.objects.filter(job=self.job)
+        self.assertEqual([(p.part, p.objective, p.served_count) for p in points], [(0, 100, 3), (2, 50, 1)])
+        self.assertTrue(all(0 <= p.elapsed_seconds < 10 for p in points))
+
+    def test_best_plan_over_time_sums_the_parts(self):
+        for part, elapsed, objective, served in [(0, 0.1, 1000, 5), (1, 0.2, 500, 3), (0, 0.3, 1200, 6),
+                                                 (0, 0.4, 800, 6)]:
+            SolutionPoint.objects.create(job=self.job, part=part, elapsed_seconds=elapsed, objective=objective,
+                                         served_count=served)
+        self.assertEqual(convergence(self.job.pk), [
+            {'elapsed': 0.1, 'objective': 1000, 'served': 5, 'parts': 1},
+            {'elapsed': 0.2, 'objective': 1500, 'served': 8, 'parts': 2},
+            {'elapsed': 0.4, 'objective': 1300, 'served': 9, 'parts': 2},
+        ])
@@ -102,6 +102,16 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'routing': {
+            'handlers': ['console'],
+            'level': ROUTING_LOG_LEVEL,
+            'propagate': False,
+        },
+        'core.services': {
+            'handlers': ['console'],
+            'level': ROUTING_LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
 
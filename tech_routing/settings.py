@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -150,3 +151,48 @@ LOGOUT_REDIRECT_URL = "/accounts/login/"
 
 # Google Maps API key (can be set in environment or admin panel)
 GOOGLE_MAPS_API_KEY = ""
+
+# Background assignment solves: 'pool' runs them in a process pool of the web worker
+# that queued them (SOLVE_JOB_WORKERS processes each); 'worker' leaves them to
+# `manage.py run_solve_jobs` processes
+SOLVE_JOB_RUNNER = os.environ.get('SOLVE_JOB_RUNNER', 'pool')
+SOLVE_JOB_WORKERS = 1
+# Running jobs refresh a heartbeat this often; jobs without one for SOLVE_JOB_STALE_SECONDS
+# (worker killed or recycled mid-solve) are failed and re-queued
+SOLVE_JOB_HEARTBEAT_SECONDS = 10
+SOLVE_JOB_STALE_SECONDS = 120
+# Processes for solving decomposed sub-problems in parallel (None = one per CPU)
+ROUTING_SUBPROBLEM_WORKERS = None
+# Days with fewer requests are solved as one model; decomposed days with fewer than
+# ROUTING_PARALLEL_MIN_REQUESTS solve their sub-problems in process, without a pool
+ROUTING_DECOMPOSE_MIN_REQUESTS = 100
+ROUTING_PARALLEL_MIN_REQUESTS = 300
+# Processes (strategies) of a portfolio search (None = one per CPU, up to the portfolio size)
+ROUTING_PORTFOLIO_WORKERS = None
+# Processes for solving the days of a batch plan (plan_dates) in parallel (None = one per CPU)
+ROUTING_BATCH_WORKERS = None
+
+# Solver and bulk upload logging: one summary record per run at INFO;
+# set ROUTING_LOG_LEVEL=DEBUG for per-request / per-route-step detail
+ROUTING_LOG_LEVEL = os.environ.get('ROUTING_LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'routing': {
+            'handlers': ['console'],
+            'level': ROUTING_LOG_LEVEL,
+            'propagate': False,
+        },
+        'core.services': {
+            'handlers': ['console'],
+            'level': ROUTING_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}